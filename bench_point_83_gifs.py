@@ -0,0 +1,396 @@
+"""bench_point_83_gifs.py
+
+Offline micro-benchmarks for the point_83_gifs crawl hot path.
+
+Usage:
+- python bench_point_83_gifs.py            (run every benchmark)
+- python bench_point_83_gifs.py dedup      (run only the named benchmark(s))
+- python bench_point_83_gifs.py crawl      (end-to-end runs against a local fake forum)
+
+Nothing here touches the network; results are printed as plain-text tables.
+The parse benchmark uses synthetic phpBB pages unless POINT83_BENCH_PAGES names
+a directory of saved forum/thread pages (*.html). The crawl benchmark runs
+Scraper end to end against FakeForumServer, a synthetic forum served from
+127.0.0.1; POINT83_BENCH_LATENCY_MS and POINT83_BENCH_GIF_KB set its per-request
+latency and GIF size.
+"""
+
+import glob
+import http.server
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+from urllib.parse import parse_qs, urlsplit
+
+import point_83_gifs as mod
+
+
+def _per_call_us(func, calls):
+    """Run ``func`` ``calls`` times and return the mean cost in microseconds."""
+    started = time.perf_counter()
+    for i in range(calls):
+        func(i)
+    return (time.perf_counter() - started) / calls * 1e6
+
+
+def bench_dedup(sizes=(1_000, 10_000, 100_000, 400_000), lookups=20_000):
+    """Dedup cost per GIF as the index of already-saved paths grows.
+
+    Each size pre-fills the scraper's index and then times Page._reserve for
+    URLs that are already known (the common "reaction GIF seen again" case) and
+    for new ones. With a hashed index both columns should stay flat.
+    """
+    print("dedup: mean cost of Page._reserve (microseconds)")
+    print(f"{'index size':>12} {'known url':>12} {'new url':>12}")
+    for size in sizes:
+        s = mod.Scraper(max_gifs_per_forum_page=10**9)
+        s.all_saved_gif_paths.update(
+            mod.normalize_gif_url(f"http://i.imgur.com/{n}.gif") for n in range(size)
+        )
+        page = mod.Page(s.parse(""), "bench", s)
+
+        def known(i):
+            page._reserve(f"i.imgur.com/{(i * 7919) % size}.gif")
+
+        def new(i):
+            path = f"new.example.com/{i}.gif"
+            page._reserve(path)
+            page._release(path, False)
+
+        print(
+            f"{size:>12} {_per_call_us(known, lookups):>12.3f} "
+            f"{_per_call_us(new, lookups):>12.3f}"
+        )
+    print()
+
+
+def sample_forum_page(threads=30, start=0, forum_id=2, has_next=True):
+    """Return a phpBB-style forum index page listing ``threads`` topics.
+
+    ``start`` is the page's "start=" offset; topic ids begin at 1000 + start.
+    """
+    rows = []
+    for n in range(start, start + threads):
+        rows.append(
+            '<tr><td class="row1" width="20" align="center">'
+            '<img src="templates/subSilver/images/folder.gif" alt="No new posts"></td>'
+            '<td class="row1" width="100%"><span class="blacklink">'
+            f'<a href="viewtopic.php?t={1000 + n}&amp;sid=0f1e2d" class="topictitle">'
+            f"Thread number {n} &mdash; ride report</a></span>"
+            '<span class="gensmall"><br />[ Goto page: '
+            f'<a href="viewtopic.php?t={1000 + n}&amp;start=15">2</a> ]</span></td>'
+            f'<td class="row2" align="center"><span class="postdetails">{n * 3}</span></td>'
+            '<td class="row3" align="center"><span class="name">'
+            f'<a href="profile.php?mode=viewprofile&amp;u={n}">rider{n}</a></span></td>'
+            f'<td class="row2" align="center"><span class="postdetails">{n * 40}</span></td>'
+            '<td class="row3Right" align="center" nowrap="nowrap">'
+            '<span class="postdetails">Mon Jan 01, 2018 9:00 pm<br />'
+            f'<a href="profile.php?mode=viewprofile&amp;u={n}">rider{n}</a> '
+            f'<a href="viewtopic.php?p={50000 + n}#{50000 + n}">'
+            '<img src="templates/subSilver/images/icon_latest_reply.gif"></a>'
+            "</span></td></tr>"
+        )
+    next_href = (
+        f"viewforum.php?f={forum_id}&amp;topicdays=0&amp;"
+        f"start={start + mod.THREADS_PER_FORUM_PAGE}"
+    )
+    nav = f'<a href="{next_href}">2</a>'
+    if has_next:
+        nav += f' <a href="{next_href}">Next</a>'
+    return (
+        "<html><head><title>point83.com</title></head><body>"
+        '<table width="100%" cellpadding="4" cellspacing="1" class="forumline">'
+        + "".join(rows)
+        + "</table>"
+        f'<span class="nav">Goto page <b>1</b>, {nav}</span></body></html>'
+    )
+
+
+def sample_thread_page(
+    posts=15,
+    gifs_per_post=3,
+    topic=1000,
+    start=0,
+    has_next=True,
+    img_base="http://i.imgur.com/",
+    pages=None,
+):
+    """Return a phpBB-style thread page with ``posts`` posts containing GIFs.
+
+    GIF sources are ``img_base`` + "<post>_<n>.gif"; the "Next" link (if
+    ``has_next``) points at the page starting at ``start + posts``. With
+    ``pages`` (the thread's page count) the "Goto page" links list every page.
+    """
+    body = []
+    for n in range(posts):
+        imgs = "".join(
+            f'<img src="{img_base}{n}_{g}.gif" border="0" />'
+            for g in range(gifs_per_post)
+        )
+        body.append(
+            f'<tr><td class="row1" valign="top"><a name="{60000 + n}"></a>'
+            f'<span class="name"><b>rider{n}</b></span><br />'
+            '<span class="postdetails">Joined: 12 Feb 2008<br />Posts: 4321</span>'
+            '<img src="images/avatars/gallery/bike.jpg" /></td>'
+            '<td class="row1" width="100%"><table width="100%"><tr><td>'
+            f'<a href="viewtopic.php?p={60000 + n}#{60000 + n}">'
+            '<img src="templates/subSilver/images/icon_minipost.gif" /></a>'
+            '<span class="postdetails">Posted: Mon Jan 01, 2018</span></td></tr>'
+            f'<tr><td><span class="postbody">Quote of the day {n}, '
+            + "lots of banter &amp; more banter " * 12
+            + f"{imgs}</span></td></tr></table></td></tr>"
+        )
+    next_href = (
+        f"viewtopic.php?t={topic}&amp;postdays=0&amp;postorder=asc&amp;"
+        f"start={start + posts}"
+    )
+    nav = f'<a href="{next_href}">2</a> '
+    if pages is not None:
+        nav = "".join(
+            (
+                f"<b>{n}</b>, "
+                if (n - 1) * posts == start
+                else f'<a href="{next_href.rsplit("=", 1)[0]}={(n - 1) * posts}">{n}</a>, '
+            )
+            for n in range(1, pages + 1)
+        )
+    if has_next:
+        nav += f'<a href="{next_href}">Next</a>'
+    return (
+        '<html><body><table class="forumline">'
+        + "".join(body)
+        + f'</table><span class="nav">Goto page 1, {nav}</span></body></html>'
+    )
+
+
+def _sample_pages():
+    directory = os.environ.get("POINT83_BENCH_PAGES")
+    if directory:
+        pages = []
+        for path in sorted(glob.glob(os.path.join(directory, "*.html"))):
+            with open(path, "r", encoding="utf-8", errors="replace") as page:
+                pages.append((os.path.basename(path), page.read()))
+        return pages
+    return [
+        ("forum index (synthetic)", sample_forum_page()),
+        ("thread page (synthetic)", sample_thread_page()),
+    ]
+
+
+def bench_parse(rounds=50):
+    """Time each page-parsing backend on the same sample pages."""
+    print("parse: mean time per page (milliseconds)")
+    names = sorted(mod.PARSERS)
+    print(f"{'page':<28} {'KB':>6} " + " ".join(f"{n:>8}" for n in names))
+    for label, html in _sample_pages():
+        timings = []
+        for name in names:
+            parse = mod.PARSERS[name]
+            started = time.perf_counter()
+            for _ in range(rounds):
+                parse(html)
+            timings.append((time.perf_counter() - started) / rounds * 1e3)
+        print(
+            f"{label[:28]:<28} {len(html) / 1024:>6.1f} "
+            + " ".join(f"{t:>8.2f}" for t in timings)
+        )
+    print()
+
+
+class _FakeForumHandler(http.server.BaseHTTPRequestHandler):
+    """Serves FakeForumServer's pages and GIFs, each after the configured latency."""
+
+    def do_GET(self):
+        forum = self.server.forum
+        time.sleep(forum.latency_ms / 1000)
+        parts = urlsplit(self.path)
+        query = {k: v[0] for k, v in parse_qs(parts.query).items()}
+        body, content_type = forum.render(parts.path, query)
+        if body is None:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class FakeForumServer:
+    """A synthetic phpBB-style forum served from 127.0.0.1, as a context manager.
+
+    Forum f=2 has ``forum_pages`` index pages of ``threads_per_page`` topics.
+    Each topic has ``thread_pages`` pages of ``posts`` posts, each post with
+    ``gifs_per_post`` distinct GIFs of ``gif_kb`` KB. Every response is delayed
+    by ``latency_ms`` milliseconds. ``base_url`` is the forum root to give
+    Scraper once the server is running.
+    """
+
+    def __init__(
+        self,
+        forum_pages=2,
+        threads_per_page=10,
+        thread_pages=2,
+        posts=5,
+        gifs_per_post=1,
+        gif_kb=64,
+        latency_ms=20,
+    ):
+        self.forum_pages = forum_pages
+        self.threads_per_page = threads_per_page
+        self.thread_pages = thread_pages
+        self.posts = posts
+        self.gifs_per_post = gifs_per_post
+        self.gif_kb = gif_kb
+        self.latency_ms = latency_ms
+        self.base_url = None
+        self._server = None
+
+    @property
+    def expected_thread_pages(self):
+        return self.forum_pages * self.threads_per_page * self.thread_pages
+
+    @property
+    def expected_gifs(self):
+        return self.expected_thread_pages * self.posts * self.gifs_per_post
+
+    def render(self, path, query):
+        """Return (body bytes, Content-Type) for a request, or (None, None) for a 404."""
+        if path == "/forum/viewforum.php":
+            start = int(query.get("start", 0))
+            page = start // mod.THREADS_PER_FORUM_PAGE
+            if page >= self.forum_pages:
+                return None, None
+            html = sample_forum_page(
+                self.threads_per_page,
+                start,
+                int(query.get("f", 2)),
+                has_next=page < self.forum_pages - 1,
+            )
+            return html.encode(), "text/html; charset=utf-8"
+        if path == "/forum/viewtopic.php":
+            topic, start = int(query.get("t", 0)), int(query.get("start", 0))
+            page = start // self.posts
+            if page >= self.thread_pages:
+                return None, None
+            html = sample_thread_page(
+                self.posts,
+                self.gifs_per_post,
+                topic,
+                start,
+                has_next=page < self.thread_pages - 1,
+                img_base=f"{self.root_url}/img/{topic}_{start}_",
+                pages=self.thread_pages,
+            )
+            return html.encode(), "text/html; charset=utf-8"
+        if path.startswith("/img/"):
+            # distinct bytes per URL, so content dedup does not kick in
+            body = (b"GIF89a" + path.encode()).ljust(self.gif_kb * 1024, b"\0")
+            return body, "image/gif"
+        return None, None
+
+    def __enter__(self):
+        self._server = http.server.ThreadingHTTPServer(
+            ("127.0.0.1", 0), _FakeForumHandler
+        )
+        self._server.daemon_threads = True
+        self._server.forum = self
+        self.root_url = f"http://127.0.0.1:{self._server.server_port}"
+        self.base_url = self.root_url + "/forum/"
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+CRAWL_CONFIGS = (
+    ("sync", {}),
+    ("sync, Next links only", {"thread_page_fetchers": 1}),
+    ("sync, 8 workers", {"download_workers": 8}),
+    ("sync, prefetch 2", {"prefetch_forum_pages": 2}),
+    ("asyncio", {"engine": "asyncio"}),
+    ("asyncio, bs4 parser", {"engine": "asyncio", "parser": "bs4"}),
+)
+
+
+def bench_crawl(configs=CRAWL_CONFIGS, **forum_options):
+    """Crawl FakeForumServer end to end with each Scraper configuration.
+
+    Reports wall time, thread pages, GIFs and MB per second, and the GIF fetch
+    and thread fetch latency (p50/p90) from the run's Metrics.
+    """
+    forum_options.setdefault(
+        "latency_ms", float(os.environ.get("POINT83_BENCH_LATENCY_MS", 20))
+    )
+    forum_options.setdefault("gif_kb", int(os.environ.get("POINT83_BENCH_GIF_KB", 64)))
+    with FakeForumServer(**forum_options) as forum:
+        print(
+            f"crawl: {forum.expected_thread_pages} thread pages, "
+            f"{forum.expected_gifs} GIFs of {forum.gif_kb} KB, "
+            f"{forum.latency_ms:g} ms latency per request"
+        )
+        print(
+            f"{'config':<22} {'secs':>7} {'tpg/s':>7} {'GIFs/s':>8} {'MB/s':>7} "
+            f"{'gif p50/p90 ms':>15} {'thread p50/p90 ms':>18}"
+        )
+        for label, options in configs:
+            with tempfile.TemporaryDirectory() as out_dir:
+                s = mod.Scraper(
+                    base_url=forum.base_url,
+                    forums=[2],
+                    start_page=1,
+                    total_pages=forum.forum_pages,
+                    output_dir=out_dir,
+                    console_level=logging.CRITICAL,
+                    **options,
+                )
+                started = time.perf_counter()
+                s.run()
+                seconds = time.perf_counter() - started
+                report = s.metrics_report()
+            stages = report["stages"]
+            gif, thread = stages.get("gif fetch", {}), stages.get("thread fetch", {})
+            megabytes = (report["bytes"]["pages"] + report["bytes"]["gifs"]) / 1048576
+            print(
+                f"{label[:22]:<22} {seconds:>7.2f} "
+                f"{s.total_thread_pgs_scraped / seconds:>7.1f} "
+                f"{s.total_gifs_downloaded / seconds:>8.1f} "
+                f"{megabytes / seconds:>7.2f} "
+                f"{gif.get('p50_ms', 0):>7.1f}/{gif.get('p90_ms', 0):<7.1f} "
+                f"{thread.get('p50_ms', 0):>9.1f}/{thread.get('p90_ms', 0):<8.1f}"
+            )
+            if s.total_gifs_downloaded != forum.expected_gifs:
+                print(
+                    f"  WARNING: {s.total_gifs_downloaded} of "
+                    f"{forum.expected_gifs} GIFs downloaded"
+                )
+    print()
+
+
+BENCHMARKS = {
+    "dedup": bench_dedup,
+    "parse": bench_parse,
+    "crawl": bench_crawl,
+}
+
+
+def main(argv=None):
+    names = (argv if argv is not None else sys.argv[1:]) or list(BENCHMARKS)
+    for name in names:
+        if name not in BENCHMARKS:
+            print(f"ERROR:  unknown benchmark {name!r}; choose from {list(BENCHMARKS)}")
+            return 1
+        BENCHMARKS[name]()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
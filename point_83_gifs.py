@@ -4,20 +4,2026 @@ Simple scraper to find and download GIFs from point83.com forum threads.
 
 Usage:
 - Run the script and follow prompts to pick a forum, start page, and page count.
+- Or run it headless, e.g. ``python point_83_gifs.py --forum 2 --pages 5``
+  (see ``--help``), or call ``Scraper(forums=[2], total_pages=5).run()``.
 - GIFs and a log file are written to a timestamped folder.
+- Resume an interrupted run with ``python point_83_gifs.py --resume FOLDER``.
+- Spread one crawl over several processes: ``--coordinate QUEUE`` queues the
+  threads of the chosen forums, and any number of ``--work QUEUE`` processes
+  sharing ``--output-dir`` download them.
 
 This module defines:
 - Scraper: holds run-time configuration and mutable state.
 - Forum/Thread/Page: crawler classes that use a Scraper instance for shared state.
+- AsyncEngine: optional asyncio driver for the same Forum/Thread/Page traversal.
+- Manifest: optional SQLite record of saved GIFs and thread progress across runs.
+- WorkQueue: SQLite queue of threads for a coordinator and worker processes.
+- HttpCache: optional on-disk HTTP cache used for conditional (304) requests.
+- HostLimiter: per-host rate limit and adaptive concurrency applied to every fetch.
+- Metrics: per-stage latency histograms, bytes, errors and per-host stats of a run.
+- parse_links_fast/parse_links_bs4: page-parsing backends selected by Scraper.parser.
+- MediaFilter: picks the GIF/animation URLs to download from a page's links.
+- RunLog: the run's buffered log file and level-filtered console output.
+- SpilledSet: set of strings kept as digests in memory and sorted on disk (low_memory).
+- SpilledDict: str -> str mapping kept in a scratch SQLite file (low_memory).
+- FolderStorage/ArchiveStorage: where saved GIFs are written (folder layout or archive).
+- GifValidator: checks saved GIFs and indexes their metadata in a process pool.
+- Checkpoint: periodically saved crawl position used to resume an interrupted run.
+- main: argparse command-line entry point.
 """
 
+import argparse
 import os
 import sys
 import re
+import asyncio
+import atexit
+import hashlib
+import heapq
+import json
+import logging
+import multiprocessing
+import queue
+import shutil
+import tarfile
+import socket
+import sqlite3
+import struct
+import tempfile
+import threading
+import time
+import zipfile
+from collections import deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait
+from contextlib import contextmanager
 from datetime import datetime
+from email.utils import parsedate_to_datetime
+from html.parser import HTMLParser
+from urllib.parse import urlsplit
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import bs4
 
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+FORUM_BASE_URL = "http://www.point83.com/forum/"
+# page count meaning "every page of the forum"
+ALL_PAGES = 1000000
+# forum id (the "f=" in viewforum.php) -> display name
+FORUMS = {
+    2: "Westlake Center",
+    4: "Wrenches Gears Lawns and Routes",
+    10: "Point83 Navy",
+}
+
+
+POST_ID_RE = re.compile(r"viewtopic\.php\?p=(\d+)")
+# start of an HTML/XML body, e.g. an error page served under a .gif URL
+HTML_START_RE = re.compile(rb"\s*<(!doctype|html|head|body|\?xml)", re.IGNORECASE)
+# Content-Types accepted for a GIF besides image/*
+BINARY_CONTENT_TYPES = ("application/octet-stream", "binary/octet-stream")
+# forum index pages list this many threads; page n starts at (n - 1) * 30
+THREADS_PER_FORUM_PAGE = 30
+# text of a numbered pagination link ("Goto page 1, 2, 3 ... 200")
+PAGE_NUMBER_RE = re.compile(r"\A[0-9]+\Z")
+# the "start=" offset of a forum or thread page URL
+START_RE = re.compile(r"([?&]start=)([0-9]+)")
+
+
+def normalize_gif_url(url):
+    """Return the dedup key for a GIF URL: the URL with its http(s) scheme removed."""
+    return url.replace("http://", "").replace("https://", "")
+
+
+def forum_page_url(forum_url, page_num):
+    """Return the URL of forum index page ``page_num`` for ``forum_url`` (page 1 as is)."""
+    if page_num == 1:
+        return forum_url
+    index = (page_num - 1) * THREADS_PER_FORUM_PAGE
+    return forum_url + "&topicdays=0&start=" + str(index)
+
+
+def peak_rss_bytes():
+    """Return the process's peak resident set size in bytes, or None if unknown."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def find_last_post_id(html):
+    """Return the highest post id linked from a page ("viewtopic.php?p=N"), or None."""
+    post_ids = [int(post_id) for post_id in POST_ID_RE.findall(html)]
+    return max(post_ids) if post_ids else None
+
+
+# What the crawler needs from a forum or thread page:
+#   threads: list of (thread uri, thread name, last-post id in its table row)
+#   next_hrefs: hrefs of <a> tags whose text is exactly "Next"
+#   img_srcs: src of every <img>, in document order
+#   last_post_id: highest "viewtopic.php?p=N" id linked from the page
+#   page_hrefs: (page number, href) of <a> tags whose text is a page number
+#   link_hrefs: href of every <a>, in document order
+PageLinks = namedtuple(
+    "PageLinks", "threads next_hrefs img_srcs last_post_id page_hrefs link_hrefs"
+)
+
+# media file extensions downloaded by default
+MEDIA_EXTENSIONS = ("gif", "gifv", "webp")
+# extensions fetched as another one: imgur's .gifv pages wrap the .gif
+MEDIA_REWRITES = {"gifv": "gif"}
+
+
+class MediaFilter:
+    """Picks the media URLs to download from a page's <img> sources and <a> links.
+
+    A URL matches when it is absolute http(s), its path ends in one of
+    ``extensions`` (any case, optionally followed by a query string) and its
+    host passes the host rules: one of ``include_hosts`` or a subdomain of one
+    (when given), and neither one of ``exclude_hosts`` nor a subdomain of one.
+    ``links`` decides whether <a href> targets count as well as <img> sources.
+
+    Everything is compiled into one regular expression up front, and select()
+    runs it once over all of a page's URLs joined by newlines, so a page costs
+    a single regex pass however many URLs it has.
+    """
+
+    def __init__(
+        self,
+        extensions=MEDIA_EXTENSIONS,
+        include_hosts=None,
+        exclude_hosts=None,
+        links=True,
+    ):
+        self.extensions = tuple(ext.lower().lstrip(".") for ext in extensions)
+        if not self.extensions:
+            raise ValueError("no media extensions given")
+        self.include_hosts = tuple(include_hosts or ())
+        self.exclude_hosts = tuple(exclude_hosts or ())
+        self.links = links
+        host = r"[^/?#\s]+"
+        if self.include_hosts:
+            host = self._host_rule(self.include_hosts) + r"(?::[0-9]+)?"
+        if self.exclude_hosts:
+            host = f"(?!{self._host_rule(self.exclude_hosts)}){host}"
+        extension = "|".join(re.escape(ext) for ext in self.extensions)
+        self._pattern = re.compile(
+            rf"^(?P<base>https?://{host}/[^?#\n]*\.)(?P<ext>{extension})"
+            r"(?P<query>\?[^#\n]*)?(?:#[^\n]*)?$",
+            re.IGNORECASE | re.MULTILINE,
+        )
+
+    def select(self, links):
+        """Return the media URLs on a page (PageLinks), in order and without repeats.
+
+        <img> sources come first, then <a> targets; rewritten extensions
+        (MEDIA_REWRITES) are applied and fragments dropped. URLs containing a
+        line break are skipped, since each line of the joined text is matched
+        as one URL.
+        """
+        urls = links.img_srcs + links.link_hrefs if self.links else links.img_srcs
+        joined = "\n".join(url for url in urls if "\n" not in url and "\r" not in url)
+        selected = {}
+        for match in self._pattern.finditer(joined):
+            ext = match.group("ext").lower()
+            url = (
+                match.group("base")
+                + MEDIA_REWRITES.get(ext, match.group("ext"))
+                + (match.group("query") or "")
+            )
+            selected[url] = None
+        return list(selected)
+
+    @staticmethod
+    def _host_rule(hosts):
+        # a host (any case) or a subdomain of it, up to the port or path
+        names = "|".join(re.escape(host.lower()) for host in hosts)
+        return rf"(?:[^/?#\s]*\.)?(?:{names})(?=[:/?#]|$)"
+
+
+def slim_page_links(links, media):
+    """Return thread-page ``links`` reduced to the media URLs, Next links and post id."""
+    return PageLinks(
+        [], links.next_hrefs, media.select(links), links.last_post_id, [], []
+    )
+
+
+def _thread_uri(href):
+    """Trim a "viewtopic.php?t=N&..." href to its "viewtopic.php?t=N" part."""
+    return href[href.find("viewtopic") :].split("&")[0]
+
+
+def thread_page_uris(links, uri):
+    """Return the uris of the thread pages after page ``uri``, from its pagination.
+
+    phpBB lists a thread's pages as numbered links ("Goto page 1, 2, 3 ... 200")
+    whose start= offsets are multiples of the posts per page, so every later
+    page's uri is the last page's link with its offset substituted.
+
+    Returns:
+        list: uris of the following pages in order; empty when the page is the
+        last one or its page links are missing or do not line up, in which
+        case the caller follows the "Next" link instead.
+    """
+    topic = _thread_uri(uri)
+    offsets = {}
+    for page_num, href in links.page_hrefs:
+        match = START_RE.search(href)
+        if match and page_num > 1 and _thread_uri(href) == topic:
+            offsets[page_num] = (int(match.group(2)), href)
+    if not offsets:
+        return []
+    first = min(offsets)
+    per_page = offsets[first][0] // (first - 1)
+    if per_page < 1 or any(
+        start != (page_num - 1) * per_page for page_num, (start, _) in offsets.items()
+    ):
+        return []
+    match = START_RE.search(uri)
+    current = int(match.group(2)) // per_page + 1 if match else 1
+    last = max(offsets)
+    template = offsets[last][1]
+    return [
+        START_RE.sub(rf"\g<1>{(page_num - 1) * per_page}", template, count=1)
+        for page_num in range(current + 1, last + 1)
+    ]
+
+
+def parse_links_bs4(html):
+    """Extract PageLinks by building a full BeautifulSoup tree (reference backend)."""
+    soup = bs4.BeautifulSoup(html, "html.parser")
+    threads = []
+    for span in soup.find_all("span", class_="blacklink"):
+        anchor = span.find("a", href=re.compile(r"viewtopic\.php\?t"))
+        if anchor is not None:
+            row = span.find_parent("tr")
+            threads.append(
+                (
+                    _thread_uri(anchor.get("href")),
+                    span.text,
+                    find_last_post_id(str(row)) if row is not None else None,
+                )
+            )
+    next_hrefs = [a.get("href") for a in soup.find_all("a", href=True, string="Next")]
+    img_srcs = [img.get("src") for img in soup.find_all("img", src=True)]
+    page_hrefs = [
+        (int(a.string), a.get("href"))
+        for a in soup.find_all("a", href=True, string=PAGE_NUMBER_RE)
+    ]
+    link_hrefs = [a.get("href") for a in soup.find_all("a", href=True) if a.get("href")]
+    return PageLinks(
+        threads, next_hrefs, img_srcs, find_last_post_id(html), page_hrefs, link_hrefs
+    )
+
+
+class _LinkExtractor(HTMLParser):
+    """Streaming extractor behind parse_links_fast; keeps no tree, only the PageLinks."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.threads = []
+        self.next_hrefs = []
+        self.img_srcs = []
+        self.last_post_id = None
+        self.page_hrefs = []
+        self.link_hrefs = []
+        # open <tr> rows: [max post id seen, indexes of threads found in the row]
+        self._rows = []
+        # depth of nested <span> inside the current span.blacklink (0 = outside)
+        self._blacklink_depth = 0
+        self._blacklink_text = []
+        self._blacklink_uri = None
+        # href and text of the <a> being read, when it may be a "Next" link
+        self._anchor_href = None
+        self._anchor_text = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "img":
+            src = dict(attrs).get("src")
+            if src:
+                self.img_srcs.append(src)
+        elif tag == "a":
+            href = dict(attrs).get("href")
+            if href:
+                self.link_hrefs.append(href)
+                self._anchor_href = href
+                self._anchor_text = []
+                match = POST_ID_RE.search(href)
+                if match:
+                    self._saw_post_id(int(match.group(1)))
+                if (
+                    self._blacklink_depth
+                    and self._blacklink_uri is None
+                    and "viewtopic.php?t" in href
+                ):
+                    self._blacklink_uri = _thread_uri(href)
+        elif tag == "span":
+            if self._blacklink_depth:
+                self._blacklink_depth += 1
+            elif "blacklink" in (dict(attrs).get("class") or "").split():
+                self._blacklink_depth = 1
+                self._blacklink_text = []
+                self._blacklink_uri = None
+        elif tag == "tr":
+            self._rows.append([None, []])
+
+    def handle_endtag(self, tag):
+        if tag == "a" and self._anchor_href is not None:
+            text = "".join(self._anchor_text)
+            if text == "Next":
+                self.next_hrefs.append(self._anchor_href)
+            elif PAGE_NUMBER_RE.search(text):
+                self.page_hrefs.append((int(text), self._anchor_href))
+            self._anchor_href = None
+        elif tag == "span" and self._blacklink_depth:
+            self._blacklink_depth -= 1
+            if not self._blacklink_depth and self._blacklink_uri is not None:
+                if self._rows:
+                    self._rows[-1][1].append(len(self.threads))
+                self.threads.append(
+                    (self._blacklink_uri, "".join(self._blacklink_text), None)
+                )
+        elif tag == "tr" and self._rows:
+            self._close_row()
+
+    def handle_data(self, data):
+        if self._blacklink_depth:
+            self._blacklink_text.append(data)
+        if self._anchor_href is not None:
+            self._anchor_text.append(data)
+
+    def close(self):
+        super().close()
+        while self._rows:
+            self._close_row()
+
+    def _saw_post_id(self, post_id):
+        if self.last_post_id is None or post_id > self.last_post_id:
+            self.last_post_id = post_id
+        for row in self._rows:
+            if row[0] is None or post_id > row[0]:
+                row[0] = post_id
+
+    def _close_row(self):
+        row_post_id, thread_indexes = self._rows.pop()
+        for index in thread_indexes:
+            uri, name, _ = self.threads[index]
+            self.threads[index] = (uri, name, row_post_id)
+
+
+def parse_links_fast(html):
+    """Extract PageLinks in a single streaming pass, without building a tree."""
+    extractor = _LinkExtractor()
+    extractor.feed(html)
+    extractor.close()
+    return PageLinks(
+        extractor.threads,
+        extractor.next_hrefs,
+        extractor.img_srcs,
+        extractor.last_post_id,
+        extractor.page_hrefs,
+        extractor.link_hrefs,
+    )
+
+
+PARSERS = {"fast": parse_links_fast, "bs4": parse_links_bs4}
+
+
+class Manifest:
+    """Persistent, cross-run record of downloaded GIFs and per-thread progress.
+
+    Backed by a SQLite file so that later runs sharing an output directory only
+    download GIFs that no earlier run has saved. Safe to use from several
+    threads; writes are committed every ``commit_every`` changes and on close().
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS gifs (
+            path TEXT PRIMARY KEY,
+            sha256 TEXT,
+            file_name TEXT,
+            thread TEXT,
+            saved_at TEXT
+        );
+        CREATE TABLE IF NOT EXISTS threads (
+            uri TEXT PRIMARY KEY,
+            name TEXT,
+            last_page_num INTEGER,
+            last_page_uri TEXT,
+            last_post_id INTEGER,
+            updated_at TEXT
+        );
+    """
+
+    def __init__(self, path, commit_every=50):
+        self.path = path
+        self.commit_every = commit_every
+        self._lock = threading.Lock()
+        self._uncommitted = 0
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(self.SCHEMA)
+        self._conn.commit()
+
+    def known_paths(self, into=None):
+        """Return the normalized GIF paths saved by any run, added to ``into``.
+
+        ``into`` is any set-like object with add() (a SpilledSet in low-memory
+        mode); a new set by default. Rows are streamed, not fetched all at once.
+        """
+        paths = set() if into is None else into
+        with self._lock:
+            for (path,) in self._conn.execute("SELECT path FROM gifs"):
+                paths.add(path)
+        return paths
+
+    def record_gif(self, path, sha256, file_name, thread):
+        """Record a saved GIF (normalized path, content hash, file name, thread prefix)."""
+        self._write(
+            "INSERT OR REPLACE INTO gifs VALUES (?, ?, ?, ?, ?)",
+            (path, sha256, file_name, thread, datetime.now().isoformat()),
+        )
+
+    def known_hashes(self, into=None):
+        """Return {sha256: file name} for the first file saved with each content hash.
+
+        Entries are added with setdefault() to ``into`` (a dict by default, a
+        SpilledDict in low-memory mode), so entries already there are kept.
+        """
+        hashes = {} if into is None else into
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT sha256, file_name FROM gifs WHERE sha256 IS NOT NULL "
+                "ORDER BY saved_at"
+            )
+            # oldest first, so the oldest file name wins
+            for sha256, file_name in rows:
+                hashes.setdefault(sha256, file_name)
+        return hashes
+
+    def thread_state(self, uri):
+        """Return the stored progress for thread ``uri`` as a dict, or None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT name, last_page_num, last_page_uri, last_post_id "
+                "FROM threads WHERE uri = ?",
+                (uri,),
+            ).fetchone()
+        if row is None:
+            return None
+        keys = ("name", "last_page_num", "last_page_uri", "last_post_id")
+        return dict(zip(keys, row))
+
+    def record_thread_page(self, uri, name, page_num, page_uri, last_post_id):
+        """Record that page ``page_num`` (at ``page_uri``) of thread ``uri`` was processed."""
+        self._write(
+            "INSERT OR REPLACE INTO threads VALUES (?, ?, ?, ?, ?, ?)",
+            (uri, name, page_num, page_uri, last_post_id, datetime.now().isoformat()),
+        )
+
+    def commit(self):
+        """Flush pending writes to disk."""
+        with self._lock:
+            self._conn.commit()
+            self._uncommitted = 0
+
+    def close(self):
+        """Commit and close the underlying database."""
+        with self._lock:
+            self._conn.commit()
+            self._conn.close()
+
+    def _write(self, sql, params):
+        with self._lock:
+            self._conn.execute(sql, params)
+            self._uncommitted += 1
+            if self._uncommitted >= self.commit_every:
+                self._conn.commit()
+                self._uncommitted = 0
+
+
+class WorkQueue:
+    """SQLite queue of threads shared by a coordinator and worker processes.
+
+    The coordinator add()s every thread it finds on the forum index pages and
+    then calls finish_enumeration(). Workers lease() one thread at a time; a
+    lease lasts ``lease_seconds`` unless renew()ed, so a thread whose worker
+    died is handed to another worker once its lease expires. A thread leased
+    ``max_attempts`` times without completing is marked failed.
+
+    The queue also holds the GIF claims that keep dedup global: a worker
+    claim()s a GIF path before downloading it, and only one worker gets each
+    path. Unsaved claims of a worker whose lease expired are dropped so those
+    GIFs can be fetched again. Every call commits at once, so several
+    processes (or machines sharing the file) can use the queue together.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS tasks (
+            uri TEXT PRIMARY KEY,
+            name TEXT,
+            forum_id INTEGER,
+            last_post_id INTEGER,
+            status TEXT NOT NULL DEFAULT 'pending',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            owner TEXT,
+            lease_expires REAL,
+            error TEXT
+        );
+        CREATE TABLE IF NOT EXISTS claims (
+            path TEXT PRIMARY KEY,
+            owner TEXT,
+            saved INTEGER NOT NULL DEFAULT 0
+        );
+        CREATE TABLE IF NOT EXISTS meta (
+            key TEXT PRIMARY KEY,
+            value TEXT
+        );
+    """
+
+    def __init__(self, path, lease_seconds=300.0, max_attempts=3):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+        # autocommit; multi-statement changes use explicit BEGIN IMMEDIATE
+        self._conn = sqlite3.connect(
+            path, timeout=60, isolation_level=None, check_same_thread=False
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(self.SCHEMA)
+
+    def add(self, uri, name, forum_id=None, last_post_id=None):
+        """Queue thread ``uri`` unless it is already queued; returns True if added."""
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT OR IGNORE INTO tasks (uri, name, forum_id, last_post_id) "
+                "VALUES (?, ?, ?, ?)",
+                (uri, name, forum_id, last_post_id),
+            )
+            return cursor.rowcount == 1
+
+    def finish_enumeration(self):
+        """Record that the coordinator has queued every thread."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO meta VALUES ('enumerated', ?)",
+                (datetime.now().isoformat(),),
+            )
+
+    def lease(self, owner):
+        """Lease the oldest pending (or abandoned) thread to ``owner``.
+
+        Returns:
+            dict or None: the task (uri, name, forum_id, last_post_id, attempts),
+            or None when nothing is available right now.
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                while True:
+                    row = self._conn.execute(
+                        "SELECT uri, name, forum_id, last_post_id, attempts, owner "
+                        "FROM tasks WHERE status = 'pending' "
+                        "OR (status = 'leased' AND lease_expires < ?) "
+                        "ORDER BY rowid LIMIT 1",
+                        (now,),
+                    ).fetchone()
+                    if row is None:
+                        self._conn.execute("COMMIT")
+                        return None
+                    uri, name, forum_id, last_post_id, attempts, previous = row
+                    if previous is not None:
+                        # its worker died mid-thread: free the GIFs it never saved
+                        self._conn.execute(
+                            "DELETE FROM claims WHERE owner = ? AND saved = 0",
+                            (previous,),
+                        )
+                    if attempts >= self.max_attempts:
+                        self._conn.execute(
+                            "UPDATE tasks SET status = 'failed', owner = NULL "
+                            "WHERE uri = ?",
+                            (uri,),
+                        )
+                        continue
+                    self._conn.execute(
+                        "UPDATE tasks SET status = 'leased', owner = ?, "
+                        "lease_expires = ?, attempts = attempts + 1 WHERE uri = ?",
+                        (owner, now + self.lease_seconds, uri),
+                    )
+                    self._conn.execute("COMMIT")
+                    keys = ("uri", "name", "forum_id", "last_post_id", "attempts")
+                    return dict(
+                        zip(keys, (uri, name, forum_id, last_post_id, attempts + 1))
+                    )
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def renew(self, uri, owner):
+        """Extend ``owner``'s lease on ``uri`` by another ``lease_seconds``."""
+        self._update(
+            "UPDATE tasks SET lease_expires = ? "
+            "WHERE uri = ? AND owner = ? AND status = 'leased'",
+            (time.time() + self.lease_seconds, uri, owner),
+        )
+
+    def complete(self, uri, owner):
+        """Mark ``uri`` done."""
+        self._update(
+            "UPDATE tasks SET status = 'done', owner = NULL, error = NULL "
+            "WHERE uri = ? AND owner = ?",
+            (uri, owner),
+        )
+
+    def fail(self, uri, owner, error):
+        """Give ``uri`` back to the queue after an error (failed for good after max_attempts)."""
+        self._update(
+            "UPDATE tasks SET status = CASE WHEN attempts >= ? THEN 'failed' "
+            "ELSE 'pending' END, owner = NULL, error = ? WHERE uri = ? AND owner = ?",
+            (self.max_attempts, error, uri, owner),
+        )
+
+    def claim(self, path, owner):
+        """Claim GIF ``path`` for ``owner``; False if another worker has it."""
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT OR IGNORE INTO claims (path, owner) VALUES (?, ?)",
+                (path, owner),
+            )
+            return cursor.rowcount == 1
+
+    def settle_claim(self, path, owner, saved):
+        """Keep ``owner``'s claim on ``path`` if the GIF was saved, else release it."""
+        if saved:
+            sql = "UPDATE claims SET saved = 1 WHERE path = ? AND owner = ?"
+        else:
+            sql = "DELETE FROM claims WHERE path = ? AND owner = ?"
+        self._update(sql, (path, owner))
+
+    def counts(self):
+        """Return {status: number of threads} for the queue."""
+        with self._lock:
+            return dict(
+                self._conn.execute(
+                    "SELECT status, COUNT(*) FROM tasks GROUP BY status"
+                ).fetchall()
+            )
+
+    def drained(self):
+        """True once enumeration finished and no thread is pending or leased."""
+        with self._lock:
+            enumerated = self._conn.execute(
+                "SELECT 1 FROM meta WHERE key = 'enumerated'"
+            ).fetchone()
+            busy = self._conn.execute(
+                "SELECT 1 FROM tasks WHERE status IN ('pending', 'leased') LIMIT 1"
+            ).fetchone()
+        return enumerated is not None and busy is None
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _update(self, sql, params):
+        with self._lock:
+            self._conn.execute(sql, params)
+
+
+class CachedResponse:
+    """A response replayed from HttpCache after the server answered 304.
+
+    Provides the parts of requests.Response the crawler uses: text, content,
+    headers, iter_content() and raise_for_status().
+    """
+
+    from_cache = True
+    status_code = 200
+
+    def __init__(self, url, body_path, meta):
+        self.url = url
+        self.headers = meta.get("headers", {})
+        self.encoding = meta.get("encoding") or "utf-8"
+        self._body_path = body_path
+        self._content = None
+
+    @property
+    def content(self):
+        if self._content is None:
+            with open(self._body_path, "rb") as body:
+                self._content = body.read()
+        return self._content
+
+    @property
+    def text(self):
+        return self.content.decode(self.encoding, errors="replace")
+
+    def iter_content(self, chunk_size=65536):
+        if self._content is not None:
+            for start in range(0, len(self._content), chunk_size):
+                yield self._content[start : start + chunk_size]
+            return
+        with open(self._body_path, "rb") as body:
+            while True:
+                chunk = body.read(chunk_size)
+                if not chunk:
+                    return
+                yield chunk
+
+    def raise_for_status(self):
+        return None
+
+    def close(self):
+        return None
+
+
+class HttpCache:
+    """Size-bounded, on-disk cache of GET responses keyed by URL.
+
+    Only responses carrying a validator (ETag or Last-Modified) are stored. On
+    a later fetch the validators are sent as If-None-Match/If-Modified-Since
+    and a 304 answer is served from the stored body. When the cache grows past
+    ``max_bytes`` the least recently used entries are evicted.
+    """
+
+    def __init__(self, directory, max_bytes=256 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        # key -> [last used (float), size in bytes]
+        self._entries = {}
+        for name in os.listdir(directory):
+            if name.endswith(".json"):
+                key = name[: -len(".json")]
+                body_path = self._body_path(key)
+                if os.path.exists(body_path):
+                    self._entries[key] = [
+                        os.path.getmtime(self._meta_path(key)),
+                        os.path.getsize(body_path),
+                    ]
+        self.total_bytes = sum(size for _, size in self._entries.values())
+
+    def conditional_headers(self, url):
+        """Return the If-None-Match/If-Modified-Since headers for a cached ``url``."""
+        meta = self._load_meta(self._key(url))
+        if meta is None:
+            return {}
+        headers = {}
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+        return headers
+
+    def replay(self, url):
+        """Return the cached response for ``url`` (marking it recently used), or None."""
+        key = self._key(url)
+        meta = self._load_meta(key)
+        if meta is None:
+            return None
+        now = datetime.now().timestamp()
+        with self._lock:
+            if key in self._entries:
+                self._entries[key][0] = now
+        try:
+            os.utime(self._meta_path(key), (now, now))
+        except OSError:
+            pass
+        return CachedResponse(url, self._body_path(key), meta)
+
+    def store(self, url, res):
+        """Store a 200 response for ``url`` if it carries a validator."""
+        meta = self._meta_for(url, res)
+        if meta is None:
+            return
+        body = res.content
+        try:
+            tmp = self._open_body_temp()
+        except OSError:
+            return
+        try:
+            with tmp:
+                tmp.write(body)
+        except OSError:
+            _remove_quietly(tmp.name)
+            return
+        self._commit(url, meta, tmp.name, len(body))
+
+    def store_stream(self, url, res):
+        """Return streamed 200 response ``res``, teeing its body into the cache.
+
+        The body is written to a temp file as the caller reads it through
+        iter_content(), and stored for ``url`` once it has been read to the
+        end; a body not read to the end is not cached. A response without a
+        validator is returned unchanged.
+        """
+        meta = self._meta_for(url, res)
+        if meta is None:
+            return res
+        return _CachingStream(res, self, url, meta)
+
+    def _meta_for(self, url, res):
+        # the entry's metadata, or None if ``res`` has no validator
+        etag = res.headers.get("ETag")
+        last_modified = res.headers.get("Last-Modified")
+        if not etag and not last_modified:
+            return None
+        return {
+            "url": url,
+            "etag": etag,
+            "last_modified": last_modified,
+            "encoding": res.encoding,
+            "headers": {
+                name: res.headers[name]
+                for name in ("Content-Type", "ETag", "Last-Modified")
+                if name in res.headers
+            },
+        }
+
+    def _open_body_temp(self):
+        return tempfile.NamedTemporaryFile(
+            dir=self.directory, suffix=".tmp", delete=False
+        )
+
+    def _commit(self, url, meta, tmp_path, size):
+        # move a fully written body into place and account for it
+        key = self._key(url)
+        try:
+            os.replace(tmp_path, self._body_path(key))
+            with open(self._meta_path(key), "w", encoding="utf-8") as meta_file:
+                json.dump(meta, meta_file)
+        except OSError:
+            _remove_quietly(tmp_path)
+            return
+        with self._lock:
+            old = self._entries.get(key)
+            if old is not None:
+                self.total_bytes -= old[1]
+            self._entries[key] = [datetime.now().timestamp(), size]
+            self.total_bytes += size
+            self._evict()
+
+    def _evict(self):
+        # caller holds self._lock
+        if self.total_bytes <= self.max_bytes:
+            return
+        for key, (_, size) in sorted(self._entries.items(), key=lambda kv: kv[1][0]):
+            if self.total_bytes <= self.max_bytes:
+                break
+            for path in (self._meta_path(key), self._body_path(key)):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            del self._entries[key]
+            self.total_bytes -= size
+
+    def _load_meta(self, key):
+        try:
+            with open(self._meta_path(key), "r", encoding="utf-8") as meta_file:
+                meta = json.load(meta_file)
+        except (OSError, ValueError):
+            return None
+        if not os.path.exists(self._body_path(key)):
+            return None
+        return meta
+
+    @staticmethod
+    def _key(url):
+        return hashlib.sha256(url.encode("utf-8")).hexdigest()
+
+    def _meta_path(self, key):
+        return os.path.join(self.directory, key + ".json")
+
+    def _body_path(self, key):
+        return os.path.join(self.directory, key + ".body")
+
+
+class _CachingStream:
+    """A streamed response whose body is copied into HttpCache as it is read.
+
+    Delegates everything but iter_content() and close() to the wrapped
+    response. Cache write errors only stop the copy; the body still streams.
+    """
+
+    def __init__(self, res, cache, url, meta):
+        self._res = res
+        self._cache = cache
+        self._url = url
+        self._meta = meta
+        self._tmp = None
+        self._size = 0
+
+    def __getattr__(self, name):
+        return getattr(self._res, name)
+
+    def iter_content(self, chunk_size=65536):
+        try:
+            self._tmp = self._cache._open_body_temp()
+        except OSError:
+            self._tmp = None
+        for chunk in self._res.iter_content(chunk_size):
+            if self._tmp is not None:
+                try:
+                    self._tmp.write(chunk)
+                    self._size += len(chunk)
+                except OSError:
+                    self._discard()
+            yield chunk
+        if self._tmp is not None:
+            tmp, self._tmp = self._tmp, None
+            try:
+                tmp.close()
+            except OSError:
+                _remove_quietly(tmp.name)
+                return
+            self._cache._commit(self._url, self._meta, tmp.name, self._size)
+
+    def close(self):
+        try:
+            self._res.close()
+        finally:
+            # read only partly: nothing to cache
+            self._discard()
+
+    def _discard(self):
+        tmp, self._tmp = self._tmp, None
+        if tmp is not None:
+            try:
+                tmp.close()
+            except OSError:
+                pass
+            _remove_quietly(tmp.name)
+
+
+def _remove_quietly(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def retry_after_seconds(value, now=None):
+    """Return the delay asked for by a Retry-After header (seconds or HTTP date), or None."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    now = time.time() if now is None else now
+    return max(0.0, when.timestamp() - now)
+
+
+class HostLimiter:
+    """Per-hostname token-bucket rate limit and adaptive concurrency limit.
+
+    ``rates`` maps a hostname to the requests per second it may receive (with a
+    burst of one second's worth); hosts not listed are not rate limited. Each
+    host also has a concurrency limit that starts at ``initial_concurrency``,
+    grows by one after a full window of healthy responses (quicker than
+    ``slow_response`` seconds) up to ``max_concurrency``, shrinks by one on a
+    slow response and is halved on 429/503 or a failed request. A 429/503 also
+    pauses the host for its Retry-After delay, or for ``backoff_factor`` *
+    2 ** (throttles in a row - 1) seconds, capped at ``max_pause``.
+    Thread-safe; acquire() blocks until the host may be sent another request.
+    """
+
+    THROTTLED = (429, 503)
+
+    def __init__(
+        self,
+        rates=None,
+        initial_concurrency=4,
+        max_concurrency=16,
+        slow_response=5.0,
+        backoff_factor=0.5,
+        max_pause=120.0,
+    ):
+        self.rates = dict(rates or {})
+        self.initial_concurrency = max(1, int(initial_concurrency))
+        self.max_concurrency = max(self.initial_concurrency, int(max_concurrency))
+        self.slow_response = slow_response
+        self.backoff_factor = backoff_factor
+        self.max_pause = max_pause
+        self._cond = threading.Condition()
+        self._hosts = {}
+
+    def acquire(self, host):
+        """Block until ``host`` has a free concurrency slot and a rate token."""
+        with self._cond:
+            state = self._host(host)
+            while True:
+                now = time.monotonic()
+                rate = state["rate"]
+                if rate:
+                    state["tokens"] = min(
+                        max(1.0, rate),
+                        state["tokens"] + (now - state["refilled"]) * rate,
+                    )
+                    state["refilled"] = now
+                if state["in_flight"] >= state["limit"]:
+                    self._cond.wait()
+                elif now < state["paused_until"]:
+                    self._cond.wait(state["paused_until"] - now)
+                elif rate and state["tokens"] < 1.0:
+                    self._cond.wait((1.0 - state["tokens"]) / rate)
+                else:
+                    if rate:
+                        state["tokens"] -= 1.0
+                    state["in_flight"] += 1
+                    return
+
+    def release(self, host, status=None, elapsed=0.0, retry_after=None):
+        """Return ``host``'s slot and adapt its limit to the outcome.
+
+        ``status`` is the response's HTTP status, or None if the request failed;
+        ``elapsed`` is how long it took, in seconds.
+
+        Returns:
+            float: seconds the host is now paused for (0.0 when not throttled).
+        """
+        with self._cond:
+            state = self._host(host)
+            state["in_flight"] -= 1
+            pause = 0.0
+            if status is None or status in self.THROTTLED:
+                state["limit"] = max(1, state["limit"] // 2)
+                state["healthy"] = 0
+            if status in self.THROTTLED:
+                state["throttles"] += 1
+                pause = retry_after
+                if pause is None:
+                    pause = self.backoff_factor * 2 ** (state["throttles"] - 1)
+                pause = min(pause, self.max_pause)
+                state["paused_until"] = max(
+                    state["paused_until"], time.monotonic() + pause
+                )
+            elif status is not None:
+                state["throttles"] = 0
+                if elapsed > self.slow_response:
+                    state["limit"] = max(1, state["limit"] - 1)
+                    state["healthy"] = 0
+                else:
+                    state["healthy"] += 1
+                    if state["healthy"] >= state["limit"]:
+                        state["limit"] = min(self.max_concurrency, state["limit"] + 1)
+                        state["healthy"] = 0
+            self._cond.notify_all()
+            return pause
+
+    def limit(self, host):
+        """Return the current concurrency limit for ``host``."""
+        with self._cond:
+            return self._host(host)["limit"]
+
+    def _host(self, host):
+        # caller holds self._cond
+        state = self._hosts.get(host)
+        if state is None:
+            rate = self.rates.get(host)
+            state = self._hosts[host] = {
+                "rate": rate,
+                "tokens": max(1.0, rate or 0.0),
+                "refilled": time.monotonic(),
+                "limit": self.initial_concurrency,
+                "in_flight": 0,
+                "healthy": 0,
+                "throttles": 0,
+                "paused_until": 0.0,
+            }
+        return state
+
+
+class _LimitedStream:
+    """A streamed response that keeps its host's HostLimiter slot until closed.
+
+    Delegates everything to the wrapped response; close() closes it and then
+    calls ``on_close`` once, so the slot covers the body transfer too.
+    """
+
+    def __init__(self, res, on_close):
+        self._res = res
+        self._on_close = on_close
+
+    def __getattr__(self, name):
+        return getattr(self._res, name)
+
+    def close(self):
+        try:
+            self._res.close()
+        finally:
+            on_close, self._on_close = self._on_close, None
+            if on_close is not None:
+                on_close()
+
+
+class LatencyHistogram:
+    """Count, total, max and fixed millisecond buckets for one stage's timings."""
+
+    # upper bounds of the buckets, in milliseconds (the last one is open-ended)
+    BOUNDS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, 30000)
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * (len(self.BOUNDS_MS) + 1)
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        ms = seconds * 1000
+        for index, bound in enumerate(self.BOUNDS_MS):
+            if ms <= bound:
+                break
+        else:
+            index = len(self.BOUNDS_MS)
+        self.buckets[index] += 1
+
+    def percentile_ms(self, fraction):
+        """Return the upper bound (ms) of the bucket holding the ``fraction`` quantile."""
+        wanted = fraction * self.count
+        seen = 0
+        for index, count in enumerate(self.buckets):
+            seen += count
+            if count and seen >= wanted:
+                if index < len(self.BOUNDS_MS):
+                    return min(self.BOUNDS_MS[index], self.max * 1000)
+                break
+        return self.max * 1000
+
+    def as_dict(self):
+        labels = [f"<={bound}ms" for bound in self.BOUNDS_MS]
+        labels.append(f">{self.BOUNDS_MS[-1]}ms")
+        return {
+            "count": self.count,
+            "total_s": round(self.total, 3),
+            "mean_ms": round(self.total / self.count * 1000, 2) if self.count else 0,
+            "p50_ms": round(self.percentile_ms(0.5), 2),
+            "p90_ms": round(self.percentile_ms(0.9), 2),
+            "p99_ms": round(self.percentile_ms(0.99), 2),
+            "max_ms": round(self.max * 1000, 2),
+            "buckets": {
+                label: count for label, count in zip(labels, self.buckets) if count
+            },
+        }
+
+
+class Metrics:
+    """Thread-safe instrumentation of a run.
+
+    Records a LatencyHistogram per crawl stage (see STAGES), bytes by kind
+    ("pages" fetched, "gifs" downloaded, "written" to disk), error counts by
+    kind and, per host, requests, errors, throttled answers, bytes and time.
+    report() returns all of it as a JSON-ready dict.
+    """
+
+    STAGES = (
+        "forum fetch",
+        "thread fetch",
+        "parse",
+        "gif fetch",
+        "gif body",
+        "disk write",
+    )
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self._lock = threading.Lock()
+        self.stages = {}
+        self.bytes = {"pages": 0, "gifs": 0, "written": 0}
+        self.errors = {}
+        self.hosts = {}
+
+    @contextmanager
+    def timer(self, stage):
+        """Context manager that records the time spent in its block under ``stage``."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - started)
+
+    def record(self, stage, seconds):
+        with self._lock:
+            histogram = self.stages.get(stage)
+            if histogram is None:
+                histogram = self.stages[stage] = LatencyHistogram()
+            histogram.add(seconds)
+
+    def add_bytes(self, kind, count, host=None):
+        with self._lock:
+            self.bytes[kind] = self.bytes.get(kind, 0) + count
+            if host is not None and kind != "written":
+                self._host(host)["bytes"] += count
+
+    def request(self, host, seconds, status=None):
+        """Record one HTTP request to ``host``; ``status`` is None if it failed."""
+        with self._lock:
+            stats = self._host(host)
+            stats["requests"] += 1
+            stats["seconds"] += seconds
+            if status is None or status >= 400:
+                stats["errors"] += 1
+            if status in HostLimiter.THROTTLED:
+                stats["throttled"] += 1
+
+    def error(self, kind):
+        """Count an error of ``kind`` (e.g. an exception class name or "HTTP 404")."""
+        with self._lock:
+            self.errors[kind] = self.errors.get(kind, 0) + 1
+
+    def elapsed(self):
+        return time.monotonic() - self.started
+
+    def report(self, counters=None):
+        """Return the metrics (plus ``counters``, if given) as a JSON-ready dict."""
+        elapsed = self.elapsed()
+        with self._lock:
+            downloaded = self.bytes["pages"] + self.bytes["gifs"]
+            return {
+                "elapsed_s": round(elapsed, 3),
+                "counters": dict(counters or {}),
+                "stages": {
+                    stage: histogram.as_dict()
+                    for stage, histogram in sorted(
+                        self.stages.items(), key=lambda kv: self._stage_order(kv[0])
+                    )
+                },
+                "bytes": dict(self.bytes),
+                "throughput_bytes_per_s": (
+                    round(downloaded / elapsed, 1) if elapsed else 0
+                ),
+                "errors": dict(sorted(self.errors.items())),
+                "peak_rss_bytes": peak_rss_bytes(),
+                "hosts": {
+                    host: dict(stats, seconds=round(stats["seconds"], 3))
+                    for host, stats in sorted(self.hosts.items())
+                },
+            }
+
+    def progress_line(self, gifs, thread_pages):
+        """Return a one-line summary of the run so far, for the live progress display."""
+        elapsed = self.elapsed()
+        with self._lock:
+            downloaded = self.bytes["pages"] + self.bytes["gifs"]
+            errors = sum(self.errors.values())
+        rate = downloaded / elapsed if elapsed else 0
+        return (
+            f"[{elapsed:7.0f}s] {thread_pages} thread-pages, {gifs} GIFs, "
+            f"{downloaded / 1048576:.1f} MB ({rate / 1048576:.2f} MB/s), "
+            f"{errors} errors"
+        )
+
+    def _host(self, host):
+        # caller holds self._lock
+        stats = self.hosts.get(host)
+        if stats is None:
+            stats = self.hosts[host] = {
+                "requests": 0,
+                "errors": 0,
+                "throttled": 0,
+                "bytes": 0,
+                "seconds": 0.0,
+            }
+        return stats
+
+    def _stage_order(self, stage):
+        if stage in self.STAGES:
+            return (self.STAGES.index(stage), stage)
+        return (len(self.STAGES), stage)
+
+
+class RunLog:
+    """One buffered handle on the run's log file, plus console echo by level.
+
+    Every message goes to the log file; only messages at or above
+    ``console_level`` (a ``logging`` level) are printed. A background thread
+    flushes the file every ``flush_interval`` seconds while it is open, so
+    lines do not wait for the next write after a quiet stretch; ERROR messages
+    are flushed immediately, and close() flushes the rest. While the file is
+    open, close() is also registered with atexit so buffered lines survive an
+    unhandled exception; Scraper closes the log when a run ends.
+    """
+
+    def __init__(self, flush_interval=1.0, console_level=logging.DEBUG):
+        self.flush_interval = flush_interval
+        self.console_level = console_level
+        self.path = None
+        self._file = None
+        self._last_flush = 0.0
+        self._lock = threading.Lock()
+        self._flusher = None
+        self._stop_flusher = None
+        self._at_exit = False
+
+    def write(self, path, text, level=logging.INFO):
+        """Append ``text`` to the log at ``path`` and echo it if ``level`` is high enough.
+
+        Falls back to console output (with a note) when the log file cannot be written.
+        """
+        with self._lock:
+            try:
+                if path != self.path or self._file is None:
+                    self._close()
+                    self._file = open(path, "a", encoding="utf-8", buffering=64 * 1024)
+                    self.path = path
+                    self._start_flusher()
+                    if not self._at_exit:
+                        atexit.register(self.close)
+                        self._at_exit = True
+                self._file.write(text + "\n")
+                now = time.monotonic()
+                if (
+                    level >= logging.ERROR
+                    or now - self._last_flush >= self.flush_interval
+                ):
+                    self._file.flush()
+                    self._last_flush = now
+            except (OSError, IOError) as e:
+                self._file = None
+                # fallback: print to console with a note that file write failed
+                print(f"(LOG WRITE FAILED: {e})")
+                # still print the message so the user sees it
+                print(text)
+                return
+            if level >= self.console_level:
+                print(text)
+
+    def flush(self):
+        """Write buffered log lines to disk."""
+        with self._lock:
+            if self._file is not None:
+                try:
+                    self._file.flush()
+                except (OSError, IOError):
+                    pass
+                self._last_flush = time.monotonic()
+
+    def close(self):
+        """Stop the flush thread, flush and close the log file.
+
+        A later write() reopens the file and restarts the flush thread.
+        """
+        with self._lock:
+            flusher, self._flusher = self._flusher, None
+            if flusher is not None:
+                self._stop_flusher.set()
+            self._close()
+            if self._at_exit:
+                atexit.unregister(self.close)
+                self._at_exit = False
+        if flusher is not None and flusher is not threading.current_thread():
+            flusher.join()
+
+    def _start_flusher(self):
+        # caller holds self._lock
+        if self._flusher is not None or (self.flush_interval or 0) <= 0:
+            return
+        self._stop_flusher = threading.Event()
+        self._flusher = threading.Thread(
+            target=self._flush_periodically,
+            args=(self._stop_flusher,),
+            name="log-flush",
+            daemon=True,
+        )
+        self._flusher.start()
+
+    def _flush_periodically(self, stop):
+        while not stop.wait(self.flush_interval):
+            self.flush()
+
+    def _close(self):
+        # caller holds self._lock
+        if self._file is not None:
+            try:
+                self._file.close()
+            except (OSError, IOError):
+                pass
+            self._file = None
+
+
+# how FolderStorage/ArchiveStorage arrange saved GIFs (see storage_name)
+STORAGE_LAYOUTS = ("flat", "thread", "hash")
+
+
+def storage_name(layout, file_name, thread_name, sha256):
+    """Return the "/"-separated name a GIF is stored under in ``layout``.
+
+    "flat" keeps ``file_name`` as is; "thread" puts it in a folder named after
+    the thread (``thread_name`` without its ``_PG<n>`` page suffix); "hash"
+    puts it two folders deep, named after the first hex digits of ``sha256``.
+    """
+    if layout == "thread":
+        return f"{re.sub(r'_PG[0-9]+$', '', thread_name) or '_'}/{file_name}"
+    if layout == "hash":
+        return f"{sha256[:2]}/{sha256[2:4]}/{file_name}"
+    return file_name
+
+
+class FolderStorage:
+    """Writes saved GIFs into ``folder``, arranged by ``layout`` (see storage_name).
+
+    A GIF is streamed into a hidden temp file in ``folder`` (open_temp) and
+    renamed into place only once complete (commit), so no partial file is ever
+    left under a GIF's name. With ``fsync_every`` > 0, placed files and their
+    folders are fsynced in batches of that many on a background thread, so
+    downloads never wait for the disk; close() syncs the last batch.
+    """
+
+    # duplicates can be hard-linked to the first copy
+    can_link = True
+    # stored GIFs stay readable at path(name)
+    keeps_files = True
+
+    def __init__(self, folder, layout="flat", fsync_every=0):
+        if layout not in STORAGE_LAYOUTS:
+            raise ValueError(f"unknown storage layout: {layout!r}")
+        self.folder = folder
+        self.layout = layout
+        self.fsync_every = max(0, int(fsync_every))
+        self._folders = {folder}
+        self._batch = []
+        self._lock = threading.Lock()
+        self._syncer = None
+
+    def name_for(self, file_name, thread_name, sha256):
+        """Return the name a GIF is stored under (storage_name for this layout)."""
+        return storage_name(self.layout, file_name, thread_name, sha256)
+
+    def path(self, name):
+        """Return the file-system path of the stored ``name``."""
+        return os.path.join(self.folder, *name.split("/"))
+
+    def open_temp(self):
+        """Return a new binary temp file to stream a GIF into."""
+        return tempfile.NamedTemporaryFile(
+            prefix=".point83-", suffix=".part", dir=self.folder, delete=False
+        )
+
+    def commit(self, temp_path, name):
+        """Move the complete temp file at ``temp_path`` into place as ``name``."""
+        dest = self.path(name)
+        self._make_folder(dest)
+        os.replace(temp_path, dest)
+        self._sync_later(dest)
+
+    def link(self, existing, name):
+        """Hard-link ``name`` to the stored file ``existing``; raises OSError on failure."""
+        dest = self.path(name)
+        self._make_folder(dest)
+        if os.path.lexists(dest):
+            os.remove(dest)
+        os.link(self.path(existing), dest)
+        self._sync_later(dest)
+
+    @staticmethod
+    def discard(temp_path):
+        """Delete a temp file that will not be stored."""
+        try:
+            os.remove(temp_path)
+        except FileNotFoundError:
+            pass
+
+    def close(self):
+        """Sync any pending batch and wait for the background syncs to finish."""
+        with self._lock:
+            batch, self._batch = self._batch, []
+            syncer, self._syncer = self._syncer, None
+        if batch:
+            self._fsync(batch)
+        if syncer is not None:
+            syncer.shutdown(wait=True)
+
+    def _make_folder(self, dest):
+        folder = os.path.dirname(dest)
+        if folder not in self._folders:
+            os.makedirs(folder, exist_ok=True)
+            self._folders.add(folder)
+
+    def _sync_later(self, dest):
+        if not self.fsync_every:
+            return
+        with self._lock:
+            self._batch.append(dest)
+            if len(self._batch) < self.fsync_every:
+                return
+            batch, self._batch = self._batch, []
+            if self._syncer is None:
+                self._syncer = ThreadPoolExecutor(
+                    max_workers=1, thread_name_prefix="fsync"
+                )
+            self._syncer.submit(self._fsync, batch)
+
+    @staticmethod
+    def _fsync(paths):
+        for path in paths + sorted({os.path.dirname(path) for path in paths}):
+            try:
+                fd = os.open(path, os.O_RDONLY)
+            except OSError:
+                continue
+            try:
+                os.fsync(fd)
+            except OSError:
+                # e.g. folders cannot be fsynced on Windows
+                pass
+            finally:
+                os.close(fd)
+
+
+class ArchiveStorage:
+    """Writes saved GIFs into a zip or tar archive at ``path`` instead of a folder.
+
+    GIFs are streamed into hidden temp files next to the archive; commit()
+    queues each one for a single writer thread that appends it to the archive
+    and deletes it, so archive I/O never holds up downloads. The format
+    follows the extension (".zip" or ".tar"); an existing archive is appended
+    to. Archives hold no links, so duplicate contents are stored in full
+    unless ``duplicate_content`` is "skip".
+    """
+
+    can_link = False
+    keeps_files = False
+
+    def __init__(self, path, layout="flat"):
+        if layout not in STORAGE_LAYOUTS:
+            raise ValueError(f"unknown storage layout: {layout!r}")
+        extension = os.path.splitext(path)[1].lower()
+        if extension == ".zip":
+            self._archive = zipfile.ZipFile(path, "a", zipfile.ZIP_STORED)
+            self._add = lambda temp_path, name: self._archive.write(temp_path, name)
+        elif extension == ".tar":
+            self._archive = tarfile.open(path, "a")
+            self._add = lambda temp_path, name: self._archive.add(temp_path, name)
+        else:
+            raise ValueError(f"archive must be a .zip or .tar file: {path!r}")
+        self.path = path
+        self.layout = layout
+        # (name, error) of GIFs the writer could not add
+        self.failures = []
+        self._folder = os.path.dirname(os.path.abspath(path))
+        self._queue = queue.Queue()
+        self._writer = threading.Thread(
+            target=self._write_queued, name="archive", daemon=True
+        )
+        self._writer.start()
+
+    def name_for(self, file_name, thread_name, sha256):
+        """Return the name a GIF is stored under (storage_name for this layout)."""
+        return storage_name(self.layout, file_name, thread_name, sha256)
+
+    def open_temp(self):
+        """Return a new binary temp file to stream a GIF into."""
+        return tempfile.NamedTemporaryFile(
+            prefix=".point83-", suffix=".part", dir=self._folder, delete=False
+        )
+
+    def commit(self, temp_path, name):
+        """Queue the complete temp file at ``temp_path`` to be archived as ``name``."""
+        self._queue.put((temp_path, name))
+
+    discard = staticmethod(FolderStorage.discard)
+
+    def close(self):
+        """Archive everything queued, then close the archive."""
+        if self._writer.is_alive():
+            self._queue.put(None)
+            self._writer.join()
+            self._archive.close()
+
+    def _write_queued(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            temp_path, name = item
+            try:
+                self._add(temp_path, name)
+            except (OSError, zipfile.BadZipFile, tarfile.TarError) as e:
+                self.failures.append((name, e))
+            finally:
+                self.discard(temp_path)
+
+
+def _skip_sub_blocks(data, pos):
+    """Return the offset after the GIF data sub-blocks at ``pos``, or None if cut short."""
+    while pos < len(data):
+        size = data[pos]
+        pos += 1
+        if size == 0:
+            return pos
+        pos += size
+    return None
+
+
+def gif_metadata(path):
+    """Check the GIF at ``path`` block by block and return what it holds.
+
+    The header, every extension and image block and the trailer are walked
+    (without decoding any image data), so HTML pages and truncated downloads
+    saved as .gif are caught. Runs in GifValidator's worker processes.
+
+    Returns:
+        dict: "valid" (bool), "error" (why it is not valid, or None),
+        "version" ("87a"/"89a"), "width", "height" (logical screen, pixels),
+        "frames", "duration_ms" (sum of the frame delays), "loops" (NETSCAPE
+        loop count, 0 = forever, or None) and "bytes".
+    """
+    with open(path, "rb") as gif:
+        data = gif.read()
+    info = {
+        "valid": False,
+        "error": None,
+        "version": None,
+        "width": None,
+        "height": None,
+        "frames": 0,
+        "duration_ms": 0,
+        "loops": None,
+        "bytes": len(data),
+    }
+    if data[:6] not in (b"GIF87a", b"GIF89a") or len(data) < 13:
+        info["error"] = "not a GIF (bad header)"
+        return info
+    info["version"] = data[3:6].decode("ascii")
+    info["width"], info["height"] = struct.unpack("<HH", data[6:10])
+    pos = 13
+    if data[10] & 0x80:
+        # global color table
+        pos += 3 * 2 ** ((data[10] & 0x07) + 1)
+    while True:
+        if pos >= len(data):
+            info["error"] = "truncated (no trailer)"
+            return info
+        block = data[pos]
+        pos += 1
+        if block == 0x3B:
+            info["valid"] = True
+            return info
+        if block == 0x21:
+            label = data[pos] if pos < len(data) else None
+            # start of the extension's first sub-block
+            body = data[pos + 1 : pos + 17]
+            if label == 0xF9 and len(body) >= 5 and body[0] == 4:
+                # graphic control extension: the next frame's delay, in 1/100 s
+                info["duration_ms"] += struct.unpack("<H", body[2:4])[0] * 10
+            elif (
+                label == 0xFF
+                and body[:12] == b"\x0bNETSCAPE2.0"
+                and len(body) >= 16
+                and body[12] == 3
+            ):
+                info["loops"] = struct.unpack("<H", body[14:16])[0]
+            end = _skip_sub_blocks(data, pos + 1)
+        elif block == 0x2C:
+            if pos + 9 > len(data):
+                info["error"] = "truncated (image descriptor)"
+                return info
+            flags = data[pos + 8]
+            pos += 9
+            if flags & 0x80:
+                # local color table
+                pos += 3 * 2 ** ((flags & 0x07) + 1)
+            # skip the LZW minimum code size, then the image data
+            end = _skip_sub_blocks(data, pos + 1)
+            if end is not None:
+                info["frames"] += 1
+        else:
+            info["error"] = f"unexpected block 0x{block:02x} at byte {pos - 1}"
+            return info
+        if end is None:
+            info["error"] = "truncated (no trailer)"
+            return info
+        pos = end
+
+
+class GifValidator:
+    """Runs gif_metadata on saved GIFs in a process pool and writes an index.
+
+    Each result is appended as one JSON line to ``index_path`` (the GIF's
+    stored name, source path and sha256 plus the metadata), so the archive
+    can be queried without opening the GIFs. ``on_result`` is called with
+    every entry, from a pool callback thread. check() never waits for the
+    worker processes; close() waits for all pending checks.
+    """
+
+    def __init__(self, index_path, workers=None, on_result=None):
+        self.index_path = index_path
+        self.on_result = on_result
+        self.checked = 0
+        self.invalid = 0
+        self._lock = threading.Lock()
+        self._index = open(index_path, "a", encoding="utf-8")
+        # spawn: forking a process that runs many threads is not safe
+        self._pool = ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+        )
+
+    def check(self, path, entry, remove=False):
+        """Queue the GIF at ``path`` for checking; ``entry`` is merged into its index line.
+
+        With ``remove`` the file at ``path`` (a private copy) is deleted once checked.
+        """
+        future = self._pool.submit(gif_metadata, path)
+        future.add_done_callback(
+            lambda done: self._record(done, path, dict(entry), remove)
+        )
+
+    def close(self):
+        """Wait for the pending checks, then close the pool and the index."""
+        self._pool.shutdown(wait=True)
+        with self._lock:
+            self._index.close()
+
+    def _record(self, future, path, entry, remove):
+        if remove:
+            FolderStorage.discard(path)
+        try:
+            entry.update(future.result())
+        except Exception as e:  # pylint: disable=broad-except
+            entry.update(valid=False, error=f"could not be checked: {e!r}")
+        with self._lock:
+            self.checked += 1
+            if not entry["valid"]:
+                self.invalid += 1
+            self._index.write(json.dumps(entry) + "\n")
+            self._index.flush()
+        if self.on_result is not None:
+            self.on_result(entry)
+
+
+class SpilledSet:
+    """A set of strings whose members live on disk, for ``Scraper(low_memory=True)``.
+
+    Only a 12-byte digest of each member is kept in memory, enough for ``in``
+    and len(). Members are buffered and, every ``run_size`` additions, sorted
+    and written to a run file in a temporary directory; iterating merges the
+    runs with heapq.merge, so members come out sorted without ever being
+    loaded all at once. The directory is removed when the set is collected.
+    """
+
+    def __init__(self, run_size=50000):
+        self.run_size = max(1, int(run_size))
+        self._digests = set()
+        self._buffer = []
+        self._runs = []
+        self._dir = None
+
+    def add(self, value):
+        """Add ``value`` unless an equal string was added before."""
+        digest = self._digest(value)
+        if digest in self._digests:
+            return
+        self._digests.add(digest)
+        self._buffer.append(value)
+        if len(self._buffer) >= self.run_size:
+            self._spill()
+
+    def __contains__(self, value):
+        return self._digest(value) in self._digests
+
+    def __len__(self):
+        return len(self._digests)
+
+    def __iter__(self):
+        runs = [self._read_run(path) for path in self._runs]
+        return heapq.merge(*runs, sorted(self._buffer))
+
+    def _spill(self):
+        if self._dir is None:
+            self._dir = tempfile.TemporaryDirectory(prefix="point83-spill-")
+        path = os.path.join(self._dir.name, f"run{len(self._runs)}.jsonl")
+        with open(path, "w", encoding="utf-8") as out:
+            for value in sorted(self._buffer):
+                out.write(json.dumps(value) + "\n")
+        self._runs.append(path)
+        self._buffer = []
+
+    @staticmethod
+    def _read_run(path):
+        with open(path, "r", encoding="utf-8") as run:
+            for line in run:
+                yield json.loads(line)
+
+    @staticmethod
+    def _digest(value):
+        return int.from_bytes(
+            hashlib.blake2b(value.encode("utf-8"), digest_size=12).digest(), "big"
+        )
+
+
+class SpilledDict:
+    """A str -> str mapping kept on disk, for ``Scraper(low_memory=True)``.
+
+    Entries live in a SQLite table in a temporary directory, so memory use
+    does not grow with the number of entries; each lookup is one indexed
+    query. Supports the operations Scraper uses on ``saved_hashes``: ``in``,
+    len(), [] and setdefault(). Thread-safe. The directory is
+    removed when the mapping is collected.
+    """
+
+    def __init__(self):
+        self._dir = tempfile.TemporaryDirectory(prefix="point83-spill-")
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            os.path.join(self._dir.name, "entries.sqlite3"),
+            check_same_thread=False,
+            isolation_level=None,
+        )
+        # scratch data: no journal, no fsync
+        self._conn.executescript(
+            "PRAGMA journal_mode = OFF; PRAGMA synchronous = OFF;"
+            "CREATE TABLE entries (key TEXT PRIMARY KEY, value TEXT) WITHOUT ROWID;"
+        )
+
+    def setdefault(self, key, value):
+        """Return the value stored for ``key``, storing ``value`` first if there is none."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO entries VALUES (?, ?)", (key, value)
+            )
+            return self._get(key)
+
+    def __getitem__(self, key):
+        with self._lock:
+            value = self._get(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key):
+        with self._lock:
+            return self._get(key) is not None
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def _get(self, key):
+        # caller holds self._lock
+        row = self._conn.execute(
+            "SELECT value FROM entries WHERE key = ?", (key,)
+        ).fetchone()
+        return None if row is None else row[0]
+
+
+class Checkpoint:
+    """Crawl position saved in the output folder so an interrupted run can resume.
+
+    ``point83_checkpoint.json`` holds the run's settings, each forum's position
+    (forum page, threads finished on it, the next page of any thread in
+    progress), the GIF URLs being downloaded and a snapshot of the counters
+    from ``totals()``. It is rewritten atomically (temp file + rename) at most
+    every ``interval`` seconds, when a forum page starts or ends, and on
+    close(). ``point83_saved.jsonl`` gets one line per saved GIF so a resumed
+    run can rebuild its dedup index and GIF totals.
+    """
+
+    FILE_NAME = "point83_checkpoint.json"
+    JOURNAL_NAME = "point83_saved.jsonl"
+
+    def __init__(self, folder, config, totals, interval=30.0, state=None):
+        self.path = os.path.join(folder, self.FILE_NAME)
+        self.journal_path = os.path.join(folder, self.JOURNAL_NAME)
+        self.totals = totals
+        self.interval = interval
+        self.state = state if state is not None else {"forums": {}}
+        self.state["config"] = config
+        self.state["finished"] = False
+        self._in_flight = set()
+        self._last_save = 0.0
+        self._lock = threading.Lock()
+        self._journal = open(self.journal_path, "a", encoding="utf-8")
+
+    @classmethod
+    def load(cls, folder):
+        """Return the state saved in ``folder``; raises OSError or ValueError."""
+        with open(os.path.join(folder, cls.FILE_NAME), encoding="utf-8") as saved:
+            return json.load(saved)
+
+    @classmethod
+    def saved_gifs(cls, folder):
+        """Yield the journal records (dicts) of the GIFs saved by the run in ``folder``."""
+        path = os.path.join(folder, cls.JOURNAL_NAME)
+        if not os.path.exists(path):
+            return
+        with open(path, encoding="utf-8") as journal:
+            for line in journal:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    # last line cut short by the interruption
+                    continue
+
+    def start_forum_page(self, key, forum_url, forum_id, page_num, pages_left):
+        """Record that forum ``key`` moved to index page ``page_num``.
+
+        Progress recorded for the page the forum is already on (a resumed run
+        starting where the interrupted one stopped) is kept.
+        """
+        with self._lock:
+            entry = self.state["forums"].get(key)
+            if entry is None or entry["page_num"] != page_num:
+                entry = {"done_threads": [], "threads": {}}
+                self.state["forums"][key] = entry
+            entry.update(
+                forum_url=forum_url,
+                forum_id=forum_id,
+                page_num=page_num,
+                pages_left=pages_left,
+                finished=False,
+            )
+        self.save(force=True)
+
+    def finish_thread_page(self, key, thread_uri, page_num, next_uri):
+        """Record that page ``page_num`` of a thread is done and where its next one is."""
+        with self._lock:
+            threads = self._forum(key)["threads"]
+            threads[thread_uri] = {"page_num": page_num, "next_uri": next_uri}
+        self.save()
+
+    def finish_thread(self, key, thread_uri):
+        """Record that a thread listed on the forum's current page is done."""
+        with self._lock:
+            entry = self._forum(key)
+            entry["threads"].pop(thread_uri, None)
+            entry["done_threads"].append(thread_uri)
+        self.save()
+
+    def finish_forum(self, key):
+        """Record that forum ``key`` has no pages left to crawl."""
+        with self._lock:
+            self._forum(key)["finished"] = True
+        self.save(force=True)
+
+    def gif_started(self, url):
+        with self._lock:
+            self._in_flight.add(url)
+
+    def gif_done(self, url):
+        with self._lock:
+            self._in_flight.discard(url)
+
+    def record_saved(self, path, file_name, sha256, forum_id):
+        """Append a saved GIF to the journal (flushed with the next save())."""
+        line = json.dumps(
+            {"path": path, "file": file_name, "sha256": sha256, "forum": forum_id}
+        )
+        with self._lock:
+            if self._journal is not None:
+                self._journal.write(line + "\n")
+
+    def save(self, force=False):
+        """Write the checkpoint if ``interval`` seconds have passed (or ``force``)."""
+        with self._lock:
+            now = time.monotonic()
+            if self._journal is None or (
+                not force and now - self._last_save < self.interval
+            ):
+                return
+            self._last_save = now
+            self.state["in_flight"] = sorted(self._in_flight)
+            self.state["totals"] = self.totals()
+            self.state["saved_at"] = datetime.now().isoformat()
+            tmp_path = self.path + ".tmp"
+            try:
+                # the journal must be on disk before a checkpoint that counts it
+                self._journal.flush()
+                with open(tmp_path, "w", encoding="utf-8") as tmp:
+                    json.dump(self.state, tmp, indent=1)
+                os.replace(tmp_path, self.path)
+            except (OSError, IOError) as e:
+                print(f"(CHECKPOINT WRITE FAILED: {e})")
+
+    def close(self, finished=False):
+        """Save a final checkpoint (marked finished or not) and close the journal."""
+        with self._lock:
+            if self._journal is None:
+                return
+            self.state["finished"] = finished
+        self.save(force=True)
+        with self._lock:
+            self._journal.close()
+            self._journal = None
+
+    def _forum(self, key):
+        # caller holds self._lock
+        return self.state["forums"].setdefault(
+            key, {"page_num": None, "done_threads": [], "threads": {}}
+        )
+
 
 class Scraper:
     """Orchestrates scraping: configuration, persistent state, logging, and I/O.
@@ -26,26 +2032,236 @@ class Scraper:
         start_time (datetime): time when the scraper was instantiated.
         folder_and_log_name (str): directory name for saved GIFs and log.
         max_gifs_per_forum_page (int): per-page download cap.
-        forum_page_num (int): current forum page number (mutable).
-        all_saved_gif_paths (list): unique GIF source paths downloaded.
-        all_file_names_saved (list): filenames saved on disk.
+        download_workers (int): size of the GIF download pool (1 = serial).
+        base_url (str): forum root that relative thread/forum links are joined to.
+        max_concurrency (int): asyncio engine limit on requests in flight, and the
+            highest concurrency ``limiter`` ramps a host up to.
+        per_host_concurrency (int): starting concurrency limit per hostname (see
+            ``limiter``).
+        timeout (tuple): (connect, read) timeout in seconds for every request.
+        session (requests.Session): pooled, keep-alive session used for all fetches.
+        manifest_path (str): SQLite manifest shared across runs, or None.
+        manifest (Manifest): the open manifest once open_manifest() has run.
+        known_gif_paths (set): GIF paths saved by earlier runs (from the manifest;
+            a SpilledSet with ``low_memory``).
+        cache (HttpCache): on-disk HTTP cache for conditional requests, or None.
+        limiter (HostLimiter): per-host rate and concurrency limits for every fetch;
+            ``host_rates`` maps hostnames to requests per second, and each host's
+            concurrency adapts between 1 and max_concurrency starting from
+            per_host_concurrency.
+        max_gif_bytes (int): largest GIF saved, in bytes, or None for no limit.
+        chunk_size (int): bytes read from the network and written per chunk.
+        metrics (Metrics): stage timings, bytes, errors and per-host stats of the run,
+            written as JSON to ``metrics_path`` (default: point83_metrics.json in
+            the output folder) with the summary.
+        progress_interval (float): seconds between updates of the live progress line
+            on stderr, or None for no progress line.
+        work_queue (WorkQueue): shared thread queue in distributed mode, or None.
+        coordinating (bool): True when threads found on forum pages are queued for
+            workers (run_coordinator) instead of being processed here.
+        worker_id (str): this process's name in the work queue (run_worker).
+        duplicate_content (str): what to do with a GIF whose bytes match one already
+            saved under another URL: "hardlink" (default), "skip" or "keep".
+        saved_hashes (dict): sha256 of saved GIF bytes -> first file name saved (a
+            SpilledDict with ``low_memory``).
+        parser (str): page-parsing backend, a key of PARSERS ("fast" or "bs4").
+        log (RunLog): buffered log file; console_level and log_flush_interval
+            configure what it prints and how often it flushes.
+        total_duplicate_contents (int): GIFs whose bytes were already saved.
+        forum_page_num (int): forum page the crawl starts on (each Forum tracks its own
+            current page from there).
+        forum_url (str): page-1 URL of the forum being crawled (set by initial_setup).
+        forums (list): forum ids (keys of FORUMS) to crawl concurrently in one run, or
+            None to prompt for a single forum.
+        start_page (int): first forum page to process, or None to prompt for it
+            (page 1 when ``forums`` is given).
+        total_pages (int): forum pages to process per forum, or None to prompt
+            (every page when ``forums`` is given).
+        engine (str): default engine for run(), "sync" or "asyncio".
+        forum_totals (dict): forum id -> {"gifs": n, "thread_pages": n} for this run.
+        prefetch_forum_pages (int): forum index pages fetched ahead of the one being
+            processed (0 = fetch each page only when it is reached).
+        thread_page_fetchers (int): thread pages fetched concurrently once a page's
+            pagination lists the pages after it (1 = follow "Next" links only).
+        layout (str): how saved GIFs are arranged, a key of STORAGE_LAYOUTS:
+            "flat" (default, all in the output folder), "thread" or "hash".
+        fsync_every (int): fsync saved GIFs in batches of this many (0 = never).
+        archive_path (str): zip or tar file to write GIFs into instead of the
+            output folder, or None.
+        storage (FolderStorage or ArchiveStorage): where GIFs are written, once
+            open_storage() has run.
+        media (MediaFilter): picks the URLs to download on each thread page, built
+            from ``media_extensions``, ``include_hosts``, ``exclude_hosts`` and
+            ``media_links``.
+        validate_gifs (bool): check every saved GIF's structure and index its
+            metadata (GifValidator, ``validate_workers`` processes) into
+            ``gif_index_path`` (default: point83_gif_index.jsonl in the output
+            folder).
+        validator (GifValidator): the open validator, once a GIF has been saved.
+        total_gifs_checked (int): saved GIFs checked by the validator.
+        total_invalid_gifs (int): checked GIFs that are not valid GIFs.
+        low_memory (bool): keep the dedup index, earlier runs' GIF paths and the
+            saved file names in SpilledSets and the content-hash index in a
+            SpilledDict, and hold only the GIF URLs and "Next" links of thread
+            pages waiting to be processed, so memory stays flat on long runs.
+        all_saved_gif_paths (set): normalized GIF source paths downloaded (dedup index;
+            a SpilledSet with ``low_memory``).
+        all_file_names_saved (set): filenames saved on disk (a SpilledSet with
+            ``low_memory``).
         total_gifs_downloaded (int): counter of successful downloads.
         total_thread_pgs_scraped (int): counter of processed thread pages.
+        total_threads_skipped (int): threads skipped as unchanged since the last run.
+        checkpoint_interval (float): seconds between checkpoint saves, or None to
+            not checkpoint the run.
+        checkpoint (Checkpoint): the run's checkpoint once prepare_output() has run.
+        resume_state (dict): checkpoint state of the interrupted run being resumed
+            (set by from_checkpoint), or None.
     """
 
-    def __init__(self, max_gifs_per_forum_page=100):
+    def __init__(
+        self,
+        max_gifs_per_forum_page=100,
+        download_workers=1,
+        base_url=FORUM_BASE_URL,
+        max_concurrency=16,
+        per_host_concurrency=4,
+        pool_size=None,
+        timeout=(10, 60),
+        retries=3,
+        backoff_factor=0.5,
+        output_dir=None,
+        manifest_path=None,
+        cache_dir=None,
+        cache_max_bytes=256 * 1024 * 1024,
+        duplicate_content="hardlink",
+        parser="fast",
+        console_level=logging.DEBUG,
+        log_flush_interval=1.0,
+        prefetch_forum_pages=0,
+        forums=None,
+        start_page=None,
+        total_pages=None,
+        engine="sync",
+        checkpoint_interval=30.0,
+        host_rates=None,
+        max_gif_bytes=64 * 1024 * 1024,
+        chunk_size=64 * 1024,
+        metrics_path=None,
+        progress_interval=None,
+        thread_page_fetchers=4,
+        low_memory=False,
+        layout="flat",
+        fsync_every=0,
+        archive_path=None,
+        validate_gifs=False,
+        validate_workers=None,
+        gif_index_path=None,
+        media_extensions=MEDIA_EXTENSIONS,
+        include_hosts=None,
+        exclude_hosts=None,
+        media_links=True,
+    ):
         self.start_time = datetime.now()
-        self.folder_and_log_name = (
-            f"Point83GIFs_{self.start_time.strftime('%Y%m%d_%H%M')}"
-        )
+        run_name = f"Point83GIFs_{self.start_time.strftime('%Y%m%d_%H%M')}"
+        self.folder_and_log_name = run_name
+        # None: the log is named after the folder, as for timestamped folders
+        self.log_file_name = None
+        if output_dir is not None:
+            # shared folder reused across runs; each run still gets its own log
+            self.folder_and_log_name = output_dir
+            self.log_file_name = run_name + ".txt"
+            if manifest_path is None:
+                manifest_path = os.path.join(output_dir, "point83_manifest.sqlite3")
+        self.manifest_path = manifest_path
+        self.manifest = None
+        self.known_gif_paths = set()
         self.max_gifs_per_forum_page = max_gifs_per_forum_page
+        self.download_workers = max(1, int(download_workers))
+        self.base_url = base_url
+        self.max_concurrency = max(1, int(max_concurrency))
+        self.per_host_concurrency = max(1, int(per_host_concurrency))
+        self.timeout = timeout
+        if pool_size is None:
+            pool_size = max(10, self.download_workers, self.max_concurrency)
+        self.session = self._build_session(pool_size, retries, backoff_factor)
+        self.retries = retries
+        self.max_gif_bytes = max_gif_bytes
+        self.chunk_size = max(1, int(chunk_size))
+        self.limiter = HostLimiter(
+            host_rates,
+            initial_concurrency=self.per_host_concurrency,
+            max_concurrency=self.max_concurrency,
+            backoff_factor=backoff_factor,
+        )
+        self.metrics = Metrics()
+        self.metrics_path = metrics_path
+        self.progress_interval = progress_interval
+        self._progress_stop = threading.Event()
+        self._progress_thread = None
+        self.work_queue = None
+        self.coordinating = False
+        self.worker_id = None
+        if duplicate_content not in ("hardlink", "skip", "keep"):
+            raise ValueError(f"unknown duplicate_content: {duplicate_content!r}")
+        self.duplicate_content = duplicate_content
+        if parser not in PARSERS:
+            raise ValueError(f"unknown parser: {parser!r}")
+        self.parser = parser
+        self.cache = None
+        if cache_dir is not None:
+            self.cache = HttpCache(cache_dir, cache_max_bytes)
+
+        # guards the dedup state and counters below when downloads run in parallel
+        self.lock = threading.Lock()
+        self.log = RunLog(log_flush_interval, console_level)
+        self.prefetch_forum_pages = max(0, int(prefetch_forum_pages))
+        self.thread_page_fetchers = max(1, int(thread_page_fetchers))
+        self.low_memory = low_memory
+        if layout not in STORAGE_LAYOUTS:
+            raise ValueError(f"unknown storage layout: {layout!r}")
+        self.layout = layout
+        self.fsync_every = fsync_every
+        self.archive_path = archive_path
+        self.storage = None
+        self.media = MediaFilter(
+            media_extensions, include_hosts, exclude_hosts, media_links
+        )
+        self.validate_gifs = validate_gifs
+        self.validate_workers = validate_workers
+        self.gif_index_path = gif_index_path
+        self.validator = None
+        self.total_gifs_checked = 0
+        self.total_invalid_gifs = 0
+        if forums is not None:
+            unknown = [f for f in forums if f not in FORUMS]
+            if unknown:
+                raise ValueError(f"unknown forum id(s): {unknown}")
+            forums = list(forums)
+            # headless: no prompts when the forums are given
+            start_page = 1 if start_page is None else start_page
+            total_pages = ALL_PAGES if total_pages is None else total_pages
+        self.forums = forums
+        self.start_page = start_page
+        self.total_pages = total_pages
+        self.engine = engine
+        self._download_pool = None
+        self._page_pool = None
+        self._pending_gif_paths = set()
+        self.checkpoint_interval = checkpoint_interval
+        self.checkpoint = None
+        self.resume_state = None
 
         # mutable state previously implemented as globals
         self.forum_page_num = 0
-        self.all_saved_gif_paths = []
-        self.all_file_names_saved = []
+        self.forum_url = None
+        self.all_saved_gif_paths = SpilledSet() if low_memory else set()
+        self.all_file_names_saved = SpilledSet() if low_memory else set()
         self.total_gifs_downloaded = 0
         self.total_thread_pgs_scraped = 0
+        self.total_threads_skipped = 0
+        self.forum_totals = {}
+        self.saved_hashes = SpilledDict() if low_memory else {}
+        self.total_duplicate_contents = 0
 
     # initial setup (was function)
     def initial_setup(self):
@@ -56,30 +2272,256 @@ class Scraper:
 
         Exits the program on fatal errors (invalid start URL or folder creation failure).
         """
-        initial_url = self.prompt_user_for_which_forum()
-        start_page_num = self.prompt_user_for_start_page()
-        self.forum_page_num = start_page_num
-        max_forum_pgs_to_process = self.prompt_user_for_total_pages()
+        self.forum_url = self.prompt_user_for_which_forum()
+        start_page_num, max_forum_pgs_to_process = self.page_range()
 
-        if start_page_num != 1:
-            index = (start_page_num - 1) * 30
-            initial_url = initial_url + "&topicdays=0&start=" + str(index)
+        initial_url = forum_page_url(self.forum_url, start_page_num)
 
         try:
-            res = requests.get(initial_url)
-            res.raise_for_status()
+            res = self.fetch(initial_url, stage="forum fetch")
         except requests.exceptions.RequestException as exception:
             print(f'ERROR:  URL "{initial_url}" could not be located.\n')
             print(exception)
             sys.exit()
 
+        self.prepare_output()
+        return res, max_forum_pgs_to_process
+
+    def page_range(self):
+        """Return (start page, pages to process), prompting for any not configured.
+
+        Also sets ``forum_page_num`` to the start page and stores the answers in
+        ``start_page`` and ``total_pages`` (for the checkpoint).
+        """
+        start_page_num = self.start_page
+        if start_page_num is None:
+            start_page_num = self.prompt_user_for_start_page()
+        self.forum_page_num = start_page_num
+        max_forum_pgs_to_process = self.total_pages
+        if max_forum_pgs_to_process is None:
+            max_forum_pgs_to_process = self.prompt_user_for_total_pages()
+        self.start_page = start_page_num
+        self.total_pages = max_forum_pgs_to_process
+        return start_page_num, max_forum_pgs_to_process
+
+    def prepare_output(self):
+        """Create the output folder and open the manifest and checkpoint.
+
+        Exits the program on failure.
+        """
         try:
             os.makedirs(self.folder_and_log_name, exist_ok=True)
         except OSError:
             print(f'ERROR:  folder "{self.folder_and_log_name}" could not be created.')
             sys.exit()
 
-        return res, max_forum_pgs_to_process
+        try:
+            self.open_manifest()
+        except (OSError, sqlite3.Error) as e:
+            print(f'ERROR:  manifest "{self.manifest_path}" could not be opened.')
+            print(e)
+            sys.exit()
+
+        try:
+            self.open_checkpoint()
+        except (OSError, IOError) as e:
+            print(
+                f'ERROR:  checkpoint in "{self.folder_and_log_name}" could not be opened.'
+            )
+            print(e)
+            sys.exit()
+        self.start_progress()
+
+    # manifest
+    def open_manifest(self):
+        """Open ``manifest_path`` (if configured) and load the GIFs earlier runs saved."""
+        if self.manifest_path is None or self.manifest is not None:
+            return
+        # other workers must see each saved GIF and thread page right away
+        commit_every = 1 if self.work_queue is not None else 50
+        self.manifest = Manifest(self.manifest_path, commit_every)
+        self.known_gif_paths = self.manifest.known_paths(
+            SpilledSet() if self.low_memory else None
+        )
+        self.manifest.known_hashes(self.saved_hashes)
+
+    def thread_state(self, uri):
+        """Return the manifest's stored progress for thread ``uri``, or None."""
+        if self.manifest is None:
+            return None
+        return self.manifest.thread_state(uri)
+
+    def record_thread_page(self, thread, page_num, page_uri, last_post_id):
+        """Store thread progress in the manifest (no-op without a manifest)."""
+        if self.manifest is not None:
+            self.manifest.record_thread_page(
+                thread.thread_uri, thread.thread_name, page_num, page_uri, last_post_id
+            )
+
+    # checkpoint
+    @classmethod
+    def from_checkpoint(cls, folder, **overrides):
+        """Return a Scraper that resumes the interrupted run saved in ``folder``.
+
+        The crawl settings (forums, pages, per-page cap, engine, ...) come from
+        the checkpoint; ``overrides`` are passed to the constructor on top of
+        them, e.g. to change ``download_workers``. The run reuses the folder
+        and appends to its log. Raises OSError or ValueError if ``folder``
+        holds no readable checkpoint.
+        """
+        state = Checkpoint.load(folder)
+        config = state["config"]
+        kwargs = {
+            key: config[key]
+            for key in (
+                "forums",
+                "start_page",
+                "total_pages",
+                "max_gifs_per_forum_page",
+                "engine",
+                "duplicate_content",
+                "parser",
+                "manifest_path",
+            )
+        }
+        # settings added after the checkpoint format was introduced
+        for key in (
+            "layout",
+            "archive_path",
+            "media_extensions",
+            "include_hosts",
+            "exclude_hosts",
+            "media_links",
+        ):
+            if key in config:
+                kwargs[key] = config[key]
+        kwargs.update(overrides)
+        scraper = cls(**kwargs)
+        scraper.folder_and_log_name = folder = os.path.normpath(folder)
+        # checkpoints of timestamped runs used to store None
+        scraper.log_file_name = (
+            config["log_file_name"] or os.path.basename(folder) + ".txt"
+        )
+        scraper.forum_url = config["forum_url"]
+        scraper.resume_state = state
+        return scraper
+
+    def open_checkpoint(self):
+        """Start checkpointing into the output folder (unless disabled).
+
+        When resuming, the GIFs and counters of the interrupted run are restored first.
+        """
+        if self.checkpoint_interval is None or self.checkpoint is not None:
+            return
+        if self.resume_state is not None:
+            self.restore_progress(self.resume_state)
+        config = {
+            "forums": self.forums,
+            "forum_url": self.forum_url,
+            "start_page": self.start_page,
+            "total_pages": self.total_pages,
+            "max_gifs_per_forum_page": self.max_gifs_per_forum_page,
+            "engine": self.engine,
+            "duplicate_content": self.duplicate_content,
+            "parser": self.parser,
+            "manifest_path": self.manifest_path,
+            "layout": self.layout,
+            "archive_path": self.archive_path,
+            "media_extensions": list(self.media.extensions),
+            "include_hosts": list(self.media.include_hosts),
+            "exclude_hosts": list(self.media.exclude_hosts),
+            "media_links": self.media.links,
+            "log_file_name": os.path.basename(self.log_path()),
+        }
+        self.checkpoint = Checkpoint(
+            self.folder_and_log_name,
+            config,
+            self.checkpoint_totals,
+            self.checkpoint_interval,
+            self.resume_state,
+        )
+
+    def restore_progress(self, state):
+        """Rebuild the dedup index and totals from an interrupted run's checkpoint."""
+        totals = state.get("totals", {})
+        with self.lock:
+            for record in Checkpoint.saved_gifs(self.folder_and_log_name):
+                self.all_saved_gif_paths.add(record["path"])
+                if record["file"] is not None:
+                    self.all_file_names_saved.add(record["file"])
+                    self.saved_hashes.setdefault(record["sha256"], record["file"])
+                self.total_gifs_downloaded += 1
+                if record["forum"] is not None:
+                    self.forum_totals.setdefault(
+                        record["forum"], {"gifs": 0, "thread_pages": 0}
+                    )["gifs"] += 1
+            self.total_thread_pgs_scraped = totals.get("thread_pages", 0)
+            self.total_threads_skipped = totals.get("threads_skipped", 0)
+            self.total_duplicate_contents = totals.get("duplicate_contents", 0)
+            for forum_id, pages in totals.get("forum_thread_pages", {}).items():
+                self.forum_totals.setdefault(
+                    int(forum_id), {"gifs": 0, "thread_pages": 0}
+                )["thread_pages"] = pages
+
+    def checkpoint_totals(self):
+        """Return the counters a resumed run cannot rebuild from the saved-GIF journal."""
+        with self.lock:
+            return {
+                "thread_pages": self.total_thread_pgs_scraped,
+                "threads_skipped": self.total_threads_skipped,
+                "duplicate_contents": self.total_duplicate_contents,
+                "forum_thread_pages": {
+                    str(forum_id): totals["thread_pages"]
+                    for forum_id, totals in self.forum_totals.items()
+                },
+            }
+
+    @staticmethod
+    def checkpoint_key(forum_id):
+        """Return the checkpoint key for a forum ("" for a single prompted forum)."""
+        return "" if forum_id is None else str(forum_id)
+
+    def checkpoint_forum_page(self, forum, pages_left):
+        """Checkpoint that ``forum`` is starting its current index page."""
+        if self.checkpoint is not None:
+            self.checkpoint.start_forum_page(
+                self.checkpoint_key(forum.forum_id),
+                forum.forum_url,
+                forum.forum_id,
+                forum.forum_page_num,
+                pages_left,
+            )
+
+    def checkpoint_thread_page(self, thread, page_num, next_uri):
+        """Checkpoint a finished thread page; ``next_uri`` is the thread's next page or None."""
+        if self.checkpoint is not None:
+            self.checkpoint.finish_thread_page(
+                self.checkpoint_key(thread.forum_id),
+                thread.thread_uri,
+                page_num,
+                next_uri,
+            )
+
+    def checkpoint_thread_done(self, thread):
+        """Checkpoint that ``thread`` was fully processed (or skipped)."""
+        if self.checkpoint is not None:
+            self.checkpoint.finish_thread(
+                self.checkpoint_key(thread.forum_id), thread.thread_uri
+            )
+
+    def checkpoint_gif(self, src, started):
+        """Checkpoint that the download of ``src`` started (or ended)."""
+        if self.checkpoint is not None:
+            if started:
+                self.checkpoint.gif_started(src)
+            else:
+                self.checkpoint.gif_done(src)
+
+    def close_checkpoint(self, finished=False):
+        """Save the final checkpoint; ``finished`` marks the run as complete."""
+        if self.checkpoint is not None:
+            self.checkpoint.close(finished)
+            self.checkpoint = None
 
     # prompt helpers (moved into class)
     def prompt_user_for_which_forum(self):
@@ -99,14 +2541,18 @@ class Scraper:
             user_input = input("Enter 1, 2, or 3:\n")
 
             if user_input == "1":
-                return "http://www.point83.com/forum/viewforum.php?f=2"
+                return self.forum_url_for(2)
             elif user_input == "2":
-                return "http://www.point83.com/forum/viewforum.php?f=4"
+                return self.forum_url_for(4)
             elif user_input == "3":
-                return "http://www.point83.com/forum/viewforum.php?f=10"
+                return self.forum_url_for(10)
             else:
                 print("ERROR:  Invalid entry.")
 
+    def forum_url_for(self, forum_id):
+        """Return the page-1 URL of forum ``forum_id``."""
+        return f"{self.base_url}viewforum.php?f={forum_id}"
+
     def prompt_user_for_total_pages(self):
         """Prompt how many forum pages to process.
 
@@ -118,7 +2564,7 @@ class Scraper:
             print("Hit [Enter] for the default (all pages).")
             user_input = input("")
             if user_input == "":
-                return 1000000
+                return ALL_PAGES
             try:
                 val = int(user_input)
                 return val
@@ -145,78 +2591,643 @@ class Scraper:
             except ValueError:
                 print("ERROR:  Invalid; enter an integer.")
 
+    # HTTP
+    @staticmethod
+    def _build_session(pool_size, retries, backoff_factor):
+        """Create the shared session: one keep-alive pool per host, with retries.
+
+        Connection errors and 500/502/504 responses are retried ``retries`` times
+        with exponential backoff (``backoff_factor`` * 2 ** (attempt - 1) seconds).
+        429 and 503 are left to fetch(), which retries them through the limiter.
+        """
+        retry = Retry(
+            total=retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=(500, 502, 504),
+            allowed_methods=frozenset({"GET", "HEAD"}),
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry
+        )
+        session = requests.Session()
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+
+    def fetch(self, url, stage=None, **kwargs):
+        """GET ``url`` through the shared session.
+
+        The request is timed under the Metrics stage ``stage`` (if given), its
+        failures are counted by kind and the bytes of non-streamed responses
+        are counted as page bytes.
+
+        Every request goes through ``limiter``, so it waits for the host's rate
+        and concurrency limits; 429/503 answers are retried up to ``retries``
+        times after the pause the limiter sets (Retry-After when given). With a
+        cache configured the request is made conditional on the cached
+        validators, and a 304 answer is served from the cache. The body of a
+        streamed request (``stream=True``, used for GIFs) is copied into the
+        cache as the caller reads it, so it is never held in memory.
+
+        Returns:
+            requests.Response or CachedResponse: a successful (non-4xx/5xx) response.
+
+        Raises:
+            requests.exceptions.RequestException: on connection or HTTP errors
+            that persist after retries.
+        """
+        started = time.perf_counter()
+        try:
+            res = self._fetch(url, **kwargs)
+        except requests.exceptions.HTTPError as e:
+            status = getattr(e.response, "status_code", None)
+            self.metrics.error(f"HTTP {status}" if status else "HTTPError")
+            raise
+        except requests.exceptions.RequestException as e:
+            self.metrics.error(type(e).__name__)
+            raise
+        finally:
+            if stage is not None:
+                self.metrics.record(stage, time.perf_counter() - started)
+        if not kwargs.get("stream") and not getattr(res, "from_cache", False):
+            self.metrics.add_bytes(
+                "pages", len(res.content), urlsplit(url).hostname or ""
+            )
+        return res
+
+    def _fetch(self, url, **kwargs):
+        if self.cache is None:
+            res = self._limited_get(url, **kwargs)
+            self._raise_for_status(res)
+            return res
+
+        headers = dict(kwargs.pop("headers", None) or {})
+        headers.update(self.cache.conditional_headers(url))
+        res = self._limited_get(url, headers=headers, **kwargs)
+        if res.status_code == 304:
+            res.close()
+            cached = self.cache.replay(url)
+            if cached is not None:
+                return cached
+            # entry evicted between the two calls; fetch it unconditionally
+            res = self._limited_get(url, **kwargs)
+        self._raise_for_status(res)
+        if res.status_code == 200:
+            if kwargs.get("stream"):
+                # cached as the caller reads it, never held in memory
+                res = self.cache.store_stream(url, res)
+            else:
+                self.cache.store(url, res)
+        return res
+
+    @staticmethod
+    def _raise_for_status(res):
+        # close an error response (releasing its host slot) before raising
+        try:
+            res.raise_for_status()
+        except requests.exceptions.RequestException:
+            res.close()
+            raise
+
+    def _limited_get(self, url, **kwargs):
+        """GET ``url`` within the limiter's limits, retrying 429/503 answers.
+
+        A streamed response keeps the host's slot until it is closed, so the
+        concurrency limit covers the body transfer as well. The limiter and
+        the per-host metrics are given the time to the response headers,
+        though, so a large GIF on a fast host does not count as a slow response.
+        """
+        host = urlsplit(url).hostname or ""
+        for attempt in range(self.retries + 1):
+            self.limiter.acquire(host)
+            started = time.monotonic()
+            try:
+                res = self.session.get(url, timeout=self.timeout, **kwargs)
+            except BaseException:
+                self._release_host(host, time.monotonic() - started, None)
+                raise
+            elapsed = time.monotonic() - started
+            status = res.status_code
+            if kwargs.get("stream") and status not in HostLimiter.THROTTLED:
+                return _LimitedStream(
+                    res, lambda: self._release_host(host, elapsed, status)
+                )
+            retry_after = retry_after_seconds(res.headers.get("Retry-After"))
+            pause = self._release_host(host, elapsed, status, retry_after)
+            if status not in HostLimiter.THROTTLED:
+                break
+            self.write_to_log_and_or_console(
+                f"WARNING: {host} answered {status}; pausing it for {pause:.1f}s "
+                f"(concurrency now {self.limiter.limit(host)}).",
+                logging.WARNING,
+            )
+            if attempt < self.retries:
+                res.close()
+        return res
+
+    def _release_host(self, host, elapsed, status, retry_after=None):
+        """Return ``host``'s limiter slot for a request that took ``elapsed`` seconds.
+
+        Returns:
+            float: seconds the host is now paused for (see HostLimiter.release).
+        """
+        pause = self.limiter.release(host, status, elapsed, retry_after)
+        self.metrics.request(host, elapsed, status)
+        return pause
+
+    def parse(self, html):
+        """Extract PageLinks from ``html`` with the configured backend.
+
+        Falls back to the BeautifulSoup backend if the selected one fails.
+        Timed under the "parse" Metrics stage.
+        """
+        with self.metrics.timer("parse"):
+            try:
+                return PARSERS[self.parser](html)
+            except Exception as e:  # pylint: disable=broad-except
+                if self.parser == "bs4":
+                    raise
+                self.metrics.error(f"{self.parser} parser failed")
+                self.write_to_log_and_or_console(
+                    f"WARNING: {self.parser} parser failed ({e}); using bs4.",
+                    logging.WARNING,
+                )
+                return parse_links_bs4(html)
+
+    # download pool
+    def download_pool(self):
+        """Return the shared GIF download pool, creating it on first use.
+
+        Returns:
+            ThreadPoolExecutor: bounded to ``download_workers`` threads.
+        """
+        with self.lock:
+            if self._download_pool is None:
+                self._download_pool = ThreadPoolExecutor(
+                    max_workers=self.download_workers, thread_name_prefix="gif"
+                )
+            return self._download_pool
+
+    def page_pool(self):
+        """Return the shared thread-page fetch pool, creating it on first use.
+
+        Returns:
+            ThreadPoolExecutor: bounded to ``thread_page_fetchers`` threads.
+        """
+        with self.lock:
+            if self._page_pool is None:
+                self._page_pool = ThreadPoolExecutor(
+                    max_workers=self.thread_page_fetchers, thread_name_prefix="page"
+                )
+            return self._page_pool
+
+    def fetch_thread_page(self, uri):
+        """Fetch and parse the thread page ``uri``.
+
+        Returns:
+            PageLinks: the links on the page.
+
+        Raises:
+            requests.exceptions.RequestException: if the page cannot be fetched.
+        """
+        res = self.fetch(f"{self.base_url}{uri}", stage="thread fetch")
+        return self.parse(res.text)
+
+    def fetch_thread_pages(self, uris):
+        """Yield (uri, PageLinks) for each of ``uris`` in order, fetching ahead.
+
+        Up to ``thread_page_fetchers`` pages are fetched and parsed on the page
+        pool ahead of the one being consumed. A page that cannot be fetched is
+        yielded with None for its links; pages not yet consumed when the
+        generator is closed are cancelled.
+        """
+        pool = self.page_pool()
+        pending = deque()
+        uris = iter(uris)
+        try:
+            while True:
+                while len(pending) < self.thread_page_fetchers:
+                    uri = next(uris, None)
+                    if uri is None:
+                        break
+                    pending.append((uri, pool.submit(self.fetch_thread_page, uri)))
+                if not pending:
+                    return
+                uri, future = pending.popleft()
+                try:
+                    links = future.result()
+                except requests.exceptions.RequestException:
+                    links = None
+                yield uri, links
+        finally:
+            for _, future in pending:
+                future.cancel()
+
+    def shutdown(self):
+        """Wait for and release any worker threads and connections owned by the scraper."""
+        with self.lock:
+            pool, self._download_pool = self._download_pool, None
+            page_pool, self._page_pool = self._page_pool, None
+        for executor in (pool, page_pool):
+            if executor is not None:
+                executor.shutdown(wait=True)
+        self.close_storage()
+        self.close_validator()
+        self.session.close()
+        if self.manifest is not None:
+            self.manifest.close()
+            self.manifest = None
+        self.close_checkpoint()
+        self.stop_progress()
+
+    # metrics
+    def progress_line(self):
+        """Return the live progress line: counters, bytes, throughput and errors."""
+        with self.lock:
+            gifs, pages = self.total_gifs_downloaded, self.total_thread_pgs_scraped
+        return self.metrics.progress_line(gifs, pages)
+
+    def start_progress(self):
+        """Start redrawing the progress line on stderr every ``progress_interval`` seconds."""
+        if self.progress_interval is None or self._progress_thread is not None:
+            return
+        self._progress_stop.clear()
+        self._progress_thread = threading.Thread(
+            target=self._show_progress, name="progress", daemon=True
+        )
+        self._progress_thread.start()
+
+    def stop_progress(self):
+        """Stop the progress line, leaving its final state on screen."""
+        if self._progress_thread is None:
+            return
+        self._progress_stop.set()
+        self._progress_thread.join()
+        self._progress_thread = None
+        sys.stderr.write("\r" + self.progress_line() + "\n")
+        sys.stderr.flush()
+
+    def _show_progress(self):
+        while not self._progress_stop.wait(self.progress_interval):
+            sys.stderr.write("\r" + self.progress_line())
+            sys.stderr.flush()
+
+    def metrics_report(self):
+        """Return the run's Metrics report, including the summary counters."""
+        with self.lock:
+            counters = {
+                "gifs_downloaded": self.total_gifs_downloaded,
+                "thread_pages_scraped": self.total_thread_pgs_scraped,
+                "threads_skipped": self.total_threads_skipped,
+                "duplicate_contents": self.total_duplicate_contents,
+            }
+            if self.validate_gifs:
+                counters["gifs_checked"] = self.total_gifs_checked
+                counters["invalid_gifs"] = self.total_invalid_gifs
+        return self.metrics.report(counters)
+
+    def write_metrics(self, report=None):
+        """Write the metrics report as JSON to ``metrics_path`` (or the output folder)."""
+        path = self.metrics_path or os.path.join(
+            self.folder_and_log_name, "point83_metrics.json"
+        )
+        try:
+            with open(path, "w", encoding="utf-8") as out:
+                json.dump(report or self.metrics_report(), out, indent=2)
+        except (OSError, IOError) as e:
+            self.write_to_log_and_or_console(
+                f"WARNING: metrics report could not be written to '{path}': {e}",
+                logging.WARNING,
+            )
+
+    # storage
+    def open_storage(self):
+        """Return the GIF storage, opening it on first use.
+
+        Returns:
+            ArchiveStorage when ``archive_path`` is set, otherwise FolderStorage
+            on the output folder with ``layout`` and ``fsync_every``.
+        """
+        with self.lock:
+            if self.storage is None:
+                if self.archive_path is not None:
+                    self.storage = ArchiveStorage(self.archive_path, self.layout)
+                else:
+                    self.storage = FolderStorage(
+                        self.folder_and_log_name, self.layout, self.fsync_every
+                    )
+            return self.storage
+
+    def close_storage(self):
+        """Finish pending archive writes and fsyncs, reporting GIFs that were lost."""
+        with self.lock:
+            storage, self.storage = self.storage, None
+        if storage is None:
+            return
+        storage.close()
+        for name, error in getattr(storage, "failures", ()):
+            self.metrics.error("archive write")
+            self.write_to_log_and_or_console(
+                f"ERROR:  {name} could not be added to {storage.path}: {error}",
+                logging.ERROR,
+            )
+
+    # GIF validation
+    def open_validator(self):
+        """Return the GifValidator, starting it on first use (None unless ``validate_gifs``)."""
+        if not self.validate_gifs:
+            return None
+        with self.lock:
+            if self.validator is None:
+                self.validator = GifValidator(
+                    self.gif_index_path
+                    or os.path.join(
+                        self.folder_and_log_name, "point83_gif_index.jsonl"
+                    ),
+                    self.validate_workers,
+                    self.gif_checked,
+                )
+            return self.validator
+
+    def close_validator(self):
+        """Wait for pending GIF checks and keep their counts for the summary."""
+        with self.lock:
+            validator, self.validator = self.validator, None
+        if validator is None:
+            return
+        validator.close()
+        with self.lock:
+            self.total_gifs_checked += validator.checked
+            self.total_invalid_gifs += validator.invalid
+
+    def gif_checked(self, entry):
+        """Report a GIF the validator found invalid (called for every checked GIF)."""
+        if entry["valid"]:
+            return
+        self.metrics.error("invalid GIF")
+        self.write_to_log_and_or_console(
+            f"WARNING: {entry['file']} is not a valid GIF: {entry['error']}.",
+            logging.WARNING,
+        )
+
     # save_file now references instance attributes instead of globals
-    def save_file(self, thread_name_for_file_names, img_file_name, res):
-        """Save a downloaded GIF stream to disk.
+    def save_file(self, thread_name_for_file_names, img_file_name, res, forum_id=None):
+        """Save a downloaded GIF stream to disk, ``chunk_size`` bytes at a time.
+
+        Responses whose headers show they are not a usable GIF (see
+        reject_gif_response) are dropped before any file is created; a body
+        that starts like an HTML page, or grows past ``max_gif_bytes``, is
+        aborted and the partial file deleted.
 
         Parameters:
             thread_name_for_file_names (str): sanitized thread identifier used as filename prefix.
             img_file_name (str): original GIF path (sanitized before saving).
             res (requests.Response): response object containing GIF content.
+            forum_id (int): forum the GIF was found in, for the checkpoint journal.
 
         Returns:
             bool: True when save succeeded, False otherwise.
         """
+        gif_path = img_file_name
+        # the URL path's extension, kept last even when a query string follows
+        extension = os.path.splitext(urlsplit("//" + gif_path).path)[1].lower()
         img_file_name = re.sub("[^0-9a-zA-Z._]", "-", img_file_name)
         img_file_name = thread_name_for_file_names + "__" + img_file_name
+        if extension and not img_file_name.lower().endswith(extension):
+            img_file_name += extension
 
         if len(img_file_name) > 130:
-            img_file_name = img_file_name.replace(img_file_name[120:], "_(...).gif")
-        self.write_to_log_and_or_console(f"Downloading file: {img_file_name}")
+            img_file_name = img_file_name.replace(
+                img_file_name[120:], "_(...)" + (extension or ".gif")
+            )
+        reason = self.reject_gif_response(res)
+        if reason is not None:
+            self.metrics.error("GIF rejected")
+            self.write_to_log_and_or_console(
+                f"ERROR:  {img_file_name} not saved: {reason}.", logging.ERROR
+            )
+            return False
+        self.write_to_log_and_or_console(
+            f"Downloading file: {img_file_name}", logging.DEBUG
+        )
+        storage = self.open_storage()
+        # the temp file the body streams into, until storage takes it over
+        image_file = None
         try:
-            dest = os.path.join(self.folder_and_log_name, img_file_name)
-            with open(dest, "wb") as image_file:
-                for chunk in res.iter_content(100000):
+            digest = hashlib.sha256()
+            size = 0
+            # time spent waiting on the network vs. writing, for the metrics
+            read_seconds = write_seconds = 0.0
+            written = 0
+            chunks = res.iter_content(self.chunk_size)
+            try:
+                while True:
+                    started = time.perf_counter()
+                    chunk = next(chunks, None)
+                    read_seconds += time.perf_counter() - started
+                    if chunk is None:
+                        break
+                    if not chunk:
+                        continue
+                    if image_file is None:
+                        if HTML_START_RE.match(chunk):
+                            reason = "the body is an HTML page"
+                            break
+                        # opened on the first bytes, so an empty body leaves no file
+                        image_file = storage.open_temp()
+                    size += len(chunk)
+                    if self.max_gif_bytes is not None and size > self.max_gif_bytes:
+                        reason = f"larger than {self.max_gif_bytes} bytes"
+                        break
+                    digest.update(chunk)
+                    started = time.perf_counter()
                     image_file.write(chunk)
+                    write_seconds += time.perf_counter() - started
+                    written += len(chunk)
+            finally:
+                if image_file is not None:
+                    started = time.perf_counter()
+                    image_file.close()
+                    write_seconds += time.perf_counter() - started
+                self.metrics.record("gif body", read_seconds)
+                if not getattr(res, "from_cache", False):
+                    self.metrics.add_bytes(
+                        "gifs", size, urlsplit("//" + gif_path).hostname or ""
+                    )
+                if image_file is not None:
+                    self.metrics.record("disk write", write_seconds)
+                    self.metrics.add_bytes("written", written)
 
-            try:
-                size = os.path.getsize(dest)
-            except OSError as e:
-                # couldn't stat file
+            if reason is not None:
+                if image_file is not None:
+                    storage.discard(image_file.name)
+                self.metrics.error("GIF aborted")
                 self.write_to_log_and_or_console(
-                    f"ERROR: cannot determine size of '{dest}': {e}"
+                    f"ERROR:  {img_file_name} aborted: {reason}.", logging.ERROR
                 )
                 return False
-
             if size == 0:
-                try:
-                    os.remove(dest)
-                except OSError as e:
-                    self.write_to_log_and_or_console(
-                        f"WARNING: failed to remove zero-byte file '{dest}': {e}"
+                self.metrics.error("empty GIF")
+                self.write_to_log_and_or_console(
+                    "ERROR:  GIF downloaded as a 0 KB file. Not saving it.",
+                    logging.ERROR,
+                )
+                return False
+            else:
+                sha256 = digest.hexdigest()
+                # only GIFs are checked; other media go unindexed
+                validator = None
+                if img_file_name.lower().endswith(".gif"):
+                    validator = self.open_validator()
+                check_copy = None
+                if validator is not None and not storage.keeps_files:
+                    # the storage deletes the temp file once archived
+                    check_copy = image_file.name + ".check"
+                    try:
+                        os.link(image_file.name, check_copy)
+                    except OSError:
+                        shutil.copyfile(image_file.name, check_copy)
+                saved_name = self._store(
+                    storage,
+                    image_file.name,
+                    storage.name_for(img_file_name, thread_name_for_file_names, sha256),
+                    sha256,
+                )
+                # the temp file is the storage's now
+                image_file = None
+                if saved_name is not None:
+                    with self.lock:
+                        self.all_file_names_saved.add(saved_name)
+                    if validator is not None:
+                        entry = {"file": saved_name, "path": gif_path, "sha256": sha256}
+                        if check_copy is not None:
+                            validator.check(check_copy, entry, remove=True)
+                        else:
+                            validator.check(storage.path(saved_name), entry)
+                elif check_copy is not None:
+                    storage.discard(check_copy)
+                if self.manifest is not None:
+                    self.manifest.record_gif(
+                        gif_path,
+                        sha256,
+                        saved_name or self.saved_hashes[sha256],
+                        thread_name_for_file_names,
                     )
+                if self.checkpoint is not None:
+                    self.checkpoint.record_saved(gif_path, saved_name, sha256, forum_id)
+                return True
+        except (OSError, IOError) as e:
+            if image_file is not None:
+                storage.discard(image_file.name)
+            self.metrics.error(type(e).__name__)
+            self.write_to_log_and_or_console(
+                f"ERROR:  {img_file_name} had a problem saving: {e}", logging.ERROR
+            )
+            return False
+        except BaseException:
+            # e.g. the connection dropped mid-body; leave no temp file behind
+            if image_file is not None:
+                storage.discard(image_file.name)
+            raise
+
+    def reject_gif_response(self, res):
+        """Return why a GIF response should not be downloaded, judging by its headers.
+
+        Returns:
+            str or None: the reason (a non-image Content-Type, an empty body or a
+            Content-Length over ``max_gif_bytes``), or None if it looks fine.
+        """
+        headers = res.headers
+        content_type = headers.get("Content-Type", "").split(";")[0].strip().lower()
+        if content_type and not (
+            content_type.startswith("image/") or content_type in BINARY_CONTENT_TYPES
+        ):
+            return f"served as {content_type}, not an image"
+        try:
+            length = int(headers.get("Content-Length"))
+        except (TypeError, ValueError):
+            return None
+        if length == 0:
+            return "empty (Content-Length: 0)"
+        if self.max_gif_bytes is not None and length > self.max_gif_bytes:
+            return f"{length} bytes is over the {self.max_gif_bytes}-byte limit"
+        return None
+
+    def _store(self, storage, temp_path, name, sha256):
+        """Move a downloaded temp file into ``storage`` as ``name``.
+
+        ``duplicate_content`` decides what happens when a file with the same
+        ``sha256`` was saved before: "hardlink" links ``name`` to it (keeping
+        a full copy where the storage cannot link), "skip" drops the new
+        copy and "keep" stores it anyway.
+
+        Returns:
+            str or None: the name now holding the GIF, or None when the
+            duplicate was dropped ("skip" mode).
+        """
+        with self.lock:
+            first = self.saved_hashes.setdefault(sha256, name)
+            duplicate = first != name
+            if duplicate:
+                self.total_duplicate_contents += 1
+        if not duplicate or self.duplicate_content == "keep":
+            storage.commit(temp_path, name)
+            return name
+        if self.duplicate_content == "skip":
+            storage.discard(temp_path)
+            self.write_to_log_and_or_console(
+                f"\tSame content as {first}; not keeping a copy.", logging.DEBUG
+            )
+            return None
+        if storage.can_link:
+            try:
+                storage.link(first, name)
+            except OSError as e:
                 self.write_to_log_and_or_console(
-                    "ERROR:  GIF downloaded as a 0 KB file. Deleting file."
+                    f"WARNING: could not link duplicate of '{first}': {e}",
+                    logging.WARNING,
                 )
-                return False
             else:
-                self.all_file_names_saved.append(img_file_name)
-                return True
-        except (OSError, IOError) as e:
-            self.write_to_log_and_or_console(
-                f"ERROR:  {img_file_name} had a problem saving: {e}"
-            )
-            return False
+                storage.discard(temp_path)
+                self.write_to_log_and_or_console(
+                    f"\tSame content as {first}; hardlinked.", logging.DEBUG
+                )
+                return name
+        # no link possible: keep the full copy
+        storage.commit(temp_path, name)
+        return name
 
     # logging helper
-    def write_to_log_and_or_console(self, text):
+    def write_to_log_and_or_console(self, text, level=logging.INFO):
         """Append a line to the log file and also print it to stdout.
 
-        The method falls back to console output when writing the log file fails.
+        Lines below ``console_level`` only go to the log file. The method falls
+        back to console output when writing the log file fails.
         """
-        log_path = os.path.join(
-            self.folder_and_log_name, (self.folder_and_log_name + ".txt")
+        self.log.write(self.log_path(), text, level)
+
+    def log_path(self):
+        """Return the log file's path: ``log_file_name`` in the output folder.
+
+        Without a ``log_file_name`` the log is named after the folder itself.
+        """
+        folder = os.path.normpath(self.folder_and_log_name)
+        return os.path.join(
+            folder, self.log_file_name or os.path.basename(folder) + ".txt"
         )
-        try:
-            with open(log_path, "a", encoding="utf-8") as text_file:
-                text_file.write(text + "\n")
-        except (OSError, IOError) as e:
-            # fallback: print to console with a note that file write failed
-            print(f"(LOG WRITE FAILED: {e})")
-            # still print the message so the user sees it
-            print(text)
-            return
-        print(text)
+
+    def add_to_totals(self, forum_id, gifs=0, thread_pages=0):
+        """Add to the run-wide counters and to the per-forum ones for ``forum_id``."""
+        with self.lock:
+            self.total_gifs_downloaded += gifs
+            self.total_thread_pgs_scraped += thread_pages
+            if forum_id is not None:
+                totals = self.forum_totals.setdefault(
+                    forum_id, {"gifs": 0, "thread_pages": 0}
+                )
+                totals["gifs"] += gifs
+                totals["thread_pages"] += thread_pages
 
     # write summary
     def write_summary(self):
@@ -224,14 +3235,14 @@ class Scraper:
         self.write_to_log_and_or_console("---------------------------------")
         self.write_to_log_and_or_console('All GIF origin "paths" (sorted): ')
         self.write_to_log_and_or_console("---------------------------------")
-        for path in sorted(self.all_saved_gif_paths):
-            self.write_to_log_and_or_console(path)
+        for path in self._sorted(self.all_saved_gif_paths):
+            self.write_to_log_and_or_console(path, logging.DEBUG)
 
         self.write_to_log_and_or_console("\n--------------------------")
         self.write_to_log_and_or_console("All files saved (sorted): ")
         self.write_to_log_and_or_console("--------------------------")
-        for name in sorted(self.all_file_names_saved):
-            self.write_to_log_and_or_console(name)
+        for name in self._sorted(self.all_file_names_saved):
+            self.write_to_log_and_or_console(name, logging.DEBUG)
 
         self.write_to_log_and_or_console(
             f"\nTotal items in ALL_SAVED_GIF_PATHS list....."
@@ -240,90 +3251,520 @@ class Scraper:
         self.write_to_log_and_or_console(
             f"Total GIFs downloaded....." f"{str(self.total_gifs_downloaded)}"
         )
+        self.write_to_log_and_or_console(
+            f"Total unique GIF contents....."
+            f"{str(self.total_gifs_downloaded - self.total_duplicate_contents)}"
+        )
         self.write_to_log_and_or_console(
             f"Total thread-pages scraped....." f"{str(self.total_thread_pgs_scraped)}"
         )
+        if self.validate_gifs:
+            self.write_to_log_and_or_console(
+                f"Total GIFs checked....."
+                f"{self.total_gifs_checked} ({self.total_invalid_gifs} invalid)"
+            )
+        if self.manifest is not None:
+            self.write_to_log_and_or_console(
+                f"Total unchanged threads skipped....."
+                f"{str(self.total_threads_skipped)}"
+            )
+        for forum_id in sorted(self.forum_totals):
+            totals = self.forum_totals[forum_id]
+            self.write_to_log_and_or_console(
+                f"  {FORUMS[forum_id]} (f={forum_id}): "
+                f"{totals['gifs']} GIFs, {totals['thread_pages']} thread-pages"
+            )
+
+        report = self.metrics_report()
+        self.write_to_log_and_or_console(
+            f"Total MB downloaded....."
+            f"{(report['bytes']['pages'] + report['bytes']['gifs']) / 1048576:.2f} "
+            f"({report['throughput_bytes_per_s'] / 1048576:.2f} MB/s)"
+        )
+        if report["peak_rss_bytes"] is not None:
+            self.write_to_log_and_or_console(
+                f"Peak memory (RSS)....." f"{report['peak_rss_bytes'] / 1048576:.1f} MB"
+            )
+        if report["errors"]:
+            self.write_to_log_and_or_console(
+                "Errors....."
+                + ", ".join(f"{kind}: {n}" for kind, n in report["errors"].items())
+            )
+        self.write_to_log_and_or_console("Time per stage (count, mean / p90 / max ms):")
+        for stage, timing in report["stages"].items():
+            self.write_to_log_and_or_console(
+                f"  {stage:<13}{timing['count']:>8}  {timing['mean_ms']:>9.1f} /"
+                f" {timing['p90_ms']:>9.1f} / {timing['max_ms']:>9.1f}"
+            )
+        self.write_metrics(report)
 
         self.write_to_log_and_or_console(
             f"\nTotal time for script to run, in H:M:S....."
             f"{str(datetime.now() - self.start_time)}"
         )
+        self.log.flush()
+
+    @staticmethod
+    def _sorted(values):
+        """Return ``values`` in sorted order; a SpilledSet already iterates sorted."""
+        return iter(values) if isinstance(values, SpilledSet) else sorted(values)
 
     # main runner
-    def run(self):
-        """Execute the full scraping run: setup, process forum pages, and write summary."""
-        res, max_forum_pgs_to_process = self.initial_setup()
-        forum = Forum(res, max_forum_pgs_to_process, self)
-        forum.process_forum()
+    def run(self, engine=None):
+        """Execute the full scraping run: setup, process forum pages, and write summary.
+
+        Parameters:
+            engine (str): "sync" walks the forum one request at a time; "asyncio"
+                uses AsyncEngine to fetch threads and GIFs concurrently. Defaults
+                to the engine given to the constructor.
+        """
+        engine = engine or self.engine
+        if engine not in ("sync", "asyncio"):
+            raise ValueError(f"unknown engine: {engine!r}")
+        try:
+            if self.resume_state is not None:
+                self.run_resumed(engine)
+            elif self.forums:
+                self.run_forums(engine)
+            else:
+                res, max_forum_pgs_to_process = self.initial_setup()
+                self.crawl_single_forum(res, max_forum_pgs_to_process, engine)
+        finally:
+            self.log.close()
+
+    def crawl_single_forum(self, res, max_forum_pgs_to_process, engine):
+        """Crawl the prompted-for forum from its index page ``res``, then summarize."""
+        try:
+            self.process_forum(Forum(res, max_forum_pgs_to_process, self), engine)
+            self.close_checkpoint(finished=True)
+        finally:
+            self.shutdown()
         self.write_summary()
 
+    def run_forums(self, engine="sync"):
+        """Crawl every forum in ``self.forums`` concurrently, one thread per forum.
+
+        The forums share this Scraper, so they share its dedup index, output
+        folder and manifest; the summary breaks totals down per forum.
+        """
+        start_page_num, max_forum_pgs_to_process = self.page_range()
+        self.prepare_output()
+        self.crawl_forums(
+            [
+                (self.forum_url_for(forum_id), forum_id, start_page_num, None)
+                for forum_id in self.forums
+            ],
+            max_forum_pgs_to_process,
+            engine,
+        )
+
+    def run_resumed(self, engine="sync"):
+        """Continue the interrupted run in ``resume_state`` where its checkpoint left off.
+
+        Each forum restarts on the index page it was on, without the threads
+        already finished there; a thread stopped partway continues from its
+        next page. Forums that had finished are not crawled again.
+        """
+        state = self.resume_state
+        if state.get("finished"):
+            self.write_to_log_and_or_console(
+                f'The run in "{self.folder_and_log_name}" already finished; '
+                f"nothing to resume."
+            )
+            return
+        self.prepare_output()
+        self.write_to_log_and_or_console(
+            f'\n\nRESUMING the run in "{self.folder_and_log_name}" '
+            f"(checkpoint saved {state.get('saved_at')}).\n"
+        )
+        if state.get("in_flight"):
+            self.write_to_log_and_or_console(
+                f"{len(state['in_flight'])} GIF download(s) had not finished; "
+                f"their pages will be processed again."
+            )
+
+        units = []
+        for forum_id in self.forums or [None]:
+            forum_url = (
+                self.forum_url if forum_id is None else self.forum_url_for(forum_id)
+            )
+            entry = state["forums"].get(self.checkpoint_key(forum_id))
+            if entry is None or entry.get("page_num") is None:
+                units.append((forum_url, forum_id, self.start_page, None))
+            elif not entry.get("finished"):
+                units.append((forum_url, forum_id, entry["page_num"], entry))
+        self.crawl_forums(units, self.total_pages, engine)
+
+    def crawl_forums(self, units, max_forum_pgs_to_process, engine):
+        """Crawl (forum url, forum id, start page, resume entry) units concurrently.
+
+        A unit with a checkpoint resume entry processes the pages it had left
+        rather than ``max_forum_pgs_to_process``. Shuts the scraper down,
+        writes the summary and closes the log when every unit is done.
+        """
+        try:
+            with ThreadPoolExecutor(
+                max_workers=max(1, len(units)), thread_name_prefix="forum"
+            ) as pool:
+                futures = [
+                    pool.submit(
+                        self.crawl_forum,
+                        forum_url,
+                        forum_id,
+                        page_num,
+                        resume["pages_left"] if resume else max_forum_pgs_to_process,
+                        engine,
+                        resume,
+                    )
+                    for forum_url, forum_id, page_num, resume in units
+                ]
+                for future in futures:
+                    future.result()
+            self.close_checkpoint(finished=True)
+        finally:
+            self.shutdown()
+        try:
+            self.write_summary()
+        finally:
+            self.log.close()
+
+    def crawl_forum(self, forum_url, forum_id, page_num, pages, engine, resume=None):
+        """Fetch index page ``page_num`` of a forum and crawl ``pages`` pages from it."""
+        url = forum_page_url(forum_url, page_num)
+        try:
+            res = self.fetch(url, stage="forum fetch")
+        except requests.exceptions.RequestException:
+            self.write_to_log_and_or_console(
+                f'ERROR:  URL "{url}" could not be located; '
+                f"skipping {FORUMS.get(forum_id, forum_url)}.",
+                logging.ERROR,
+            )
+            return
+        forum = Forum(res, pages, self, forum_url, forum_id=forum_id)
+        forum.forum_page_num = forum.first_page_num = page_num
+        forum.resume = resume
+        self.process_forum(forum, engine)
+
+    def run_coordinator(self, queue_path):
+        """Queue the threads of every forum in ``self.forums`` for worker processes.
+
+        Walks the forum index pages as run_forums does, but adds each thread to
+        the WorkQueue at ``queue_path`` instead of processing it, then marks the
+        enumeration finished so idle workers know when to stop.
+        """
+        self.work_queue = WorkQueue(queue_path)
+        self.coordinating = True
+        try:
+            self.run_forums("sync")
+            self.work_queue.finish_enumeration()
+            self.write_to_log_and_or_console(
+                f"Work queue {queue_path}: {self.work_queue.counts()}"
+            )
+        finally:
+            self.work_queue.close()
+            self.log.close()
+
+    def run_worker(self, queue_path, poll_interval=1.0):
+        """Process threads leased from the WorkQueue at ``queue_path`` until it is drained.
+
+        Workers must share the output folder (and so its manifest). GIF paths
+        are claimed in the queue before downloading, so each GIF is fetched by
+        one worker only. The lease on the current thread is renewed in the
+        background; a thread that raises is handed back to the queue. Each
+        worker writes its own log and metrics report, and does not checkpoint
+        (an abandoned thread is picked up by another worker instead).
+        """
+        self.work_queue = WorkQueue(queue_path)
+        self.worker_id = f"{socket.gethostname()}-{os.getpid()}"
+        run_name = os.path.splitext(self.log_file_name or self.folder_and_log_name)[0]
+        self.log_file_name = f"{os.path.basename(run_name)}_{self.worker_id}.txt"
+        if self.metrics_path is None:
+            self.metrics_path = os.path.join(
+                self.folder_and_log_name, f"point83_metrics_{self.worker_id}.json"
+            )
+        self.checkpoint_interval = None
+        if self.gif_index_path is None:
+            self.gif_index_path = os.path.join(
+                self.folder_and_log_name, f"point83_gif_index_{self.worker_id}.jsonl"
+            )
+        if self.archive_path is not None:
+            # one archive per worker; archive files cannot be shared
+            base, extension = os.path.splitext(self.archive_path)
+            self.archive_path = f"{base}_{self.worker_id}{extension}"
+        self.prepare_output()
+
+        current = {"uri": None}
+        stop = threading.Event()
+
+        def renew_leases():
+            while not stop.wait(self.work_queue.lease_seconds / 3):
+                if current["uri"] is not None:
+                    self.work_queue.renew(current["uri"], self.worker_id)
+
+        heartbeat = threading.Thread(target=renew_leases, name="lease", daemon=True)
+        heartbeat.start()
+        try:
+            while True:
+                task = self.work_queue.lease(self.worker_id)
+                if task is None:
+                    if self.work_queue.drained():
+                        break
+                    time.sleep(poll_interval)
+                    continue
+                thread = Thread(task["uri"], task["name"], self)
+                thread.forum_id = task["forum_id"]
+                thread.index_last_post_id = task["last_post_id"]
+                current["uri"] = task["uri"]
+                try:
+                    thread.process_thread()
+                except Exception as e:  # pylint: disable=broad-except
+                    self.metrics.error(type(e).__name__)
+                    self.write_to_log_and_or_console(
+                        f'ERROR:  thread "{thread.name_for_log}" failed ({e!r}); '
+                        f"handing it back to the queue.",
+                        logging.ERROR,
+                    )
+                    self.work_queue.fail(task["uri"], self.worker_id, repr(e))
+                else:
+                    self.work_queue.complete(task["uri"], self.worker_id)
+                finally:
+                    current["uri"] = None
+        finally:
+            stop.set()
+            heartbeat.join()
+            self.shutdown()
+            self.work_queue.close()
+        try:
+            self.write_summary()
+        finally:
+            self.log.close()
+
+    def dispatch_thread(self, thread):
+        """Process ``thread`` here, or queue it for the workers when coordinating."""
+        if self.coordinating:
+            self.work_queue.add(
+                thread.thread_uri,
+                thread.thread_name,
+                thread.forum_id,
+                thread.index_last_post_id,
+            )
+        else:
+            thread.process_thread()
+
+    def claim_gif(self, img_file):
+        """Claim ``img_file`` in the work queue so no other worker downloads it.
+
+        Always True outside distributed mode.
+        """
+        if self.work_queue is None or self.worker_id is None:
+            return True
+        return self.work_queue.claim(img_file, self.worker_id)
+
+    def settle_gif_claim(self, img_file, saved):
+        """Keep this worker's claim on a saved GIF, or release it for a retry."""
+        if self.work_queue is not None and self.worker_id is not None:
+            self.work_queue.settle_claim(img_file, self.worker_id, saved)
+
+    def process_forum(self, forum, engine):
+        """Crawl ``forum`` with the named engine."""
+        if engine == "asyncio":
+            AsyncEngine(self).run(forum)
+        else:
+            forum.process_forum()
+        if self.checkpoint is not None:
+            self.checkpoint.finish_forum(self.checkpoint_key(forum.forum_id))
+
 
 class Forum:
     """Represents a forum index page and iterates threads within it.
 
     The Forum instance does not hold global state itself; it references a Scraper
-    instance for shared configuration and counters.
+    instance for shared configuration and counters. It only tracks its own
+    position (``forum_page_num``), so several forums can be crawled at once.
     """
 
-    def __init__(self, resp, max_forum_pgs_to_process, scraper: Scraper) -> None:
+    def __init__(
+        self,
+        resp,
+        max_forum_pgs_to_process,
+        scraper: Scraper,
+        forum_url=None,
+        forum_id=None,
+    ) -> None:
         self.resp = resp
         self.max_forum_pgs_to_process = max_forum_pgs_to_process
         self.scraper = scraper
+        self.forum_url = forum_url or scraper.forum_url
+        self.forum_id = forum_id
+        self.forum_page_num = scraper.forum_page_num
+        self.first_page_num = self.forum_page_num
+        # checkpoint entry of the interrupted run when resuming, until used
+        self.resume = None
 
     def process_forum(self):
         """Process the current forum page: find thread URIs, instantiate Thread objects,
         and follow 'Next' links until the configured page limit is reached.
+
+        With ``scraper.prefetch_forum_pages`` set, upcoming index pages are
+        fetched ahead of time by a background thread (see process_forum_pipelined).
         """
+        if self.scraper.prefetch_forum_pages > 0 and self.forum_url:
+            self.process_forum_pipelined()
+            return
+
         page_num = 1
 
         forum_next_button = True
         while forum_next_button:
-            soup = bs4.BeautifulSoup(self.resp.text, "html.parser")
-            viewtopic_anchors = soup.find_all("span", class_="blacklink")
-            forum_next_btn_anchors = soup.find_all("a", href=True, string="Next")
-
-            self.scraper.write_to_log_and_or_console(
-                f"------------------------\nFORUM PAGE {str(self.scraper.forum_page_num)}"
-            )
-            self.scraper.write_to_log_and_or_console("------------------------\n")
-
-            all_uris = []
-            all_thread_names = []
-            for anchor in viewtopic_anchors:
-                if str(anchor).find("viewtopic.php?t") != -1:
-                    all_uris.append(
-                        str(anchor)[
-                            str(anchor).find("viewtopic") : str(anchor).find("&")
-                        ]
-                    )
-                    all_thread_names.append(anchor.text)
+            links = self.scraper.parse(self.resp.text)
+            forum_next_btn_hrefs = links.next_hrefs
 
-            for i in range(len(all_uris)):
-                thread = Thread(all_uris[i], all_thread_names[i], self.scraper)
-                thread.process_thread()
+            self.log_page_header()
+            self.process_threads(links)
 
             # go to next page (IF there is one)
-            if len(forum_next_btn_anchors) > 0:
-                url = f"http://www.point83.com/forum/{forum_next_btn_anchors[0].get('href')}"
+            if len(forum_next_btn_hrefs) > 0:
+                url = f"{self.scraper.base_url}{forum_next_btn_hrefs[0]}"
                 try:
-                    self.resp = requests.get(url)
-                    self.resp.raise_for_status()
+                    self.resp = self.scraper.fetch(url, stage="forum fetch")
                 except requests.exceptions.RequestException:
-                    self.scraper.write_to_log_and_or_console(
-                        f"\n\nERROR:  URL for forum page number "
-                        f"{str(self.scraper.forum_page_num + 1)} ({url}) "
-                        f"could not be located."
-                    )
-                    self.scraper.write_to_log_and_or_console("Exiting process.\n\n")
+                    self.log_page_error(url)
                     return
                 page_num += 1
-                self.scraper.forum_page_num += 1
+                self.forum_page_num += 1
             else:
                 forum_next_button = False
 
             if page_num > self.max_forum_pgs_to_process:
                 forum_next_button = False
 
+    def process_threads(self, links):
+        """Walk every thread listed in a forum page's PageLinks."""
+        for thread in self.threads_on_page(links):
+            self.scraper.dispatch_thread(thread)
+            self.scraper.checkpoint_thread_done(thread)
+
+    def threads_on_page(self, links):
+        """Return Thread objects for the threads listed on the current index page.
+
+        Also checkpoints the page. When resuming, threads the interrupted run
+        finished on this page are left out and a thread it stopped partway
+        through is given its checkpointed position (``resume_from``).
+        """
+        resume, self.resume = self.resume, None
+        self.scraper.checkpoint_forum_page(
+            self,
+            self.max_forum_pgs_to_process - (self.forum_page_num - self.first_page_num),
+        )
+        threads = []
+        for uri, thread_name, last_post_id in links.threads:
+            if resume and uri in resume["done_threads"]:
+                continue
+            thread = Thread(uri, thread_name, self.scraper)
+            thread.index_last_post_id = last_post_id
+            thread.forum_id = self.forum_id
+            if resume:
+                thread.resume_from = resume["threads"].get(uri)
+            threads.append(thread)
+        return threads
+
+    def process_forum_pipelined(self):
+        """Process forum pages while a producer thread prefetches the next ones.
+
+        The producer builds each page's URL from its ``start=`` offset and puts
+        the parsed page on a queue holding at most ``prefetch_forum_pages``
+        entries, so it can never run further ahead than that.
+        """
+        links = self.scraper.parse(self.resp.text)
+        prefetched = queue.Queue(maxsize=self.scraper.prefetch_forum_pages)
+        stop = threading.Event()
+        producer = threading.Thread(
+            target=self._prefetch_pages,
+            args=(links, prefetched, stop),
+            name="forum-prefetch",
+            daemon=True,
+        )
+        producer.start()
+        try:
+            while True:
+                self.log_page_header()
+                self.process_threads(links)
+
+                item = prefetched.get()
+                if item is None:
+                    return
+                if isinstance(item, BaseException):
+                    raise item
+                page_num, url, links = item
+                if links is None:
+                    self.log_page_error(url)
+                    return
+                self.forum_page_num = page_num
+        finally:
+            stop.set()
+            # unblock a producer waiting on a full queue
+            while producer.is_alive():
+                try:
+                    prefetched.get(timeout=0.1)
+                except queue.Empty:
+                    pass
+            producer.join()
+
+    def _prefetch_pages(self, links, prefetched, stop):
+        """Producer for process_forum_pipelined; puts (page, url, links) then None.
+
+        ``links`` is None for a page that could not be fetched, which ends the run.
+        Any other exception is put in place of None, for the consumer to re-raise.
+        """
+        page_num = self.forum_page_num
+        last_page = page_num + self.max_forum_pgs_to_process - 1
+        try:
+            while links.next_hrefs and page_num < last_page and not stop.is_set():
+                page_num += 1
+                url = forum_page_url(self.forum_url, page_num)
+                try:
+                    res = self.scraper.fetch(url, stage="forum fetch")
+                    links = self.scraper.parse(res.text)
+                except requests.exceptions.RequestException:
+                    links = None
+                item = (page_num, url, links)
+                if not self._put_unless_stopped(prefetched, stop, item):
+                    return
+                if links is None:
+                    return
+            last_item = None
+        except BaseException as exception:
+            last_item = exception
+        self._put_unless_stopped(prefetched, stop, last_item)
+
+    @staticmethod
+    def _put_unless_stopped(prefetched, stop, item):
+        while not stop.is_set():
+            try:
+                prefetched.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def log_page_error(self, url):
+        """Report a forum index page that could not be fetched (ends the run)."""
+        self.scraper.write_to_log_and_or_console(
+            f"\n\nERROR:  URL for forum page number "
+            f"{str(self.forum_page_num + 1)} ({url}) "
+            f"could not be located.",
+            logging.ERROR,
+        )
+        self.scraper.write_to_log_and_or_console("Exiting process.\n\n", logging.ERROR)
+
+    def log_page_header(self):
+        """Write the "FORUM PAGE n" banner for the page about to be processed."""
+        forum_name = f"{FORUMS[self.forum_id]} " if self.forum_id in FORUMS else ""
+        self.scraper.write_to_log_and_or_console(
+            f"------------------------\n{forum_name}FORUM PAGE {str(self.forum_page_num)}"
+        )
+        self.scraper.write_to_log_and_or_console("------------------------\n")
+
 
 class Thread:
     """Represents a forum thread and iterates its pages to find GIFs.
@@ -333,131 +3774,756 @@ class Thread:
 
     def __init__(self, uri, thread_name, scraper: Scraper):
         self.uri = uri
+        # uri of the thread's first page; identifies the thread in the manifest
+        self.thread_uri = uri
         self.thread_name = thread_name
         self.scraper = scraper
+        # last-post id shown for this thread on the forum index, when known
+        self.index_last_post_id = None
+        # id of the forum the thread was listed in (for per-forum totals)
+        self.forum_id = None
+        # {"page_num", "next_uri"} from an interrupted run's checkpoint, if any
+        self.resume_from = None
 
     def process_thread(self):
-        """Visit each page in the thread (follows 'Next') and spawn Page objects to download GIFs."""
-        # remove all non-ascii characters:
-        thread_name_for_log = re.sub(r"[^\x00-\x7f]", r"", self.thread_name).strip()
-
-        thread_name_for_file_names = re.sub(
-            "[^0-9a-zA-Z._]", "", self.thread_name
-        ).strip()
-
-        thread_page_num = 0
-        thread_next_button = True
-        while thread_next_button:
-            url = f"http://www.point83.com/forum/{self.uri}"
+        """Visit each page in the thread and spawn Page objects to download GIFs."""
+        thread_page_num = self.resume_point()
+        if thread_page_num is None:
+            return
+        for uri, links, next_uri in self.iter_pages():
+            thread_page_num, final_thread_name, _ = self.start_page(
+                thread_page_num, next_uri is not None
+            )
+
+            # download all GIFs for this page
+            page = Page(links, final_thread_name, self.scraper, self.forum_id)
+            page.process_page()
+
+            self.scraper.add_to_totals(self.forum_id, thread_pages=1)
+            self.scraper.record_thread_page(
+                self, max(thread_page_num, 1), uri, links.last_post_id
+            )
+            self.scraper.checkpoint_thread_page(self, max(thread_page_num, 1), next_uri)
+
+    def iter_pages(self):
+        """Yield (uri, PageLinks, uri of the next page or None) from ``self.uri`` on.
+
+        A page whose pagination lists the pages after it (thread_page_uris) has
+        those fetched concurrently on the Scraper's page pool; otherwise the
+        "Next" link is followed. Stops after logging the first page that
+        cannot be fetched.
+        """
+        uri = self.uri
+        while uri is not None:
             try:
-                res = requests.get(url)
-                res.raise_for_status()
+                links = self.scraper.fetch_thread_page(uri)
             except requests.exceptions.RequestException:
-                self.scraper.write_to_log_and_or_console(
-                    f'ERROR:  URL for thread "{thread_name_for_log}'
-                    f'"\n({url}) could not be located.'
-                )
-                self.scraper.write_to_log_and_or_console("Moving to next thread.\n")
+                self.log_fetch_error(f"{self.scraper.base_url}{uri}")
                 return
-            soup = bs4.BeautifulSoup(res.text, "html.parser")
-            thread_next_btn_anchors = soup.find_all("a", href=True, string="Next")
-
-            if len(thread_next_btn_anchors) > 0 or thread_page_num > 0:
-                # (if it's a MULTI-page thread ... note, second part of the above if
-                #  statement is needed for the *last* page of the multi-page thread)
-                thread_page_num += 1
-                self.scraper.write_to_log_and_or_console(
-                    f'Searching for GIFs in "{thread_name_for_log}'
-                    f'" PAGE {str(thread_page_num)} .......'
-                )
-                final_thread_name = (
-                    thread_name_for_file_names + "_PG" + str(thread_page_num)
-                )
-                # (if it's the LAST page of multi-pg thread)
-                if len(thread_next_btn_anchors) == 0:
-                    thread_next_button = False
-            else:
-                # (if it's a SINGLE-page thread)
-                self.scraper.write_to_log_and_or_console(
-                    f'Searching for GIFs in "{thread_name_for_log}' f'" .......'
-                )
-                final_thread_name = thread_name_for_file_names
-                thread_next_button = False
+            ahead = []
+            if self.scraper.thread_page_fetchers > 1:
+                ahead = thread_page_uris(links, uri)
+            if ahead:
+                yield uri, links, ahead[0]
+                pages = self.scraper.fetch_thread_pages(ahead)
+                try:
+                    for index, (uri, links) in enumerate(pages):
+                        if links is None:
+                            self.log_fetch_error(f"{self.scraper.base_url}{uri}")
+                            return
+                        if index + 1 < len(ahead):
+                            yield uri, links, ahead[index + 1]
+                finally:
+                    pages.close()
+            # the last listed page still links on if the thread has grown since
+            next_uri = links.next_hrefs[0] if links.next_hrefs else None
+            yield uri, links, next_uri
+            uri = next_uri
 
-            # download all GIFs for this page
-            page = Page(soup, final_thread_name, self.scraper)
-            page.process_page()
+    def resume_point(self):
+        """Decide where to start this thread using the manifest's stored progress.
+
+        A thread an interrupted run stopped partway through continues from its
+        next page (``resume_from``). Unchanged threads (the forum index shows no
+        post newer than the last one seen) are skipped. Threads seen before
+        resume from their last processed page; new threads start from page 1
+        and ``self.uri`` is left as is.
+
+        Returns:
+            int or None: number of the page *before* the first one to process
+            (0 for page 1), or None when the thread should be skipped.
+        """
+        if self.resume_from is not None:
+            if self.resume_from["next_uri"] is None:
+                return None
+            self.uri = self.resume_from["next_uri"]
+            return self.resume_from["page_num"]
+        state = self.scraper.thread_state(self.thread_uri)
+        if state is None or not state["last_page_uri"]:
+            return 0
+        if (
+            self.index_last_post_id is not None
+            and state["last_post_id"] is not None
+            and self.index_last_post_id <= state["last_post_id"]
+        ):
+            self.scraper.write_to_log_and_or_console(
+                f'No new posts in "{self.name_for_log}" since the last run; skipping.\n'
+            )
+            with self.scraper.lock:
+                self.scraper.total_threads_skipped += 1
+            return None
+        self.uri = state["last_page_uri"]
+        return state["last_page_num"] - 1
+
+    @property
+    def name_for_log(self):
+        """Thread name with all non-ascii characters removed."""
+        return re.sub(r"[^\x00-\x7f]", r"", self.thread_name).strip()
+
+    @property
+    def name_for_file_names(self):
+        """Thread name reduced to characters that are safe in file names."""
+        return re.sub("[^0-9a-zA-Z._]", "", self.thread_name).strip()
+
+    def start_page(self, thread_page_num, has_next):
+        """Log the page about to be searched and work out its file-name prefix.
+
+        Parameters:
+            thread_page_num (int): number of the previously processed page (0 at start).
+            has_next (bool): whether this page carries a "Next" link.
+
+        Returns:
+            tuple: (page number, file-name prefix, whether another page follows).
+        """
+        if has_next or thread_page_num > 0:
+            # (if it's a MULTI-page thread ... note, second part of the above if
+            #  statement is needed for the *last* page of the multi-page thread)
+            thread_page_num += 1
+            self.scraper.write_to_log_and_or_console(
+                f'Searching for GIFs in "{self.name_for_log}'
+                f'" PAGE {str(thread_page_num)} .......'
+            )
+            final_thread_name = self.name_for_file_names + "_PG" + str(thread_page_num)
+            # (if it's the LAST page of multi-pg thread, has_next is False)
+            return thread_page_num, final_thread_name, has_next
 
-            self.scraper.total_thread_pgs_scraped += 1
+        # (if it's a SINGLE-page thread)
+        self.scraper.write_to_log_and_or_console(
+            f'Searching for GIFs in "{self.name_for_log}' f'" .......'
+        )
+        return thread_page_num, self.name_for_file_names, False
 
-            # if there are "Next" buttons, go to next page in thread
-            if len(thread_next_btn_anchors) > 0:
-                self.uri = thread_next_btn_anchors[0].get("href")
+    def log_fetch_error(self, url):
+        """Report a thread page that could not be fetched."""
+        self.scraper.write_to_log_and_or_console(
+            f'ERROR:  URL for thread "{self.name_for_log}'
+            f'"\n({url}) could not be located.',
+            logging.ERROR,
+        )
+        self.scraper.write_to_log_and_or_console(
+            "Moving to next thread.\n", logging.ERROR
+        )
 
 
 class Page:
-    """Processes a single thread page: finds GIF image tags and downloads unique GIFs."""
+    """Processes a single thread page: finds GIF/media URLs and downloads unique ones.
+
+    When the Scraper has more than one download worker, every candidate GIF on the
+    page is submitted to the Scraper's shared pool; the per-page cap and the dedup
+    index are reserved under ``scraper.lock`` so they hold under concurrency.
+    """
 
-    def __init__(self, soup, thread_name_for_file_names, scraper: Scraper):
-        self.soup = soup
+    def __init__(
+        self, links, thread_name_for_file_names, scraper: Scraper, forum_id=None
+    ):
+        # media URLs (scraper.media) from the PageLinks extracted by
+        # Scraper.parse; the rest of the page is not kept
+        self.gif_srcs = scraper.media.select(links)
+        self.forum_id = forum_id
         self.thread_name_for_file_names = thread_name_for_file_names
         self.gifs_downloaded = 0
-        self.failed_downloads = []
+        self.failed_downloads = set()
         self.scraper = scraper
+        # downloads that have passed the cap/dedup check but are not saved yet
+        self._in_flight = 0
+        # page positions of GIFs waiting in _reserve for an in-flight one to settle
+        self._waiting = set()
+        self._settled = threading.Condition(scraper.lock)
+        self._order = {}
+        for position, src in enumerate(self.gif_srcs):
+            self._order.setdefault(normalize_gif_url(src), position)
 
     def process_page(self):
-        """Find GIF <img> elements on the provided BeautifulSoup page and attempt downloads."""
-        gifs = self.soup.find_all("img", src=re.compile(r"\.gif$"))
+        """Find the page's GIF image URLs and attempt downloads."""
+        gifs = self.find_gifs()
 
-        for gif in gifs:
-            if str(gif).find('src="http') != -1:
+        if self.scraper.download_workers > 1 and len(gifs) > 1:
+            pool = self.scraper.download_pool()
+            futures = [pool.submit(self._download_gif, gif) for gif in gifs]
+            wait(futures)
+            # raise a download's error as the single-worker loop would
+            for future in futures:
+                future.result()
+        else:
+            for gif in gifs:
                 if not self._download_gif(gif):
                     continue
 
+        self.log_page_total()
+
+    def find_gifs(self):
+        """Return the media URLs scraper.media selected on the page, in order."""
+        return self.gif_srcs
+
+    def log_page_total(self):
+        """Write the per-page "n GIFs downloaded" line."""
         self.scraper.write_to_log_and_or_console(
             f"\t{str(self.gifs_downloaded)} GIFs downloaded\n"
         )
 
-    def _download_gif(self, gif):
-        """Download a single GIF given an <img> tag and save it via the Scraper.
+    def _download_gif(self, src):
+        """Download a single GIF given its <img> src URL and save it via the Scraper.
+
+        The dedup index and the per-page cap are checked before any request is
+        made, so already-saved GIFs and GIFs over the cap cost no bandwidth. The
+        body is streamed straight to disk by Scraper.save_file.
 
         Returns:
             bool: True if the GIF was downloaded and recorded, False otherwise.
         """
-        try:
-            img_file = gif.get("src")
-            file_rsrc = requests.get(img_file)
-            file_rsrc.raise_for_status()
-        except requests.exceptions.RequestException:
-            if gif.get("src") not in self.failed_downloads:
-                self.scraper.write_to_log_and_or_console(
-                    f"ERROR:  {gif.get('src')} had a problem downloading!"
-                )
-            self.failed_downloads.append(str(gif.get("src")))
+        img_file = normalize_gif_url(src)
+        if not self._reserve(img_file):
+            return False
+        if not self.scraper.claim_gif(img_file):
+            # another worker is downloading (or has saved) it
+            self._release(img_file, False)
             return False
 
-        img_file = img_file.replace("http://", "").replace("https://", "")
-        if img_file not in self.scraper.all_saved_gif_paths:
-            if self.gifs_downloaded > self.scraper.max_gifs_per_forum_page - 1:
-                self.scraper.write_to_log_and_or_console(
-                    f"\tMaximum ({str(self.scraper.max_gifs_per_forum_page)}) GIFs "
-                    f"already downloaded for this page; moving to next "
-                    f"page or thread..."
-                )
+        saved = False
+        self.scraper.checkpoint_gif(src, started=True)
+        try:
+            try:
+                file_rsrc = self.scraper.fetch(src, stage="gif fetch", stream=True)
+            except requests.exceptions.RequestException:
+                with self.scraper.lock:
+                    already_reported = src in self.failed_downloads
+                    self.failed_downloads.add(src)
+                if not already_reported:
+                    self.scraper.write_to_log_and_or_console(
+                        f"ERROR:  {src} had a problem downloading!", logging.ERROR
+                    )
                 return False
 
             img_file_name = img_file
-            if self.scraper.save_file(
-                self.thread_name_for_file_names, img_file_name, file_rsrc
-            ):
-                self.scraper.all_saved_gif_paths.append(img_file)
-                self.gifs_downloaded += 1
-                self.scraper.total_gifs_downloaded += 1
-                return True
+            try:
+                saved = self.scraper.save_file(
+                    self.thread_name_for_file_names,
+                    img_file_name,
+                    file_rsrc,
+                    forum_id=self.forum_id,
+                )
+            finally:
+                file_rsrc.close()
+        finally:
+            self._release(img_file, saved)
+            self.scraper.settle_gif_claim(img_file, saved)
+            self.scraper.checkpoint_gif(src, started=False)
+        return saved
+
+    def _reserve(self, img_file):
+        """Claim a slot for ``img_file`` against the dedup index and the page cap.
 
+        When the cap is only reached because of downloads still in flight, waits
+        for them to settle: a failed one frees its slot, which goes to the
+        earliest waiting GIF on the page, so the page saves the same GIFs as a
+        serial run would.
+
+        Returns:
+            bool: True if the caller may save the GIF, False if it is a duplicate
+            or the page has reached ``max_gifs_per_forum_page``.
+        """
+        position = self._order.get(img_file, 0)
+        cap = self.scraper.max_gifs_per_forum_page
+        with self._settled:
+            self._waiting.add(position)
+            try:
+                while True:
+                    if (
+                        img_file in self.scraper.all_saved_gif_paths
+                        or img_file in self.scraper.known_gif_paths
+                        or img_file in self.scraper._pending_gif_paths
+                    ):
+                        return False
+                    if self.gifs_downloaded >= cap:
+                        break
+                    if (
+                        self.gifs_downloaded + self._in_flight < cap
+                        and position == min(self._waiting, default=position)
+                    ):
+                        self.scraper._pending_gif_paths.add(img_file)
+                        self._in_flight += 1
+                        return True
+                    self._settled.wait()
+            finally:
+                self._waiting.discard(position)
+                self._settled.notify_all()
+        self.scraper.write_to_log_and_or_console(
+            f"\tMaximum ({str(self.scraper.max_gifs_per_forum_page)}) GIFs "
+            f"already downloaded for this page; moving to next "
+            f"page or thread..."
+        )
         return False
 
+    def _release(self, img_file, saved):
+        """Settle a reservation made by ``_reserve``, recording the GIF if it was saved."""
+        with self._settled:
+            self.scraper._pending_gif_paths.discard(img_file)
+            self._in_flight -= 1
+            if saved:
+                self.scraper.all_saved_gif_paths.add(img_file)
+                self.gifs_downloaded += 1
+            self._settled.notify_all()
+        if saved:
+            self.scraper.add_to_totals(self.forum_id, gifs=1)
+
+
+class AsyncEngine:
+    """Drives the Forum -> Thread -> Page traversal on an asyncio event loop.
+
+    All threads listed on a forum page are fetched concurrently, and so are all
+    GIFs on a thread page. Blocking HTTP calls run on a private thread pool sized
+    to ``scraper.max_concurrency``; a global semaphore of the same size bounds
+    how many are in flight, and Scraper.fetch applies the adaptive per-host
+    limits of ``scraper.limiter`` (the only per-host bound, so a healthy host can
+    ramp up to ``max_concurrency`` as with the synchronous engine).
+
+    Fetched thread pages are handed to Page in forum/thread/page order, so the
+    dedup index fills in the same order as with the synchronous engine and the
+    same files and summary are produced.
+    """
+
+    def __init__(self, scraper: Scraper):
+        self.scraper = scraper
+        self._executor = None
+        self._global_limit = None
+
+    def run(self, forum):
+        """Crawl ``forum`` starting at its current page response; blocks until done."""
+        asyncio.run(self.process_forum(forum))
+
+    async def process_forum(self, forum):
+        """Async counterpart of Forum.process_forum."""
+        self._global_limit = asyncio.Semaphore(self.scraper.max_concurrency)
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.scraper.max_concurrency, thread_name_prefix="async-io"
+        )
+        try:
+            page_num = 1
+            while True:
+                links = await self.parse(forum.resp.text)
+                forum.log_page_header()
+
+                threads = []
+                for thread in forum.threads_on_page(links):
+                    start = thread.resume_point()
+                    if start is not None:
+                        threads.append((thread, start))
+                    else:
+                        self.scraper.checkpoint_thread_done(thread)
+                fetched = await asyncio.gather(
+                    *(self.fetch_thread_pages(thread) for thread, _ in threads)
+                )
+                for (thread, start), (pages, failed_url) in zip(threads, fetched):
+                    await self.process_thread(thread, start, pages, failed_url)
+                    self.scraper.checkpoint_thread_done(thread)
+
+                if len(links.next_hrefs) == 0:
+                    return
+                url = f"{self.scraper.base_url}{links.next_hrefs[0]}"
+                try:
+                    forum.resp = await self.fetch(url, "forum fetch")
+                except requests.exceptions.RequestException:
+                    forum.log_page_error(url)
+                    return
+                page_num += 1
+                forum.forum_page_num += 1
+                if page_num > forum.max_forum_pgs_to_process:
+                    return
+        finally:
+            self._executor.shutdown(wait=True)
+
+    async def fetch_thread_pages(self, thread):
+        """Fetch every page of ``thread``.
+
+        The pages a page's pagination lists after it (thread_page_uris) are
+        fetched concurrently; otherwise its "Next" link is followed.
+
+        Returns:
+            tuple: (list of (page uri, PageLinks), URL that failed or None).
+        """
+        pages = []
+        uris = [thread.uri]
+        while uris:
+            fetched = await asyncio.gather(
+                *(self.fetch_thread_page(uri) for uri in uris), return_exceptions=True
+            )
+            for uri, links in zip(uris, fetched):
+                if isinstance(links, requests.exceptions.RequestException):
+                    return pages, f"{self.scraper.base_url}{uri}"
+                if isinstance(links, BaseException):
+                    raise links
+                pages.append((uri, links))
+            uri, links = pages[-1]
+            uris = []
+            if self.scraper.thread_page_fetchers > 1:
+                uris = thread_page_uris(links, uri)
+            if not uris and links.next_hrefs:
+                uris = [links.next_hrefs[0]]
+            if self.scraper.low_memory:
+                # the thread's pages wait here until all are fetched; keep
+                # only what Page and process_thread use
+                pages[-len(fetched) :] = [
+                    (uri, slim_page_links(links, self.scraper.media))
+                    for uri, links in pages[-len(fetched) :]
+                ]
+        return pages, None
+
+    async def process_thread(self, thread, thread_page_num, pages, failed_url):
+        """Download the GIFs of already-fetched thread pages, page by page.
+
+        ``thread_page_num`` is the page before the first fetched one, as returned
+        by Thread.resume_point().
+        """
+        for index, (uri, links) in enumerate(pages):
+            has_next = index < len(pages) - 1 or failed_url is not None
+            thread_page_num, final_thread_name, _ = thread.start_page(
+                thread_page_num, has_next
+            )
+            page = Page(links, final_thread_name, self.scraper, thread.forum_id)
+            await asyncio.gather(
+                *(self.download(page, src) for src in page.find_gifs())
+            )
+            page.log_page_total()
+            self.scraper.add_to_totals(thread.forum_id, thread_pages=1)
+            self.scraper.record_thread_page(
+                thread, max(thread_page_num, 1), uri, links.last_post_id
+            )
+            self.scraper.checkpoint_thread_page(
+                thread,
+                max(thread_page_num, 1),
+                pages[index + 1][0] if index + 1 < len(pages) else None,
+            )
+        if failed_url is not None:
+            thread.log_fetch_error(failed_url)
+
+    async def fetch(self, url, stage=None):
+        """GET ``url`` within the concurrency limits; raises on HTTP errors."""
+        return await self._limited(lambda: self.scraper.fetch(url, stage))
+
+    async def fetch_thread_page(self, uri):
+        """Fetch and parse the thread page ``uri``; raises on HTTP errors."""
+        res = await self.fetch(f"{self.scraper.base_url}{uri}", "thread fetch")
+        return await self.parse(res.text)
+
+    async def parse(self, html):
+        """Run Scraper.parse off the event loop."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self.scraper.parse, html)
+
+    async def download(self, page, src):
+        """Run Page._download_gif for ``src`` within the concurrency limits."""
+        return await self._limited(lambda: page._download_gif(src))
+
+    async def _limited(self, func):
+        # per-host limits are applied by scraper.limiter inside func
+        async with self._global_limit:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, func)
+
+
+CONSOLE_LEVELS = {
+    "debug": logging.DEBUG,
+    "info": logging.INFO,
+    "warning": logging.WARNING,
+    "error": logging.ERROR,
+}
+
+
+def _host_rate(value):
+    """argparse type for --rate: "HOST=RPS" -> (host, float)."""
+    host, sep, rate = value.partition("=")
+    try:
+        rate = float(rate)
+    except ValueError:
+        rate = 0.0
+    if not sep or not host or rate <= 0:
+        raise argparse.ArgumentTypeError(f"expected HOST=RPS, got {value!r}")
+    return host, rate
+
+
+def build_arg_parser():
+    """Return the argparse parser for the command-line interface."""
+    parser = argparse.ArgumentParser(
+        description="Download GIFs posted on the point83.com forums.",
+        epilog="With no --forum/--all-forums the script prompts interactively.",
+    )
+    which = parser.add_mutually_exclusive_group()
+    which.add_argument(
+        "--forum",
+        type=int,
+        action="append",
+        choices=sorted(FORUMS),
+        help="forum id to crawl (2, 4 or 10); repeat to crawl several at once",
+    )
+    which.add_argument(
+        "--all-forums", action="store_true", help="crawl every forum at once"
+    )
+    which.add_argument(
+        "--resume",
+        metavar="FOLDER",
+        help="continue the interrupted run saved in FOLDER with its settings",
+    )
+    distributed = parser.add_mutually_exclusive_group()
+    distributed.add_argument(
+        "--coordinate",
+        metavar="QUEUE",
+        help="queue the chosen forums' threads in the SQLite work queue QUEUE "
+        "for --work processes instead of downloading them",
+    )
+    distributed.add_argument(
+        "--work",
+        metavar="QUEUE",
+        help="download threads from the work queue QUEUE until it is drained "
+        "(share --output-dir between workers)",
+    )
+    parser.add_argument(
+        "--start-page", type=int, help="forum page to start on (default 1)"
+    )
+    parser.add_argument(
+        "--pages", type=int, help="forum pages to process (default all)"
+    )
+    parser.add_argument("--engine", choices=("sync", "asyncio"), default="sync")
+    parser.add_argument(
+        "--workers", type=int, default=1, help="GIF download threads per page"
+    )
+    parser.add_argument(
+        "--max-concurrency",
+        type=int,
+        default=16,
+        help="asyncio engine: requests in flight",
+    )
+    parser.add_argument(
+        "--per-host-concurrency",
+        type=int,
+        default=4,
+        help="starting requests in flight per host (adapts up to --max-concurrency)",
+    )
+    parser.add_argument(
+        "--prefetch-forum-pages",
+        type=int,
+        default=0,
+        help="forum index pages to fetch ahead (sync engine)",
+    )
+    parser.add_argument(
+        "--low-memory",
+        action="store_true",
+        help="keep the dedup index and summary lists on disk (for very long runs)",
+    )
+    parser.add_argument(
+        "--thread-page-fetchers",
+        type=int,
+        default=4,
+        help="thread pages fetched concurrently (1 = follow Next links one by one)",
+    )
+    parser.add_argument(
+        "--max-gifs-per-page", type=int, default=100, help="per-page download cap"
+    )
+    parser.add_argument(
+        "--max-gif-mb",
+        type=float,
+        default=64,
+        help="largest GIF to save, in MB (0 for no limit)",
+    )
+    parser.add_argument(
+        "--chunk-kb", type=int, default=64, help="download chunk size, in KB"
+    )
+    parser.add_argument(
+        "--output-dir",
+        help="reuse this folder across runs (default: a new timestamped folder)",
+    )
+    parser.add_argument(
+        "--manifest", help="SQLite manifest path (default: inside --output-dir)"
+    )
+    parser.add_argument(
+        "--layout",
+        choices=STORAGE_LAYOUTS,
+        default="flat",
+        help="save GIFs in one folder (flat), a folder per thread, or by hash prefix",
+    )
+    parser.add_argument(
+        "--archive",
+        metavar="PATH",
+        help="write GIFs into this .zip or .tar file instead of the output folder",
+    )
+    parser.add_argument(
+        "--validate-gifs",
+        action="store_true",
+        help="check each saved GIF and index its frames, size and duration",
+    )
+    parser.add_argument(
+        "--validate-workers",
+        metavar="N",
+        type=int,
+        help="processes checking GIFs (default: one per CPU)",
+    )
+    parser.add_argument(
+        "--fsync-every",
+        metavar="N",
+        type=int,
+        default=0,
+        help="fsync saved GIFs in batches of N, in the background (default: never)",
+    )
+    parser.add_argument("--cache-dir", help="on-disk HTTP cache folder")
+    parser.add_argument(
+        "--rate",
+        metavar="HOST=RPS",
+        action="append",
+        type=_host_rate,
+        help="requests per second allowed to HOST, e.g. www.point83.com=2 (repeatable)",
+    )
+    parser.add_argument(
+        "--checkpoint-interval",
+        type=float,
+        default=30.0,
+        help="seconds between saves of the crawl position used by --resume",
+    )
+    parser.add_argument("--parser", choices=sorted(PARSERS), default="fast")
+    parser.add_argument(
+        "--media-ext",
+        metavar="EXT",
+        action="append",
+        help="file extension to download, e.g. gif (repeatable; "
+        f"default: {', '.join(MEDIA_EXTENSIONS)})",
+    )
+    parser.add_argument(
+        "--include-host",
+        metavar="HOST",
+        action="append",
+        help="only download media from HOST or its subdomains (repeatable)",
+    )
+    parser.add_argument(
+        "--exclude-host",
+        metavar="HOST",
+        action="append",
+        help="never download media from HOST or its subdomains (repeatable)",
+    )
+    parser.add_argument(
+        "--no-media-links",
+        dest="media_links",
+        action="store_false",
+        help="only download <img> sources, not media that posts link to",
+    )
+    parser.add_argument(
+        "--metrics-json",
+        metavar="PATH",
+        help="where to write the metrics report (default: inside the output folder)",
+    )
+    parser.add_argument(
+        "--progress",
+        metavar="SECONDS",
+        type=float,
+        nargs="?",
+        const=2.0,
+        help="show a live progress line on stderr, updated every SECONDS (default 2)",
+    )
+    parser.add_argument(
+        "--duplicate-content",
+        choices=("hardlink", "skip", "keep"),
+        default="hardlink",
+        help="what to do with GIFs whose bytes were already saved",
+    )
+    parser.add_argument(
+        "--console-level",
+        choices=sorted(CONSOLE_LEVELS),
+        default="debug",
+        help="least severe log lines echoed to the console",
+    )
+    parser.add_argument("--base-url", default=FORUM_BASE_URL, help=argparse.SUPPRESS)
+    return parser
+
+
+def scraper_from_args(args):
+    """Build a Scraper from parsed command-line arguments.
+
+    Choosing forums on the command line makes the run headless: the start page
+    and page count default to 1 and all pages instead of being prompted for.
+    With ``--resume`` the crawl settings come from the checkpoint instead and
+    only the options that do not change what is crawled are applied.
+    """
+    runtime = dict(
+        download_workers=args.workers,
+        base_url=args.base_url,
+        max_concurrency=args.max_concurrency,
+        per_host_concurrency=args.per_host_concurrency,
+        cache_dir=args.cache_dir,
+        console_level=CONSOLE_LEVELS[args.console_level],
+        prefetch_forum_pages=args.prefetch_forum_pages,
+        thread_page_fetchers=args.thread_page_fetchers,
+        low_memory=args.low_memory,
+        fsync_every=args.fsync_every,
+        validate_gifs=args.validate_gifs,
+        validate_workers=args.validate_workers,
+        checkpoint_interval=args.checkpoint_interval,
+        host_rates=dict(args.rate or ()),
+        max_gif_bytes=int(args.max_gif_mb * 1024 * 1024) or None,
+        chunk_size=args.chunk_kb * 1024,
+        metrics_path=args.metrics_json,
+        progress_interval=args.progress,
+    )
+    if args.resume:
+        return Scraper.from_checkpoint(args.resume, **runtime)
+    forums = sorted(FORUMS) if args.all_forums else args.forum
+    return Scraper(
+        max_gifs_per_forum_page=args.max_gifs_per_page,
+        output_dir=args.output_dir,
+        manifest_path=args.manifest,
+        duplicate_content=args.duplicate_content,
+        parser=args.parser,
+        forums=forums,
+        start_page=args.start_page,
+        total_pages=args.pages,
+        engine=args.engine,
+        layout=args.layout,
+        archive_path=args.archive,
+        media_extensions=args.media_ext or MEDIA_EXTENSIONS,
+        include_hosts=args.include_host,
+        exclude_hosts=args.exclude_host,
+        media_links=args.media_links,
+        **runtime,
+    )
+
+
+def main(argv=None):
+    """Command-line entry point; returns the process exit status."""
+    arg_parser = build_arg_parser()
+    args = arg_parser.parse_args(argv)
+    if args.coordinate and not (args.forum or args.all_forums):
+        arg_parser.error("--coordinate needs --forum or --all-forums")
+    try:
+        scraper = scraper_from_args(args)
+    except (OSError, ValueError, KeyError) as e:
+        if not args.resume:
+            raise
+        print(f'ERROR:  no checkpoint to resume in "{args.resume}" ({e}).')
+        return 1
+    if args.coordinate:
+        scraper.run_coordinator(args.coordinate)
+    elif args.work:
+        scraper.run_worker(args.work)
+    else:
+        scraper.run()
+    return 0
+
 
 if __name__ == "__main__":
-    scraper = Scraper()
-    scraper.run()
+    sys.exit(main())
@@ -4,7 +4,22 @@ These tests exercise user-prompt logic, file I/O helpers, initial setup behavior
 and the Forum/Thread/Page download flow. Network and user input are mocked so
 tests run deterministically and without real I/O.
 """
+import asyncio
+import hashlib
+import http.server
+import json
+import logging
 import os
+import struct
+import subprocess
+import sys
+import tarfile
+import threading
+import time
+import zipfile
+
+import pytest
+
 import point_83_gifs as mod
 
 
@@ -14,9 +29,16 @@ class _FakePageResponse:
     Used to simulate HTML page responses in tests without real network calls.
     """
 
+    status_code = 200
+    headers = {}
+
     def __init__(self, text=""):
         self.text = text
 
+    @property
+    def content(self):
+        return self.text.encode()
+
     def raise_for_status(self):
         return None
 
@@ -27,6 +49,9 @@ class _FakeGifResponse:
     Used to simulate streaming GIF responses for save_file tests.
     """
 
+    status_code = 200
+    headers = {}
+
     def __init__(self, chunks):
         self._chunks = list(chunks)
 
@@ -37,6 +62,9 @@ class _FakeGifResponse:
         for c in self._chunks:
             yield c
 
+    def close(self):
+        return None
+
 
 def test_prompt_user_for_which_forum(monkeypatch):
     inputs = iter(["x", "1"])
@@ -75,8 +103,8 @@ def test_write_to_log_and_or_console_and_write_summary(tmp_path):
     os.makedirs(s.folder_and_log_name, exist_ok=True)
 
     s.write_to_log_and_or_console("hello world")
-    log_file = os.path.join(s.folder_and_log_name, s.folder_and_log_name + ".txt")
-    # log file path uses folder name + ".txt" per implementation
+    log_file = os.path.join(s.folder_and_log_name, "out.txt")
+    # the log is named after the folder and kept inside it
     assert os.path.exists(log_file)
     with open(log_file, "r", encoding="utf-8") as fh:
         contents = fh.read()
@@ -129,7 +157,7 @@ def test_initial_setup_creates_folder_and_returns_response(monkeypatch, tmp_path
     def fake_get(url, *args, **kwargs):
         return _FakePageResponse("<html></html>")
 
-    monkeypatch.setattr(mod.requests, "get", fake_get)
+    monkeypatch.setattr(s.session, "get", fake_get)
     res, max_pages = s.initial_setup()
     assert isinstance(res, _FakePageResponse)
     assert max_pages == 2
@@ -159,7 +187,7 @@ def test_forum_process_creates_thread_objects(monkeypatch, tmp_path):
             recorded.append("processed")
 
     monkeypatch.setattr(mod, "Thread", DummyThread)
-    # ensure requests.get won't be called by process_forum (forum uses resp passed in)
+    # ensure the session won't be called by process_forum (forum uses resp passed in)
     forum = mod.Forum(resp, max_forum_pgs_to_process=1, scraper=s)
     forum.process_forum()
     assert any("processed" == item for item in recorded)
@@ -184,7 +212,7 @@ def test_thread_and_page_download_flow(monkeypatch, tmp_path):
         else:
             return _FakePageResponse(page_html)
 
-    monkeypatch.setattr(mod.requests, "get", fake_get)
+    monkeypatch.setattr(s.session, "get", fake_get)
 
     # uri expected by Thread.process_thread (it will prefix with the forum path)
     uri = "viewtopic.php?t=1&start=0"
@@ -194,3 +222,1254 @@ def test_thread_and_page_download_flow(monkeypatch, tmp_path):
     # after processing, scraper should have recorded a saved file and count increment
     assert s.total_gifs_downloaded >= 1
     assert any(name.endswith(".gif") for name in os.listdir(s.folder_and_log_name))
+
+
+def test_page_concurrent_downloads_respect_cap_and_dedup(monkeypatch, tmp_path):
+    s = mod.Scraper(max_gifs_per_forum_page=3, download_workers=4)
+    s.folder_and_log_name = str(tmp_path / "pool_out")
+    os.makedirs(s.folder_and_log_name, exist_ok=True)
+
+    # six distinct GIFs plus a repeat of the first one
+    srcs = [f"http://cdn.example.com/{i}.gif" for i in range(6)]
+    srcs.append(srcs[0])
+    page_html = "".join(f'<img src="{src}">' for src in srcs)
+
+    monkeypatch.setattr(
+        s.session, "get", lambda url, *a, **kw: _FakeGifResponse([b"GIF"])
+    )
+    page = mod.Page(s.parse(page_html), "T", s)
+    page.process_page()
+    s.shutdown()
+
+    assert page.gifs_downloaded == 3
+    assert s.total_gifs_downloaded == 3
+    assert len(s.all_saved_gif_paths) == len(set(s.all_saved_gif_paths)) == 3
+
+
+@pytest.mark.parametrize("workers", [1, 4])
+def test_failed_downloads_free_their_page_cap_slot(monkeypatch, tmp_path, workers):
+    s = mod.Scraper(max_gifs_per_forum_page=2, download_workers=workers)
+    s.folder_and_log_name = str(tmp_path / "cap_out")
+    os.makedirs(s.folder_and_log_name, exist_ok=True)
+    srcs = [f"http://cdn.example.com/{name}.gif" for name in ("bad", "a", "b", "c")]
+
+    def fake_get(url, *args, **kwargs):
+        if "bad" in url:
+            # slow enough that the other GIFs reach the cap check meanwhile
+            time.sleep(0.2)
+            raise mod.requests.exceptions.ConnectionError("reset")
+        return _FakeGifResponse([b"GIF"])
+
+    monkeypatch.setattr(s.session, "get", fake_get)
+    page = mod.Page(s.parse("".join(f'<img src="{src}">' for src in srcs)), "T", s)
+    page.process_page()
+    s.shutdown()
+
+    # the same GIFs as a serial run: the failed one's slot goes to the next GIF
+    assert sorted(s.all_saved_gif_paths) == [
+        "cdn.example.com/a.gif",
+        "cdn.example.com/b.gif",
+    ]
+
+
+@pytest.mark.parametrize("workers", [1, 4])
+def test_page_download_errors_propagate_with_any_worker_count(
+    monkeypatch, tmp_path, workers
+):
+    s = mod.Scraper(download_workers=workers)
+    s.folder_and_log_name = str(tmp_path / "err_out")
+    os.makedirs(s.folder_and_log_name, exist_ok=True)
+    page_html = '<img src="http://cdn.example.com/a.gif">' + (
+        '<img src="http://cdn.example.com/b.gif">'
+    )
+    monkeypatch.setattr(
+        s.session, "get", lambda url, *a, **kw: _FakeGifResponse([b"GIF"])
+    )
+
+    def broken_save_file(*args, **kwargs):
+        raise RuntimeError("bug in save_file")
+
+    monkeypatch.setattr(s, "save_file", broken_save_file)
+    page = mod.Page(s.parse(page_html), "T", s)
+    try:
+        with pytest.raises(RuntimeError, match="bug in save_file"):
+            page.process_page()
+    finally:
+        s.shutdown()
+
+
+class _LocalForumHandler(http.server.BaseHTTPRequestHandler):
+    """Serves a tiny two-page forum with multi-page threads and shared GIFs."""
+
+    pages = {}
+    # path -> number of 503 responses still to send before serving the page
+    failures = {}
+    requested = []
+
+    def do_GET(self):
+        self.requested.append(self.path)
+        if self.failures.get(self.path, 0) > 0:
+            self.failures[self.path] -= 1
+            self.send_error(503)
+            return
+        body = self.pages.get(self.path)
+        if body is None:
+            self.send_error(404)
+            return
+        etag = '"%s"' % hashlib.md5(body).hexdigest()
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def local_forum():
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), _LocalForumHandler)
+    root = f"http://127.0.0.1:{server.server_port}"
+    base = root + "/forum/"
+
+    def thread_page(t, start, gifs, has_next, post_id):
+        imgs = "".join(f'<img src="{root}/img/{g}.gif">' for g in gifs)
+        post = f'<a href="viewtopic.php?p={post_id}#{post_id}">#</a>'
+        nxt = (
+            f'<a href="viewtopic.php?t={t}&amp;start={start + 15}">Next</a>'
+            if has_next
+            else ""
+        )
+        return f"<html><body>{post}{imgs}{nxt}</body></html>"
+
+    def topic(t, name, last_post_id):
+        return (
+            f'<tr><td><span class="blacklink"><a href="viewtopic.php?t={t}&amp;sid=x">'
+            f"{name}</a></span></td><td>"
+            f'<a href="viewtopic.php?p={last_post_id}#{last_post_id}">&gt;</a>'
+            f"</td></tr>"
+        )
+
+    pages = {
+        "/forum/viewforum.php?f=2": "<table>"
+        + topic(1, "Alpha", 102)
+        + topic(2, "Beta", 201)
+        + "</table>"
+        + '<a href="viewforum.php?f=2&amp;start=30">Next</a>',
+        "/forum/viewforum.php?f=2&start=30": "<table>"
+        + topic(3, "Gamma", 301)
+        + "</table>",
+        "/forum/viewtopic.php?t=1": thread_page(1, 0, ["a", "b", "shared"], True, 101),
+        "/forum/viewtopic.php?t=1&start=15": thread_page(1, 15, ["c", "a"], False, 102),
+        "/forum/viewtopic.php?t=2": thread_page(2, 0, ["shared", "d", "e"], False, 201),
+        "/forum/viewtopic.php?t=3": thread_page(3, 0, ["f", "missing"], False, 301),
+        "/forum/viewforum.php?f=4": "<table>" + topic(4, "Delta", 401) + "</table>",
+        "/forum/viewtopic.php?t=4": thread_page(4, 0, ["shared", "h"], False, 401),
+    }
+    # the same page as reached through a computed start= offset
+    pages["/forum/viewforum.php?f=2&topicdays=0&start=30"] = pages[
+        "/forum/viewforum.php?f=2&start=30"
+    ]
+    # new posts for tests that simulate activity between runs
+    pages["t1_new_post"] = {
+        "/forum/viewforum.php?f=2": pages["/forum/viewforum.php?f=2"].replace(
+            "p=102#102", "p=103#103"
+        ),
+        "/forum/viewtopic.php?t=1&start=15": thread_page(1, 15, ["c", "a"], True, 102),
+        "/forum/viewtopic.php?t=1&start=30": thread_page(1, 30, ["g"], False, 103),
+        "/img/g.gif": b"GIF89ag",
+    }
+    for name in "abcdefh":
+        pages[f"/img/{name}.gif"] = b"GIF89a" + name.encode()
+    pages["/img/shared.gif"] = b"GIF89ashared"
+    _LocalForumHandler.pages = {
+        k: v.encode() if isinstance(v, str) else v for k, v in pages.items()
+    }
+    _LocalForumHandler.failures = {}
+    _LocalForumHandler.requested = []
+
+    worker = threading.Thread(target=server.serve_forever, daemon=True)
+    worker.start()
+    yield base
+    server.shutdown()
+    server.server_close()
+
+
+def _run_against_local_forum(
+    monkeypatch, out_dir, base, scraper_kwargs=None, **run_kwargs
+):
+    kwargs = dict(base_url=base, max_concurrency=8, per_host_concurrency=3)
+    kwargs.update(scraper_kwargs or {})
+    s = mod.Scraper(**kwargs)
+    if "output_dir" not in kwargs:
+        s.folder_and_log_name = str(out_dir)
+    monkeypatch.setattr(
+        s, "prompt_user_for_which_forum", lambda: base + "viewforum.php?f=2"
+    )
+    monkeypatch.setattr(s, "prompt_user_for_start_page", lambda: 1)
+    monkeypatch.setattr(s, "prompt_user_for_total_pages", lambda: 5)
+    s.run(**run_kwargs)
+    files = sorted(n for n in os.listdir(out_dir) if n.endswith(".gif"))
+    return s, files
+
+
+def test_asyncio_engine_matches_sync_engine(monkeypatch, tmp_path, local_forum):
+    sync, sync_files = _run_against_local_forum(
+        monkeypatch, tmp_path / "sync", local_forum
+    )
+    aio, aio_files = _run_against_local_forum(
+        monkeypatch, tmp_path / "aio", local_forum, engine="asyncio"
+    )
+
+    assert sync_files == aio_files
+    assert len(sync_files) == 7
+    assert sorted(sync.all_saved_gif_paths) == sorted(aio.all_saved_gif_paths)
+    assert aio.total_gifs_downloaded == sync.total_gifs_downloaded == 7
+    assert aio.total_thread_pgs_scraped == sync.total_thread_pgs_scraped == 4
+
+
+@pytest.mark.parametrize("engine", ["sync", "asyncio"])
+def test_long_thread_pages_are_fetched_from_pagination(
+    monkeypatch, tmp_path, local_forum, engine
+):
+    root = local_forum[: -len("forum/")]
+
+    def long_page(n):
+        # phpBB pagination only: no "Next" link, so serial chasing would stop
+        goto = ", ".join(
+            f'<a href="viewtopic.php?t=9&amp;postdays=0&amp;start={(k - 1) * 15}">{k}</a>'
+            for k in range(2, 7)
+            if k != n
+        )
+        return f'<img src="{root}/img/long{n}.gif">Goto page {goto}'
+
+    pages = {
+        "/forum/viewforum.php?f=2": (
+            '<span class="blacklink"><a href="viewtopic.php?t=9">Long</a></span>'
+        )
+    }
+    pages["/forum/viewtopic.php?t=9"] = long_page(1)
+    for n in range(1, 7):
+        if n > 1:
+            pages[f"/forum/viewtopic.php?t=9&postdays=0&start={(n - 1) * 15}"] = (
+                long_page(n)
+            )
+        pages[f"/img/long{n}.gif"] = b"GIF89a" + str(n).encode()
+    for path, body in pages.items():
+        _LocalForumHandler.pages[path] = (
+            body.encode() if isinstance(body, str) else body
+        )
+
+    s, files = _run_against_local_forum(
+        monkeypatch, tmp_path / "long", local_forum, engine=engine
+    )
+
+    assert [name.split("__")[0] for name in files] == [
+        f"Long_PG{n}" for n in range(1, 7)
+    ]
+    assert s.total_thread_pgs_scraped == 6
+    assert all(f"long{n}.gif" in name for n, name in enumerate(files, 1))
+
+    # a resumed page only needs the pages after it; offsets that do not line
+    # up leave the crawler to follow "Next" links
+    links = s.parse(long_page(4))
+    assert mod.thread_page_uris(links, "viewtopic.php?t=9&postdays=0&start=45") == [
+        "viewtopic.php?t=9&postdays=0&start=60",
+        "viewtopic.php?t=9&postdays=0&start=75",
+    ]
+    assert mod.thread_page_uris(links, "viewtopic.php?t=8") == []
+    odd = s.parse(long_page(1).replace("start=30", "start=31"))
+    assert mod.thread_page_uris(odd, "viewtopic.php?t=9") == []
+
+
+@pytest.mark.parametrize("engine", ["sync", "asyncio"])
+def test_low_memory_run_matches_default_run(monkeypatch, tmp_path, local_forum, engine):
+    plain, plain_files = _run_against_local_forum(
+        monkeypatch, tmp_path / "plain", local_forum, engine=engine
+    )
+    lean, lean_files = _run_against_local_forum(
+        monkeypatch,
+        tmp_path / "lean",
+        local_forum,
+        scraper_kwargs={"low_memory": True},
+        engine=engine,
+    )
+
+    assert lean_files == plain_files
+    assert isinstance(lean.all_saved_gif_paths, mod.SpilledSet)
+    assert isinstance(lean.saved_hashes, mod.SpilledDict)
+    assert len(lean.saved_hashes) == len(plain.saved_hashes)
+    assert list(lean.all_saved_gif_paths) == sorted(plain.all_saved_gif_paths)
+    assert list(lean.all_file_names_saved) == sorted(plain.all_file_names_saved)
+    assert lean.metrics_report()["peak_rss_bytes"] > 0
+
+
+def test_spilled_set_merges_sorted_runs_from_disk():
+    spilled = mod.SpilledSet(run_size=3)
+    values = ["pear", "apple", "fig", "kiwi", "apple", "date", "plum", 'a"b\nc']
+    for value in values:
+        spilled.add(value)
+
+    assert len(spilled._runs) == 2 and len(spilled._buffer) == 1
+    assert len(spilled) == 7
+    assert "fig" in spilled and "lime" not in spilled
+    assert list(spilled) == sorted(set(values))
+
+
+def test_spilled_dict_keeps_the_first_value_on_disk():
+    spilled = mod.SpilledDict()
+    assert spilled.setdefault("abc", "first.gif") == "first.gif"
+    assert spilled.setdefault("abc", "second.gif") == "first.gif"
+    assert spilled.setdefault("def", "other.gif") == "other.gif"
+
+    assert len(spilled) == 2
+    assert "abc" in spilled and "xyz" not in spilled
+    assert spilled["def"] == "other.gif"
+    with pytest.raises(KeyError):
+        spilled["xyz"]
+
+
+def test_fetch_retries_transient_server_errors(local_forum):
+    _LocalForumHandler.failures["/forum/viewtopic.php?t=2"] = 2
+    s = mod.Scraper(retries=3, backoff_factor=0)
+    res = s.fetch(local_forum + "viewtopic.php?t=2")
+    assert "d.gif" in res.text
+
+    _LocalForumHandler.failures["/forum/viewtopic.php?t=2"] = 5
+    with pytest.raises(mod.requests.exceptions.RequestException):
+        s.fetch(local_forum + "viewtopic.php?t=2")
+    s.shutdown()
+
+
+def test_dedup_index_treats_http_and_https_as_one_gif(monkeypatch, tmp_path):
+    s = mod.Scraper()
+    s.folder_and_log_name = str(tmp_path / "dedup_out")
+    os.makedirs(s.folder_and_log_name, exist_ok=True)
+    monkeypatch.setattr(
+        s.session, "get", lambda url, *a, **kw: _FakeGifResponse([b"GIF"])
+    )
+    page_html = (
+        '<img src="http://cdn.example.com/x.gif">'
+        '<img src="https://cdn.example.com/x.gif">'
+    )
+    page = mod.Page(s.parse(page_html), "T", s)
+    page.process_page()
+
+    assert s.all_saved_gif_paths == {"cdn.example.com/x.gif"}
+    assert s.total_gifs_downloaded == 1
+
+
+def test_known_and_over_cap_gifs_are_not_fetched(monkeypatch, tmp_path):
+    s = mod.Scraper(max_gifs_per_forum_page=2)
+    s.folder_and_log_name = str(tmp_path / "skip_out")
+    os.makedirs(s.folder_and_log_name, exist_ok=True)
+    s.all_saved_gif_paths.add("cdn.example.com/seen.gif")
+
+    fetched = []
+
+    def fake_get(url, *args, **kwargs):
+        fetched.append(url)
+        return _FakeGifResponse([b"GIF"])
+
+    monkeypatch.setattr(s.session, "get", fake_get)
+    page_html = "".join(
+        f'<img src="http://cdn.example.com/{name}.gif">'
+        for name in ("seen", "one", "two", "three")
+    )
+    page = mod.Page(s.parse(page_html), "T", s)
+    page.process_page()
+
+    assert fetched == [
+        "http://cdn.example.com/one.gif",
+        "http://cdn.example.com/two.gif",
+    ]
+
+
+@pytest.mark.parametrize("low_memory", [False, True])
+def test_manifest_makes_second_run_incremental(
+    monkeypatch, tmp_path, local_forum, low_memory
+):
+    shared = {"output_dir": str(tmp_path / "shared"), "low_memory": low_memory}
+    first, first_files = _run_against_local_forum(
+        monkeypatch, tmp_path / "shared", local_forum, scraper_kwargs=shared
+    )
+    assert first.total_gifs_downloaded == 7
+
+    second, second_files = _run_against_local_forum(
+        monkeypatch, tmp_path / "shared", local_forum, scraper_kwargs=shared
+    )
+    assert second.total_gifs_downloaded == 0
+    assert second_files == first_files
+    # earlier runs' paths and hashes are loaded into the low-memory structures
+    index_types = (mod.SpilledSet, mod.SpilledDict) if low_memory else (set, dict)
+    assert isinstance(second.known_gif_paths, index_types[0])
+    assert isinstance(second.saved_hashes, index_types[1])
+    assert len(second.saved_hashes) == len(first.saved_hashes)
+
+    manifest = mod.Manifest(
+        os.path.join(shared["output_dir"], "point83_manifest.sqlite3")
+    )
+    assert len(manifest.known_paths()) == 7
+    state = manifest.thread_state("viewtopic.php?t=1")
+    assert state["last_page_num"] == 2
+    assert state["last_page_uri"] == "viewtopic.php?t=1&start=15"
+    manifest.close()
+
+
+def test_unchanged_threads_are_skipped_and_changed_ones_resume(
+    monkeypatch, tmp_path, local_forum
+):
+    shared = {"output_dir": str(tmp_path / "shared")}
+    _run_against_local_forum(
+        monkeypatch, tmp_path / "shared", local_forum, scraper_kwargs=shared
+    )
+
+    # a new post lands on a new third page of thread 1; threads 2 and 3 are untouched
+    for path, body in _LocalForumHandler.pages.pop("t1_new_post").items():
+        _LocalForumHandler.pages[path] = (
+            body.encode() if isinstance(body, str) else body
+        )
+    _LocalForumHandler.requested = []
+
+    second, files = _run_against_local_forum(
+        monkeypatch, tmp_path / "shared", local_forum, scraper_kwargs=shared
+    )
+
+    thread_fetches = [p for p in _LocalForumHandler.requested if "viewtopic" in p]
+    assert thread_fetches == [
+        "/forum/viewtopic.php?t=1&start=15",
+        "/forum/viewtopic.php?t=1&start=30",
+    ]
+    assert second.total_threads_skipped == 2
+    assert second.total_gifs_downloaded == 1
+    assert any(name.startswith("Alpha_PG3__") for name in files)
+
+
+def test_http_cache_serves_304_from_disk_and_evicts_lru(tmp_path, local_forum):
+    s = mod.Scraper(cache_dir=str(tmp_path / "cache"), cache_max_bytes=10_000)
+    first = s.fetch(local_forum + "viewtopic.php?t=2")
+    assert not getattr(first, "from_cache", False)
+
+    _LocalForumHandler.requested = []
+    again = s.fetch(local_forum + "viewtopic.php?t=2")
+    assert again.from_cache
+    assert again.text == first.text
+    assert _LocalForumHandler.requested == ["/forum/viewtopic.php?t=2"]
+
+    # a tiny budget keeps only the most recently used entry
+    s.cache.max_bytes = len(first.content) + 1
+    s.fetch(local_forum + "viewtopic.php?t=3")
+    assert s.cache.conditional_headers(local_forum + "viewtopic.php?t=2") == {}
+    assert s.cache.conditional_headers(local_forum + "viewtopic.php?t=3")
+    s.shutdown()
+
+
+def test_http_cache_skips_gif_bodies_answered_with_304(
+    monkeypatch, tmp_path, local_forum
+):
+    cache = {"cache_dir": str(tmp_path / "cache")}
+    first, first_files = _run_against_local_forum(
+        monkeypatch, tmp_path / "first", local_forum, scraper_kwargs=cache
+    )
+    second, second_files = _run_against_local_forum(
+        monkeypatch, tmp_path / "second", local_forum, scraper_kwargs=cache
+    )
+
+    assert second_files == first_files and len(first_files) == 7
+    for name in first_files:
+        with open(tmp_path / "first" / name, "rb") as a:
+            with open(tmp_path / "second" / name, "rb") as b:
+                assert a.read() == b.read()
+    # every GIF was revalidated and replayed from the cache
+    assert first.metrics_report()["bytes"]["gifs"] > 0
+    assert second.metrics_report()["bytes"]["gifs"] == 0
+
+    # a body read only partly is not cached
+    s = mod.Scraper(cache_dir=str(tmp_path / "partial"))
+    url = local_forum[: -len("forum/")] + "img/a.gif"
+    res = s.fetch(url, stream=True)
+    next(res.iter_content(1))
+    res.close()
+    assert s.cache.conditional_headers(url) == {}
+    assert not [n for n in os.listdir(tmp_path / "partial") if n.endswith(".tmp")]
+    s.shutdown()
+
+
+@pytest.mark.parametrize("mode", ["hardlink", "skip"])
+def test_identical_bytes_from_different_urls_are_stored_once(tmp_path, mode):
+    s = mod.Scraper(duplicate_content=mode)
+    s.folder_and_log_name = str(tmp_path / "hash_out")
+    os.makedirs(s.folder_and_log_name, exist_ok=True)
+
+    assert s.save_file("T", "i.imgur.com/a.gif", _FakeGifResponse([b"GIF89a", b"x"]))
+    assert s.save_file("T", "giphy.com/b.gif", _FakeGifResponse([b"GIF89ax"]))
+
+    first = os.path.join(s.folder_and_log_name, "T__i.imgur.com-a.gif")
+    second = os.path.join(s.folder_and_log_name, "T__giphy.com-b.gif")
+    assert s.total_duplicate_contents == 1
+    if mode == "hardlink":
+        assert os.path.samefile(first, second)
+        assert len(s.all_file_names_saved) == 2
+    else:
+        assert not os.path.exists(second)
+        assert s.all_file_names_saved == {"T__i.imgur.com-a.gif"}
+
+
+@pytest.mark.parametrize("layout", ["thread", "hash"])
+def test_sharded_layouts_store_the_same_files(
+    monkeypatch, tmp_path, local_forum, layout
+):
+    _, flat_files = _run_against_local_forum(
+        monkeypatch, tmp_path / "flat", local_forum
+    )
+    out_dir = tmp_path / layout
+    s, top_level = _run_against_local_forum(
+        monkeypatch,
+        out_dir,
+        local_forum,
+        scraper_kwargs={"layout": layout, "fsync_every": 2},
+    )
+
+    stored = {}
+    for folder, _, names in os.walk(out_dir):
+        for name in names:
+            path = os.path.join(folder, name)
+            stored[os.path.relpath(path, out_dir).replace(os.sep, "/")] = path
+    assert not top_level
+    assert not any(name.endswith(".part") for name in stored)
+    gifs = {name: path for name, path in stored.items() if name.endswith(".gif")}
+    assert sorted(name.rsplit("/", 1)[1] for name in gifs) == flat_files
+    assert sorted(gifs) == sorted(s.all_file_names_saved)
+    for name, path in gifs.items():
+        with open(path, "rb") as fh:
+            sha256 = hashlib.sha256(fh.read()).hexdigest()
+        if layout == "hash":
+            assert name.startswith(f"{sha256[:2]}/{sha256[2:4]}/")
+        else:
+            assert (
+                name.split("/")[0] == name.split("/")[1].split("_PG")[0].split("__")[0]
+            )
+
+
+@pytest.mark.parametrize("archive", ["gifs.zip", "gifs.tar"])
+def test_archive_storage_receives_every_gif(
+    monkeypatch, tmp_path, local_forum, archive
+):
+    _, flat_files = _run_against_local_forum(
+        monkeypatch, tmp_path / "flat", local_forum
+    )
+    archive_path = str(tmp_path / archive)
+    _, folder_files = _run_against_local_forum(
+        monkeypatch,
+        tmp_path / "out",
+        local_forum,
+        scraper_kwargs={"archive_path": archive_path},
+    )
+
+    assert folder_files == []
+    assert not any(n.endswith(".part") for n in os.listdir(tmp_path))
+    if archive.endswith(".zip"):
+        with zipfile.ZipFile(archive_path) as zf:
+            names = zf.namelist()
+            body = zf.read(flat_files[0])
+    else:
+        with tarfile.open(archive_path) as tf:
+            names = tf.getnames()
+            body = tf.extractfile(flat_files[0]).read()
+    assert sorted(names) == flat_files
+    with open(tmp_path / "flat" / flat_files[0], "rb") as fh:
+        assert body == fh.read()
+
+    # archives cannot link, so a duplicate's bytes are stored again
+    s = mod.Scraper(archive_path=str(tmp_path / "dup.zip"))
+    s.folder_and_log_name = str(tmp_path / "dup")
+    os.makedirs(s.folder_and_log_name)
+    assert s.save_file("T", "i.imgur.com/a.gif", _FakeGifResponse([b"GIF89a"]))
+    assert s.save_file("T", "giphy.com/b.gif", _FakeGifResponse([b"GIF89a"]))
+    s.shutdown()
+    assert s.total_duplicate_contents == 1
+    with zipfile.ZipFile(tmp_path / "dup.zip") as zf:
+        assert [zf.read(name) for name in sorted(zf.namelist())] == [b"GIF89a"] * 2
+
+
+def _gif_bytes(frames=2, delay_cs=5, loops=0):
+    """Return a tiny animated GIF89a: 2x1 pixels, global color table, NETSCAPE loop."""
+    data = b"GIF89a" + struct.pack("<HHBBB", 2, 1, 0x80, 0, 0) + b"\0\0\0\xff\xff\xff"
+    data += b"\x21\xff\x0bNETSCAPE2.0\x03\x01" + struct.pack("<H", loops) + b"\0"
+    for _ in range(frames):
+        data += b"\x21\xf9\x04\x00" + struct.pack("<H", delay_cs) + b"\x00\x00"
+        data += b"\x2c" + struct.pack("<HHHHB", 0, 0, 2, 1, 0)
+        data += b"\x02\x02\x44\x01\x00"
+    return data + b"\x3b"
+
+
+def test_gif_metadata_reads_frames_and_catches_bad_files(tmp_path):
+    def metadata(body):
+        path = tmp_path / "x.gif"
+        path.write_bytes(body)
+        return mod.gif_metadata(str(path))
+
+    good = metadata(_gif_bytes(frames=3, delay_cs=7, loops=0))
+    assert good["valid"] and good["error"] is None
+    assert (good["version"], good["width"], good["height"]) == ("89a", 2, 1)
+    assert (good["frames"], good["duration_ms"], good["loops"]) == (3, 210, 0)
+
+    truncated = metadata(_gif_bytes(frames=3)[:-12])
+    assert not truncated["valid"] and truncated["error"].startswith("truncated")
+    assert truncated["frames"] == 2
+
+    html = metadata(b"<html><body>404</body></html>")
+    assert not html["valid"] and "header" in html["error"]
+    assert not metadata(b"GIF89a" + b"\0" * 7 + b"\x99")["valid"]
+
+
+@pytest.mark.parametrize("archive", [None, "gifs.zip"])
+def test_saved_gifs_are_checked_and_indexed(tmp_path, archive):
+    s = mod.Scraper(
+        validate_gifs=True,
+        validate_workers=1,
+        archive_path=archive and str(tmp_path / archive),
+        console_level=logging.ERROR,
+    )
+    s.folder_and_log_name = str(tmp_path / "out")
+    os.makedirs(s.folder_and_log_name)
+
+    assert s.save_file("T", "h/good.gif", _FakeGifResponse([_gif_bytes()]))
+    assert s.save_file("T", "h/cut.gif", _FakeGifResponse([_gif_bytes()[:-20]]))
+    s.shutdown()
+
+    with open(os.path.join(s.folder_and_log_name, "point83_gif_index.jsonl")) as fh:
+        index = {entry["file"]: entry for entry in map(json.loads, fh)}
+    assert sorted(index) == ["T__h-cut.gif", "T__h-good.gif"]
+    good, cut = index["T__h-good.gif"], index["T__h-cut.gif"]
+    assert good["valid"] and good["frames"] == 2 and good["path"] == "h/good.gif"
+    assert good["sha256"] == hashlib.sha256(_gif_bytes()).hexdigest()
+    assert not cut["valid"]
+    assert (s.total_gifs_checked, s.total_invalid_gifs) == (2, 1)
+    assert s.metrics_report()["errors"] == {"invalid GIF": 1}
+    # the private copies checked for archived GIFs are gone
+    assert not [n for n in os.listdir(tmp_path) if n.startswith(".point83-")]
+
+
+def test_fast_parser_matches_bs4_parser():
+    html = (
+        "<html><body><table>"
+        '<tr><td><span class="blacklink"><a href="viewtopic.php?t=7&amp;sid=1">'
+        "Bike <b>Polo</b> &amp; Beer</a></span></td>"
+        '<td><span class="postdetails">12</span>'
+        '<a href="viewtopic.php?p=900#900"><img src="icon_latest_reply.gif"></a></td></tr>'
+        '<tr><td><span class="blacklink"><a href="viewtopic.php?t=8">No row id</a>'
+        "</span></td></tr>"
+        "</table>"
+        '<span class="blacklink">not a thread</span>'
+        '<img src="http://i.imgur.com/a.gif"><img src="/relative.gif">'
+        '<a href="viewtopic.php?p=950#950">#</a>'
+        '<a href="viewforum.php?f=2&amp;start=30">Next</a>'
+        '<a href="viewforum.php?f=2&amp;start=60">Next <b>page</b></a>'
+        "</body></html>"
+    )
+    fast = mod.parse_links_fast(html)
+    reference = mod.parse_links_bs4(html)
+
+    assert fast == reference
+    assert fast.threads == [
+        ("viewtopic.php?t=7", "Bike Polo & Beer", 900),
+        ("viewtopic.php?t=8", "No row id", None),
+    ]
+    assert fast.next_hrefs == ["viewforum.php?f=2&start=30"]
+    assert fast.last_post_id == 950
+
+
+def test_media_filter_selects_urls_in_one_pass(tmp_path):
+    html = (
+        '<img src="http://i.imgur.com/a.gif"><img src="https://i.imgur.com/b.gifv">'
+        '<img src="http://media.giphy.com/c.GIF?cid=1#top">'
+        '<img src="http://cdn.example.com:8080/d.webp"><img src="/relative.gif">'
+        '<img src="http://cdn.example.com/e.png"><img src="http://notimgur.com/f.gif">'
+        '<a href="http://cdn.example.com/g.gif">clip</a>'
+        '<a href="http://i.imgur.com/a.gif">same clip</a>'
+        '<a href="http://cdn.example.com/h.gif.html">page</a>'
+    )
+    links = mod.parse_links_fast(html)
+
+    assert mod.MediaFilter().select(links) == [
+        "http://i.imgur.com/a.gif",
+        "https://i.imgur.com/b.gif",
+        "http://media.giphy.com/c.GIF?cid=1",
+        "http://cdn.example.com:8080/d.webp",
+        "http://notimgur.com/f.gif",
+        "http://cdn.example.com/g.gif",
+    ]
+    assert mod.MediaFilter(["gif"], links=False).select(links) == [
+        "http://i.imgur.com/a.gif",
+        "http://media.giphy.com/c.GIF?cid=1",
+        "http://notimgur.com/f.gif",
+    ]
+    assert mod.MediaFilter(include_hosts=["imgur.com", "cdn.example.com"]).select(
+        links
+    ) == [
+        "http://i.imgur.com/a.gif",
+        "https://i.imgur.com/b.gif",
+        "http://cdn.example.com:8080/d.webp",
+        "http://cdn.example.com/g.gif",
+    ]
+    assert mod.MediaFilter(exclude_hosts=["imgur.com", "GIPHY.com"]).select(links) == [
+        "http://cdn.example.com:8080/d.webp",
+        "http://notimgur.com/f.gif",
+        "http://cdn.example.com/g.gif",
+    ]
+
+    # a line break inside a URL cannot smuggle in a second one
+    for parse in (mod.parse_links_fast, mod.parse_links_bs4):
+        smuggled = parse(
+            '<img src="http://a.com/p.png\nhttp://evil.example/x.gif">'
+            '<a href="http://a.com/q.png\r\nhttp://evil.example/y.gif">y</a>'
+        )
+        assert mod.MediaFilter().select(smuggled) == []
+
+    # the file keeps its extension last when the URL has a query string
+    s = mod.Scraper()
+    s.folder_and_log_name = str(tmp_path)
+    assert s.save_file("T", "media.giphy.com/c.GIF?cid=1", _FakeGifResponse([b"G"]))
+    assert s.all_file_names_saved == {"T__media.giphy.com-c.GIF-cid-1.gif"}
+
+
+def test_log_keeps_one_handle_and_filters_console(tmp_path, capsys):
+    s = mod.Scraper(console_level=mod.logging.INFO, log_flush_interval=3600)
+    s.folder_and_log_name = str(tmp_path / "log_out")
+    os.makedirs(s.folder_and_log_name, exist_ok=True)
+
+    s.write_to_log_and_or_console("first")
+    handle = s.log._file
+    s.write_to_log_and_or_console("Downloading file: x.gif", mod.logging.DEBUG)
+    s.write_to_log_and_or_console("ERROR:  boom", mod.logging.ERROR)
+    assert s.log._file is handle
+
+    printed = capsys.readouterr().out
+    assert "first" in printed and "boom" in printed
+    assert "Downloading file" not in printed
+
+    # ERROR lines force a flush, so everything so far is already on disk
+    with open(s.log.path, "r", encoding="utf-8") as fh:
+        assert fh.read().splitlines() == [
+            "first",
+            "Downloading file: x.gif",
+            "ERROR:  boom",
+        ]
+    s.log.close()
+
+
+def test_log_is_flushed_on_a_timer_after_quiet_stretches(tmp_path):
+    log = mod.RunLog(flush_interval=0.05, console_level=mod.logging.ERROR)
+    path = str(tmp_path / "run.txt")
+    log.write(path, "first")
+    log.write(path, "second")
+
+    # no further writes, yet the buffered line reaches the disk
+    deadline = time.monotonic() + 5
+    while time.monotonic() < deadline:
+        with open(path, "r", encoding="utf-8") as fh:
+            if fh.read().splitlines() == ["first", "second"]:
+                break
+        time.sleep(0.02)
+    else:
+        pytest.fail("buffered log line was never flushed")
+
+    flusher = log._flusher
+    log.close()
+    assert not flusher.is_alive() and log._flusher is None
+
+
+def test_prefetched_forum_pages_match_sequential_crawl(
+    monkeypatch, tmp_path, local_forum
+):
+    plain, plain_files = _run_against_local_forum(
+        monkeypatch, tmp_path / "plain", local_forum
+    )
+    _LocalForumHandler.requested = []
+    piped, piped_files = _run_against_local_forum(
+        monkeypatch,
+        tmp_path / "piped",
+        local_forum,
+        scraper_kwargs={"prefetch_forum_pages": 1},
+    )
+
+    assert piped_files == plain_files
+    assert piped.total_thread_pgs_scraped == plain.total_thread_pgs_scraped
+    assert "/forum/viewforum.php?f=2&topicdays=0&start=30" in (
+        _LocalForumHandler.requested
+    )
+
+
+def test_prefetch_errors_reach_the_forum_crawl(monkeypatch, tmp_path, local_forum):
+    real_fetch = mod.Scraper.fetch
+
+    def fetch(self, url, *args, **kwargs):
+        if "start=30" in url:
+            raise RuntimeError("bug in the producer")
+        return real_fetch(self, url, *args, **kwargs)
+
+    monkeypatch.setattr(mod.Scraper, "fetch", fetch)
+    raised = []
+
+    def crawl():
+        try:
+            _run_against_local_forum(
+                monkeypatch,
+                tmp_path,
+                local_forum,
+                scraper_kwargs={"prefetch_forum_pages": 1},
+            )
+        except RuntimeError as exception:
+            raised.append(exception)
+
+    crawler = threading.Thread(target=crawl, daemon=True)
+    crawler.start()
+    crawler.join(timeout=30)
+
+    assert not crawler.is_alive(), "the crawl hung waiting for the producer"
+    assert [str(exception) for exception in raised] == ["bug in the producer"]
+
+
+def test_multiple_forums_share_dedup_and_report_per_forum(
+    monkeypatch, tmp_path, local_forum
+):
+    s, files = _run_against_local_forum(
+        monkeypatch, tmp_path / "multi", local_forum, scraper_kwargs={"forums": [2, 4]}
+    )
+
+    # "shared" appears in both forums but is saved once
+    assert s.total_gifs_downloaded == len(files) == 8
+    assert sum(1 for name in files if name.endswith("img-shared.gif")) == 1
+    assert set(s.forum_totals) == {2, 4}
+    assert s.forum_totals[2]["thread_pages"] == 4
+    assert s.forum_totals[4]["thread_pages"] == 1
+    assert s.forum_totals[2]["gifs"] + s.forum_totals[4]["gifs"] == 8
+
+
+def test_cli_runs_headless_without_prompts(monkeypatch, tmp_path, local_forum):
+    def no_input(prompt=""):
+        raise AssertionError("headless run must not prompt")
+
+    monkeypatch.setattr("builtins.input", no_input)
+    out_dir = tmp_path / "cli_out"
+    status = mod.main(
+        [
+            "--forum",
+            "2",
+            "--pages",
+            "1",
+            "--workers",
+            "2",
+            "--output-dir",
+            str(out_dir),
+            "--console-level",
+            "error",
+            "--base-url",
+            local_forum,
+        ]
+    )
+
+    assert status == 0
+    gifs = [name for name in os.listdir(out_dir) if name.endswith(".gif")]
+    # page 1 of the forum lists threads 1 and 2 only
+    assert len(gifs) == 6
+    assert not any(name.startswith("Gamma") for name in gifs)
+
+
+def _log_flush_threads():
+    return sum(1 for thread in threading.enumerate() if thread.name == "log-flush")
+
+
+def test_scraper_api_runs_headless_without_prompts(monkeypatch, tmp_path, local_forum):
+    def no_input(prompt=""):
+        raise AssertionError("headless run must not prompt")
+
+    monkeypatch.setattr("builtins.input", no_input)
+    out_dir = tmp_path / "api_out"
+    flushers_before = _log_flush_threads()
+    s = mod.Scraper(
+        forums=[2],
+        total_pages=1,
+        base_url=local_forum,
+        output_dir=str(out_dir),
+        console_level=logging.ERROR,
+    )
+    s.run()
+
+    assert s.start_page == 1
+    assert s.total_gifs_downloaded == 6
+    # the run closed its log: no open handle and no flush thread left behind
+    assert s.log._file is None and s.log._flusher is None
+    assert _log_flush_threads() == flushers_before
+
+
+def test_scraper_api_takes_cli_options():
+    args = mod.build_arg_parser().parse_args(["--all-forums", "--engine", "asyncio"])
+    s = mod.scraper_from_args(args)
+    assert s.forums == [2, 4, 10]
+    assert (s.start_page, s.total_pages, s.engine) == (1, mod.ALL_PAGES, "asyncio")
+
+    interactive = mod.scraper_from_args(mod.build_arg_parser().parse_args([]))
+    assert interactive.forums is None
+    assert interactive.start_page is None and interactive.total_pages is None
+
+
+@pytest.mark.parametrize("engine", ["sync", "asyncio"])
+def test_resume_finishes_an_interrupted_run(monkeypatch, tmp_path, local_forum, engine):
+    full, full_files = _run_against_local_forum(
+        monkeypatch, tmp_path / "full", local_forum, engine=engine
+    )
+
+    out_dir = tmp_path / "interrupted"
+    real_save_file = mod.Scraper.save_file
+    saved = []
+
+    def save_then_crash(self, *args, **kwargs):
+        if len(saved) == 3:
+            raise KeyboardInterrupt
+        saved.append(args[1])
+        return real_save_file(self, *args, **kwargs)
+
+    monkeypatch.setattr(mod.Scraper, "save_file", save_then_crash)
+    with pytest.raises(KeyboardInterrupt):
+        _run_against_local_forum(monkeypatch, out_dir, local_forum, engine=engine)
+    monkeypatch.setattr(mod.Scraper, "save_file", real_save_file)
+    assert len(os.listdir(out_dir)) > 0
+
+    _LocalForumHandler.requested = []
+    resumed = mod.Scraper.from_checkpoint(str(out_dir) + os.sep, base_url=local_forum)
+    resumed.run()
+    # the resumed run appends to the run's log inside the folder
+    with open(out_dir / "interrupted.txt", "r", encoding="utf-8") as fh:
+        assert "RESUMING the run" in fh.read()
+    assert not os.path.exists(tmp_path / "interrupted.txt")
+
+    files = sorted(n for n in os.listdir(out_dir) if n.endswith(".gif"))
+    assert files == full_files
+    assert resumed.total_gifs_downloaded == full.total_gifs_downloaded == 7
+    assert resumed.total_thread_pgs_scraped == full.total_thread_pgs_scraped
+    # GIFs saved before the interruption are not downloaded again
+    for path in saved:
+        assert "/" + path.split("/", 1)[1] not in _LocalForumHandler.requested
+
+    # a finished run has nothing left to resume
+    _LocalForumHandler.requested = []
+    status = mod.main(
+        [
+            "--resume",
+            str(out_dir),
+            "--base-url",
+            local_forum,
+            "--console-level",
+            "error",
+        ]
+    )
+    assert status == 0
+    assert _LocalForumHandler.requested == []
+    assert mod.main(["--resume", str(tmp_path / "nowhere")]) == 1
+
+
+def test_host_limiter_adapts_concurrency_and_rate():
+    limiter = mod.HostLimiter(
+        {"forum.example": 20.0}, initial_concurrency=2, max_concurrency=4
+    )
+    for _ in range(2):
+        limiter.acquire("cdn.example")
+    for _ in range(2):
+        limiter.release("cdn.example", 200, 0.05)
+    # a full window of healthy responses ramps the limit up by one
+    assert limiter.limit("cdn.example") == 3
+
+    limiter.acquire("cdn.example")
+    assert limiter.release("cdn.example", 429, 0.05, retry_after=0.2) == 0.2
+    assert limiter.limit("cdn.example") == 1
+    started = time.monotonic()
+    limiter.acquire("cdn.example")
+    assert time.monotonic() - started >= 0.15
+    limiter.release("cdn.example", 200, 0.05)
+
+    # 20 requests/s with a one-second burst: 25 requests need about 0.25s
+    started = time.monotonic()
+    for _ in range(25):
+        limiter.acquire("forum.example")
+        limiter.release("forum.example", 200, 0.01)
+    assert time.monotonic() - started >= 0.2
+
+    assert mod.retry_after_seconds("3") == 3.0
+    assert mod.retry_after_seconds(None) is None
+    date = "Wed, 21 Oct 2015 07:28:00 GMT"
+    now = mod.parsedate_to_datetime(date).timestamp() - 10
+    assert mod.retry_after_seconds(date, now=now) == 10.0
+
+
+def test_fetch_waits_out_throttled_responses(local_forum):
+    _LocalForumHandler.failures["/forum/viewtopic.php?t=2"] = 2
+    s = mod.Scraper(retries=3, backoff_factor=0.1, console_level=logging.ERROR)
+    started = time.monotonic()
+    res = s.fetch(local_forum + "viewtopic.php?t=2")
+    assert "d.gif" in res.text
+    # two 503s: paused 0.1s then 0.2s; the limit was halved twice (4 -> 1) and
+    # the successful answer ramped it back up by one
+    assert time.monotonic() - started >= 0.25
+    assert s.limiter.limit("127.0.0.1") == 2
+    s.shutdown()
+
+
+def test_asyncio_engine_lets_a_host_ramp_up_past_its_starting_limit(monkeypatch):
+    s = mod.Scraper(
+        max_concurrency=4, per_host_concurrency=1, console_level=logging.ERROR
+    )
+    # healthy responses have already ramped the host up to max_concurrency
+    for _ in range(6):
+        s.limiter.acquire("cdn.example.com")
+        s.limiter.release("cdn.example.com", 200, 0.01)
+    assert s.limiter.limit("cdn.example.com") == 4
+
+    lock = threading.Lock()
+    in_flight, peak = [0], [0]
+
+    def slow_get(url, *args, **kwargs):
+        with lock:
+            in_flight[0] += 1
+            peak[0] = max(peak[0], in_flight[0])
+        time.sleep(0.1)
+        with lock:
+            in_flight[0] -= 1
+        return _FakePageResponse("<html></html>")
+
+    monkeypatch.setattr(s.session, "get", slow_get)
+    engine = mod.AsyncEngine(s)
+
+    async def fetch_all():
+        engine._global_limit = asyncio.Semaphore(s.max_concurrency)
+        engine._executor = mod.ThreadPoolExecutor(max_workers=s.max_concurrency)
+        try:
+            urls = [f"http://cdn.example.com/{n}" for n in range(4)]
+            await asyncio.gather(*(engine.fetch(url) for url in urls))
+        finally:
+            engine._executor.shutdown()
+
+    asyncio.run(fetch_all())
+    assert peak[0] == 4
+    s.shutdown()
+
+
+def test_streamed_responses_hold_their_host_slot_until_closed(monkeypatch):
+    s = mod.Scraper(console_level=logging.ERROR)
+    monkeypatch.setattr(
+        s.session, "get", lambda url, *a, **kw: _FakeGifResponse([b"GIF"])
+    )
+    s.limiter.slow_response = 0.05
+    res = s.fetch("http://cdn.example.com/a.gif", stream=True)
+    host = s.limiter._hosts["cdn.example.com"]
+
+    # the body has not been read yet, so the request still holds its slot
+    assert host["in_flight"] == 1
+    assert list(res.iter_content(64)) == [b"GIF"]
+    time.sleep(0.1)
+    res.close()
+    res.close()
+    assert host["in_flight"] == 0
+    # a long body transfer is not a slow response: the headers came quickly
+    assert s.limiter.limit("cdn.example.com") == 4
+    assert s.metrics.report()["hosts"]["cdn.example.com"]["requests"] == 1
+    s.shutdown()
+
+
+class _StreamedGifResponse(_FakeGifResponse):
+    """A fake GIF response with headers that records how its body was read."""
+
+    def __init__(self, chunks, headers=None):
+        super().__init__(chunks)
+        self.headers = headers or {}
+        self.chunks_read = 0
+        self.chunk_size = None
+        self.closed = False
+
+    def iter_content(self, chunk_size=65536):
+        self.chunk_size = chunk_size
+        for chunk in self._chunks:
+            self.chunks_read += 1
+            yield chunk
+
+    def close(self):
+        self.closed = True
+
+
+def test_gif_download_streams_and_aborts_early(monkeypatch, tmp_path):
+    s = mod.Scraper(max_gif_bytes=10, chunk_size=4, console_level=logging.ERROR)
+    s.folder_and_log_name = str(tmp_path)
+
+    rejected = {
+        "html.gif": _StreamedGifResponse(
+            [b"GIF89a"], {"Content-Type": "text/html; charset=utf-8"}
+        ),
+        "huge.gif": _StreamedGifResponse([b"GIF89a"], {"Content-Length": "100"}),
+        "error.gif": _StreamedGifResponse([b"\n<!DOCTYPE html><p>Not found</p>"]),
+        "grows.gif": _StreamedGifResponse([b"GIF89a", b"12345", b"never read"]),
+    }
+    for name, res in rejected.items():
+        assert s.save_file("T", name, res) is False
+    # the headers alone rule out the first two, so no body is read
+    assert rejected["html.gif"].chunks_read == rejected["huge.gif"].chunks_read == 0
+    assert rejected["grows.gif"].chunks_read == 2
+    assert not any(n.endswith(".gif") for n in os.listdir(tmp_path))
+
+    fine = _StreamedGifResponse(
+        [b"GIF89a", b"xy"], {"Content-Type": "image/gif", "Content-Length": "8"}
+    )
+    assert s.save_file("T", "fine.gif", fine) is True
+    assert fine.chunk_size == 4
+
+    requests_made = []
+
+    def fake_get(url, *args, **kwargs):
+        requests_made.append(kwargs.get("stream"))
+        return responses[url]
+
+    responses = {"http://cdn.example.com/a.gif": _StreamedGifResponse([b"GIF89a"])}
+    monkeypatch.setattr(s.session, "get", fake_get)
+    page = mod.Page(s.parse('<img src="http://cdn.example.com/a.gif">'), "P", s)
+    page.process_page()
+    assert page.gifs_downloaded == 1
+    assert requests_made == [True]
+    assert responses["http://cdn.example.com/a.gif"].closed
+
+
+def test_latency_histogram_percentiles():
+    histogram = mod.LatencyHistogram()
+    for ms in (0.5, 3, 3, 4, 40, 40, 40, 40, 40, 700):
+        histogram.add(ms / 1000)
+    summary = histogram.as_dict()
+    assert summary["count"] == 10
+    assert summary["p50_ms"] == 50
+    assert summary["p90_ms"] == 50
+    assert summary["p99_ms"] == 700
+    assert summary["max_ms"] == 700
+    assert summary["buckets"] == {"<=1ms": 1, "<=5ms": 3, "<=50ms": 5, "<=1000ms": 1}
+
+
+def test_run_writes_metrics_report(monkeypatch, tmp_path, local_forum, capsys):
+    out_dir = tmp_path / "metrics"
+    s, files = _run_against_local_forum(
+        monkeypatch,
+        out_dir,
+        local_forum,
+        scraper_kwargs={"progress_interval": 0.01, "console_level": logging.ERROR},
+    )
+    assert len(files) == 7
+
+    with open(out_dir / "point83_metrics.json", encoding="utf-8") as f:
+        report = json.load(f)
+    counts = {stage: timing["count"] for stage, timing in report["stages"].items()}
+    assert list(counts) == list(mod.Metrics.STAGES)
+    # 2 forum pages, 4 thread pages and 8 GIF requests (missing.gif is a 404)
+    assert counts["forum fetch"] == 2
+    assert counts["thread fetch"] == 4
+    assert counts["parse"] == 6
+    assert counts["gif fetch"] == 8
+    assert counts["gif body"] == counts["disk write"] == 7
+    assert report["counters"]["gifs_downloaded"] == 7
+    assert report["errors"] == {"HTTP 404": 1}
+    gif_bytes = sum(os.path.getsize(out_dir / name) for name in files)
+    assert report["bytes"]["gifs"] == report["bytes"]["written"] == gif_bytes
+    host = report["hosts"]["127.0.0.1"]
+    assert host["requests"] == 14 and host["errors"] == 1
+    assert host["bytes"] == report["bytes"]["pages"] + report["bytes"]["gifs"]
+
+    # the progress line was drawn and its final state left on screen
+    assert "7 GIFs" in capsys.readouterr().err.splitlines()[-1]
+
+
+def test_bench_dedup_runs(capsys):
+    import bench_point_83_gifs as bench
+
+    bench.bench_dedup(sizes=(10,), lookups=5)
+    out = capsys.readouterr().out
+    assert "dedup: mean cost of Page._reserve" in out
+    assert out.splitlines()[2].split()[0] == "10"
+
+
+def test_bench_crawl_against_fake_forum(capsys):
+    import bench_point_83_gifs as bench
+
+    bench.bench_crawl(
+        configs=(("sync", {}), ("asyncio", {"engine": "asyncio"})),
+        forum_pages=2,
+        threads_per_page=2,
+        thread_pages=2,
+        posts=2,
+        gif_kb=1,
+        latency_ms=0,
+    )
+    out = capsys.readouterr().out
+    assert "crawl: 8 thread pages, 16 GIFs of 1 KB" in out
+    assert "\nsync " in out and "\nasyncio " in out
+    assert "WARNING" not in out
+
+
+def test_distributed_workers_share_the_crawl(monkeypatch, tmp_path, local_forum):
+    _, single_files = _run_against_local_forum(
+        monkeypatch, tmp_path / "single", local_forum
+    )
+
+    out_dir, queue = tmp_path / "shared", str(tmp_path / "queue.sqlite3")
+    common = ["--output-dir", str(out_dir), "--base-url", local_forum]
+    common += ["--console-level", "error"]
+    # workers start before anything is queued and wait for the coordinator
+    workers = [
+        subprocess.Popen(
+            [sys.executable, mod.__file__, "--work", queue, "--workers", "2"] + common
+        )
+        for _ in range(3)
+    ]
+    _LocalForumHandler.requested = []
+    try:
+        assert mod.main(["--coordinate", queue, "--forum", "2"] + common) == 0
+    finally:
+        statuses = [worker.wait(timeout=60) for worker in workers]
+    assert statuses == [0, 0, 0]
+
+    files = [n for n in os.listdir(out_dir) if n.endswith(".gif")]
+    # which thread's name prefixes the shared GIF depends on which worker got it
+    assert sorted(n.split("__")[1] for n in files) == sorted(
+        n.split("__")[1] for n in single_files
+    )
+    gif_requests = [p for p in _LocalForumHandler.requested if p.startswith("/img/")]
+    # each GIF fetched by one worker only, "shared" included
+    assert sorted(gif_requests) == sorted(set(gif_requests))
+    assert len(gif_requests) == 8
+    assert mod.WorkQueue(queue).counts() == {"done": 3}
+
+
+def test_work_queue_leases_expire_and_retry(tmp_path):
+    queue = mod.WorkQueue(str(tmp_path / "q.sqlite3"), lease_seconds=0.1)
+    other = mod.WorkQueue(queue.path, lease_seconds=0.1, max_attempts=2)
+    assert queue.add("viewtopic.php?t=1", "One")
+    assert not queue.add("viewtopic.php?t=1", "One again")
+    assert not queue.drained()
+
+    task = queue.lease("a")
+    assert task["uri"] == "viewtopic.php?t=1" and task["attempts"] == 1
+    assert queue.claim("cdn/x.gif", "a") and not other.claim("cdn/x.gif", "b")
+    assert other.lease("b") is None
+
+    # worker "a" dies: its lease expires and its unsaved claim is dropped
+    time.sleep(0.15)
+    task = other.lease("b")
+    assert task["attempts"] == 2
+    assert other.claim("cdn/x.gif", "b")
+    other.fail(task["uri"], "b", "boom")
+    assert other.counts() == {"failed": 1}
+
+    queue.add("viewtopic.php?t=2", "Two")
+    queue.finish_enumeration()
+    task = queue.lease("a")
+    queue.complete(task["uri"], "a")
+    assert queue.drained()